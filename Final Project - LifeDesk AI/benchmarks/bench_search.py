@@ -0,0 +1,75 @@
+"""Time BM25 note ranking over a generated corpus; fails above 50 ms per query.
+
+Builds a notes index of synthetic notes (a Zipf-like vocabulary, so some
+terms are in most notes and others in a handful) and times bm25_rank for a
+mix of rare-term, common-term and mixed questions. Building the 100k-note
+index takes a couple of minutes; only the queries are timed.
+
+Run from the "Final Project - LifeDesk AI" directory:
+
+    python benchmarks/bench_search.py             # 100k notes
+    python benchmarks/bench_search.py 20000
+"""
+from __future__ import annotations
+
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from lifedesk.index import NoteIndex  # noqa: E402
+from lifedesk.ranking import bm25_rank, question_terms  # noqa: E402
+
+BUDGET_MS = 50.0
+VOCABULARY = 20_000
+WORDS_PER_NOTE = 60
+QUESTIONS = [
+    "explain term00017 and term00003",  # one rare, one very common term
+    "term00001 term00002 term00004",  # only common terms
+    "what is term12345",  # a single rare term
+    "term00009 term00250 term03000 term15000",  # mixed
+]
+
+
+def make_notes(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    words = [f"term{i:05d}" for i in range(VOCABULARY)]
+    weights = [1.0 / (rank + 1) for rank in range(VOCABULARY)]
+    for note_id in range(1, count + 1):
+        body = rng.choices(words, weights, k=WORDS_PER_NOTE)
+        yield {"id": note_id, "title": f"Note {note_id}", "body": " ".join(body), "tags": []}
+
+
+def main(argv: list[str]) -> int:
+    count = int(argv[0]) if argv else 100_000
+    with tempfile.TemporaryDirectory() as tmp:
+        index = NoteIndex(Path(tmp) / "index.db")
+        start = time.perf_counter()
+        index.add_notes(make_notes(count))
+        print(f"indexed {count:,} notes in {time.perf_counter() - start:.1f} s")
+
+        worst = 0.0
+        for question in QUESTIONS:
+            terms = question_terms(question)
+            bm25_rank(index, terms, k=3)  # warm the page cache
+            timings = []
+            for _ in range(5):
+                start = time.perf_counter()
+                ranked = bm25_rank(index, terms, k=3)
+                timings.append((time.perf_counter() - start) * 1000)
+            median = sorted(timings)[len(timings) // 2]
+            worst = max(worst, median)
+            print(f"{median:7.1f} ms  {question!r} -> {[note_id for _, note_id in ranked]}")
+        index.close()
+
+    if worst > BUDGET_MS:
+        print(f"FAIL: slowest query took {worst:.1f} ms, budget is {BUDGET_MS:.0f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
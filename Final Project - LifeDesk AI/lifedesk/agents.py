@@ -1,16 +1,42 @@
-import json
-from datetime import datetime
-from typing import List, Dict, Any
-
-from .tasks import list_tasks
-from .notes import list_notes
-
-# Optional OpenAI support (only used if configured)
-try:
-    from openai import OpenAI
-    _client = OpenAI()
-except Exception:
-    _client = None
+import heapq
+import time
+from datetime import date
+from typing import List, Dict, Any, Callable, Iterator, Optional, Tuple, Union
+
+from .tasks import list_tasks, due_ordinal
+from .notes import has_notes, get_notes
+from .ranking import rank_notes, rank_passages
+from .passages import chunk_offsets
+from .response_cache import get_cache, make_key
+from .memo import get_memo, memo_key
+from . import prompts, storage, trace
+
+MODEL = "gpt-4.1-mini"
+
+# Longest passage shown in a local notes answer.
+PASSAGE_PREVIEW_CHARS = 300
+
+# Prompt size and model time of the most recent request (shown by --metrics).
+last_metrics: Dict[str, Any] = {}
+
+# Optional OpenAI support (only used if configured). The client is built on
+# first use so that commands which never talk to a model don't pay for
+# importing openai and its dependencies.
+_client = None
+_client_loaded = False
+
+
+def _get_client():
+    """Return the OpenAI client, or None if openai is missing or not configured."""
+    global _client, _client_loaded
+    if not _client_loaded:
+        _client_loaded = True
+        try:
+            from openai import OpenAI
+            _client = OpenAI()
+        except Exception:
+            _client = None
+    return _client
 
 
 # ---------------------------
@@ -26,48 +52,59 @@ def _priority_weight(priority: str) -> int:
     return 2  # medium or anything else
 
 
-def _score_task(task: Dict[str, Any]) -> float:
+def _score_task(task: Dict[str, Any], today_ordinal: Optional[int] = None) -> float:
     """
     Compute a simple score for a task:
     - higher for higher priority
     - higher if due soon or overdue
+    Uses the task's precomputed due_ordinal (day number) when present.
     """
+    if today_ordinal is None:
+        today_ordinal = date.today().toordinal()
     base = _priority_weight(task.get("priority"))
-    due_str = task.get("due_date")
     bonus = 0.0
 
-    if due_str:
-        try:
-            due_date = datetime.strptime(due_str, "%Y-%m-%d").date()
-            today = datetime.today().date()
-            days_diff = (due_date - today).days
-            # Overdue → big bonus
-            if days_diff < 0:
-                bonus += 10
-            else:
-                # Due sooner → higher score, but capped
-                bonus += max(0, 30 - days_diff) / 5.0
-        except Exception:
-            # If date is malformed, ignore date bonus
-            pass
+    due = task.get("due_ordinal")
+    if due is None and task.get("due_date"):
+        # Tasks saved before due_ordinal existed; malformed dates give None.
+        due = due_ordinal(task["due_date"])
+
+    if due is not None:
+        days_diff = due - today_ordinal
+        # Overdue → big bonus
+        if days_diff < 0:
+            bonus += 10
+        else:
+            # Due sooner → higher score, but capped
+            bonus += max(0, 30 - days_diff) / 5.0
 
     return base * 10 + bonus
 
 
-def _local_suggest_next_tasks() -> str:
+def top_tasks(
+    tasks_list: List[Dict[str, Any]], k: int = 3, today: Optional[date] = None
+) -> List[Dict[str, Any]]:
+    """
+    Return the k highest-scoring tasks, best first. Uses a bounded heap, so
+    only k tasks are kept in order instead of sorting the whole list.
+    """
+    today_ordinal = (today or date.today()).toordinal()
+    with trace.span("rank_tasks", tasks=len(tasks_list)):
+        return heapq.nlargest(k, tasks_list, key=lambda t: _score_task(t, today_ordinal))
+
+
+def _local_suggest_next_tasks(today: Optional[date] = None) -> str:
     """
     Local, rule-based suggestion:
     - consider only todo tasks
     - rank by priority and due date
     """
-    tasks_list: List[Dict[str, Any]] = list_tasks()
-    todo_tasks = [t for t in tasks_list if t.get("status") == "todo"]
+    todo_tasks: List[Dict[str, Any]] = list_tasks(status="todo")
 
     if not todo_tasks:
         return "You have no TODO tasks. Everything is either done or empty."
 
-    ranked = sorted(todo_tasks, key=_score_task, reverse=True)
-    top = ranked[:3]
+    top = top_tasks(todo_tasks, k=3, today=today)
 
     lines = []
     lines.append("Here are the top tasks to do next (local heuristic, no OpenAI):")
@@ -86,49 +123,45 @@ def _local_suggest_next_tasks() -> str:
     return "\n".join(lines)
 
 
-def _local_answer_question_about_notes(question: str) -> str:
+def _local_answer_question_about_notes(question: str, semantic: bool = False) -> str:
     """
-    Very simple local Q&A:
-    - look for notes that share words with the question
-    - return the best matches with their content
+    Local Q&A:
+    - rank paragraph passages against the question with BM25 (or whole
+      notes by vector similarity if semantic)
+    - return the best passages with the notes they come from
     """
-    notes_list: List[Dict[str, Any]] = list_notes()
-    if not notes_list:
+    if not has_notes():
         return "You have no notes yet. Add some notes first."
 
-    q = question.lower()
-    # crude tokenization
-    q_words = [w for w in q.replace("?", " ").replace(",", " ").split() if len(w) > 2]
-
-    def score_note(n: Dict[str, Any]) -> int:
-        text = (n.get("title", "") + " " + n.get("body", " ")).lower()
-        tags = " ".join(n.get("tags", [])).lower()
-        text_all = text + " " + tags
-        return sum(text_all.count(w) for w in q_words)
+    if semantic:
+        # Vectors are per note; show each note's opening paragraph.
+        ranked = [(note_id, None) for _, note_id in rank_notes(question, k=3, semantic=True)]
+    else:
+        ranked = [(note_id, (start, end)) for _, note_id, start, end in rank_passages(question, k=3)]
 
-    scored = [(score_note(n), n) for n in notes_list]
-    scored = [pair for pair in scored if pair[0] > 0]
-
-    if not scored:
+    if not ranked:
         return (
             "I looked through your notes but could not find anything that clearly "
             "matches your question. Try adding more detailed notes or using different keywords."
         )
 
-    scored.sort(key=lambda x: x[0], reverse=True)
-    top = [n for _, n in scored[:3]]
+    by_id = {n["id"]: n for n in get_notes([note_id for note_id, _ in ranked])}
 
     lines = []
-    lines.append("Here are some notes that seem most relevant to your question:")
+    lines.append("Here are the passages from your notes that best match your question:")
     lines.append(f'Question: "{question}"')
     lines.append("")
 
-    for n in top:
+    for note_id, offsets in ranked:
+        n = by_id.get(note_id)
+        if n is None:
+            continue
+        start, end = offsets or chunk_offsets(n["body"])[0]
         lines.append(f"- [{n['id']}] {n['title']} (tags={','.join(n.get('tags', []))})")
-        preview = n["body"].strip().splitlines()[0]
-        if len(preview) > 120:
-            preview = preview[:117] + "..."
-        lines.append(f"    {preview}")
+        passage = " ".join(n["body"][start:end].split())
+        if len(passage) > PASSAGE_PREVIEW_CHARS:
+            passage = passage[: PASSAGE_PREVIEW_CHARS - 3] + "..."
+        lines.append(f"    {passage}")
         lines.append("")
 
     return "\n".join(lines).rstrip()
@@ -138,83 +171,299 @@ def _local_answer_question_about_notes(question: str) -> str:
 # Optional OpenAI wrapper
 # ---------------------------
 
-def _call_openai(system_prompt: str, user_prompt: str) -> str:
+# What an agent needs answered: a finished local answer, or the
+# (system_prompt, user_prompt) pair to send to the model.
+Request = Union[str, Tuple[str, str]]
+
+
+def _start_request(
+    system_prompt: str, user_prompt: str, use_cache: bool
+) -> Tuple[str, Optional[str], float]:
+    """Reset last_metrics and look the request up in the response cache."""
+    last_metrics.clear()
+    last_metrics["prompt_chars"] = len(system_prompt) + len(user_prompt)
+    last_metrics["prompt_tokens"] = prompts.estimate_tokens(system_prompt + user_prompt)
+    start = time.perf_counter()
+
+    key = make_key(MODEL, system_prompt, user_prompt)
+    cached = None
+    if use_cache:
+        cached = get_cache().get(key)
+        last_metrics["cache"] = "miss" if cached is None else "hit"
+        if cached is not None:
+            last_metrics["first_token_seconds"] = time.perf_counter() - start
+            last_metrics["model_seconds"] = last_metrics["first_token_seconds"]
+    return key, cached, start
+
+
+NOT_CONFIGURED = (
+    "OpenAI client not configured. "
+    "Install the 'openai' library and set OPENAI_API_KEY "
+    "to enable cloud-based AI features."
+)
+
+
+def _call_openai(system_prompt: str, user_prompt: str, use_cache: bool = True) -> str:
     """
     Helper to call the OpenAI Chat Completions API.
     If OpenAI is not available, fall back to local behavior.
+    Identical requests are answered from the on-disk response cache
+    unless use_cache is False.
     """
-    if _client is None:
+    with trace.span("call_openai") as span:
+        answer = _request_completion(system_prompt, user_prompt, use_cache)
+        span.set(cache=last_metrics.get("cache"), prompt_tokens=last_metrics["prompt_tokens"])
+        return answer
+
+
+def _request_completion(system_prompt: str, user_prompt: str, use_cache: bool) -> str:
+    key, cached, start = _start_request(system_prompt, user_prompt, use_cache)
+    if cached is not None:
+        return cached
+
+    client = _get_client()
+    if client is None:
         # Should never be used directly now; callers decide what to do.
-        return (
-            "OpenAI client not configured. "
-            "Install the 'openai' library and set OPENAI_API_KEY "
-            "to enable cloud-based AI features."
-        )
+        return NOT_CONFIGURED
+
+    response = client.chat.completions.create(
+        model=MODEL,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ],
+    )
+
+    answer = response.choices[0].message.content.strip()
+    last_metrics["model_seconds"] = time.perf_counter() - start
+    if use_cache:
+        get_cache().put(key, answer)
+    return answer
+
+
+def _stream_openai(system_prompt: str, user_prompt: str, use_cache: bool = True) -> Iterator[str]:
+    """
+    Like _call_openai, but yields the answer piece by piece as the model
+    produces it. Time to the first piece is recorded in last_metrics as
+    first_token_seconds; the full answer is cached once the stream ends.
+    """
+    with trace.span("call_openai", stream=True) as span:
+        for piece in _stream_completion(system_prompt, user_prompt, use_cache):
+            yield piece
+        span.set(cache=last_metrics.get("cache"), prompt_tokens=last_metrics["prompt_tokens"])
 
-    response = _client.chat.completions.create(
-        model="gpt-4.1-mini",
+
+def _stream_completion(system_prompt: str, user_prompt: str, use_cache: bool) -> Iterator[str]:
+    key, cached, start = _start_request(system_prompt, user_prompt, use_cache)
+    if cached is not None:
+        yield cached
+        return
+
+    client = _get_client()
+    if client is None:
+        yield NOT_CONFIGURED
+        return
+
+    stream = client.chat.completions.create(
+        model=MODEL,
         messages=[
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt},
         ],
+        stream=True,
     )
 
-    return response.choices[0].message.content.strip()
+    parts: List[str] = []
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        text = chunk.choices[0].delta.content
+        if not parts and text:
+            # Match the non-streaming answer, which is stripped.
+            text = text.lstrip()
+        if not text:
+            continue
+        if not parts:
+            last_metrics["first_token_seconds"] = time.perf_counter() - start
+        parts.append(text)
+        yield text
+
+    last_metrics["model_seconds"] = time.perf_counter() - start
+    if use_cache and parts:
+        get_cache().put(key, "".join(parts).strip())
+
+
+def _answer(request: Request, use_cache: bool) -> str:
+    if isinstance(request, str):
+        return request
+    return _call_openai(*request, use_cache=use_cache)
+
+
+def _stream_answer(request: Request, use_cache: bool) -> Iterator[str]:
+    if isinstance(request, str):
+        # Local answers are already complete; hand them out a line at a time.
+        last_metrics.clear()
+        return iter(request.splitlines(keepends=True))
+    return _stream_openai(*request, use_cache=use_cache)
 
 
 # ---------------------------
-# Public agent APIs
+# Memoization
 # ---------------------------
 
-def agent_suggest_next_tasks() -> str:
+def _memo_lookup(kind: str, args: List[Any]) -> Tuple[str, int, str, Optional[str]]:
     """
-    Top-level API for suggesting next tasks.
-    - If OpenAI is configured, use it.
-    - Otherwise, use local heuristic.
+    Look up an earlier result of the same agent call. Results are keyed by
+    the call, whether the model or the local heuristic answers it, the state
+    version and today's date, so a hit means nothing it depends on changed.
     """
+    with trace.span("memo_lookup") as span:
+        key = memo_key(kind, MODEL if _get_client() is not None else "local", *args)
+        version = storage.state_version()
+        day = date.today().isoformat()
+        result = get_memo().get(key, version, day)
+        span.set(hit=result is not None)
+    if result is not None:
+        last_metrics.clear()
+        last_metrics["memo"] = "hit"
+    return key, version, day, result
+
+
+def _memoized(kind: str, args: List[Any], request: Callable[[], Request], use_cache: bool) -> str:
+    if not use_cache:
+        return _answer(request(), use_cache)
+    key, version, day, result = _memo_lookup(kind, args)
+    if result is None:
+        result = _answer(request(), use_cache)
+        get_memo().put(key, version, day, result)
+    return result
+
+
+def _memoized_stream(
+    kind: str, args: List[Any], request: Callable[[], Request], use_cache: bool
+) -> Iterator[str]:
+    if not use_cache:
+        yield from _stream_answer(request(), use_cache)
+        return
+    key, version, day, result = _memo_lookup(kind, args)
+    if result is not None:
+        yield result
+        return
+    parts: List[str] = []
+    for piece in _stream_answer(request(), use_cache):
+        parts.append(piece)
+        yield piece
+    get_memo().put(key, version, day, "".join(parts).strip())
+
+
+# ---------------------------
+# Public agent APIs
+# ---------------------------
+
+def _suggest_next_tasks_request() -> Request:
     tasks_list: List[Dict[str, Any]] = list_tasks()
     if not tasks_list:
         return "You have no tasks yet. Start by adding a few tasks first."
 
-    # If no OpenAI client, use local heuristic
-    if _client is None:
+    # If no OpenAI client, or nothing left to do, use local heuristic
+    if _get_client() is None or all(t.get("status") == "done" for t in tasks_list):
         return _local_suggest_next_tasks()
 
-    tasks_json = json.dumps(tasks_list, indent=2)
+    with trace.span("build_prompt"):
+        system_prompt = "You are a helpful assistant that prioritizes a student's tasks."
+        user_prompt = prompts.build_tasks_prompt(prompts.encode_tasks(tasks_list))
+    return system_prompt, user_prompt
 
-    system_prompt = "You are a helpful assistant that prioritizes a student's tasks."
-    user_prompt = (
-        "Here is my current task list as JSON. "
-        "Suggest the top 3 tasks I should do next and explain why, "
-        "using bullet points.\n\n"
-        f"{tasks_json}"
-    )
 
-    return _call_openai(system_prompt, user_prompt)
-
-
-def agent_answer_question_about_notes(question: str) -> str:
+def agent_suggest_next_tasks(use_cache: bool = True) -> str:
     """
-    Top-level API for answering questions about notes.
-    - If OpenAI is configured, ask the model.
-    - Otherwise, use a local keyword-based search.
+    Top-level API for suggesting next tasks.
+    - If OpenAI is configured, use it.
+    - Otherwise, use local heuristic.
+    Unless use_cache is False, the answer is reused until a task or note
+    changes or the day ends.
     """
-    notes_list: List[Dict[str, Any]] = list_notes()
-    if not notes_list:
-        return "You have no notes yet. Add some notes so I can answer questions about them."
+    return _memoized("suggest_next_tasks", [], _suggest_next_tasks_request, use_cache)
+
 
-    if _client is None:
-        return _local_answer_question_about_notes(question)
+def stream_suggest_next_tasks(use_cache: bool = True) -> Iterator[str]:
+    """agent_suggest_next_tasks, yielding the answer as it is produced."""
+    return _memoized_stream("suggest_next_tasks", [], _suggest_next_tasks_request, use_cache)
 
-    notes_json = json.dumps(notes_list, indent=2)
+
+def _answer_question_about_notes_request(
+    question: str,
+    max_tokens: Optional[int] = None,
+    top_k: Optional[int] = None,
+    full_context: bool = False,
+    semantic: bool = False,
+) -> Request:
+    if not has_notes():
+        return "You have no notes yet. Add some notes so I can answer questions about them."
+
+    if _get_client() is None:
+        return _local_answer_question_about_notes(question, semantic=semantic)
 
     system_prompt = (
         "You are a study assistant. Use ONLY the user's notes to answer their question. "
         "If the notes do not contain enough information, say that you are unsure."
     )
-    user_prompt = (
-        f"Here are my notes as JSON:\n{notes_json}\n\n"
-        f"My question is: {question}"
-    )
-
-    return _call_openai(system_prompt, user_prompt)
\ No newline at end of file
+    with trace.span("build_prompt"):
+        if full_context:
+            user_prompt = prompts.full_notes_prompt(question)
+        else:
+            _, note_lines = prompts.select_notes_for_prompt(
+                question,
+                max_tokens=max_tokens or prompts.default_prompt_tokens(),
+                top_k=top_k or prompts.default_top_k(),
+                semantic=semantic,
+            )
+            user_prompt = prompts.build_notes_prompt(question, note_lines)
+    return system_prompt, user_prompt
+
+
+def _notes_call(
+    question: str,
+    max_tokens: Optional[int],
+    top_k: Optional[int],
+    full_context: bool,
+    semantic: bool,
+) -> Tuple[List[Any], Callable[[], Request]]:
+    """Memo arguments (with defaults resolved) and the request builder for a notes question."""
+    max_tokens = max_tokens or prompts.default_prompt_tokens()
+    top_k = top_k or prompts.default_top_k()
+    args = [question, max_tokens, top_k, full_context, semantic]
+    return args, lambda: _answer_question_about_notes_request(question, *args[1:])
+
+
+def agent_answer_question_about_notes(
+    question: str,
+    use_cache: bool = True,
+    max_tokens: Optional[int] = None,
+    top_k: Optional[int] = None,
+    full_context: bool = False,
+    semantic: bool = False,
+) -> str:
+    """
+    Top-level API for answering questions about notes.
+    - If OpenAI is configured, ask the model, sending only the top_k most
+      relevant notes that fit in max_tokens (or every note if full_context).
+    - Otherwise, use a local keyword-based search.
+    semantic ranks notes by vector similarity instead of BM25 (needs NumPy).
+    Answers are memoized like agent_suggest_next_tasks.
+    """
+    args, request = _notes_call(question, max_tokens, top_k, full_context, semantic)
+    return _memoized("answer_question_about_notes", args, request, use_cache)
+
+
+def stream_answer_question_about_notes(
+    question: str,
+    use_cache: bool = True,
+    max_tokens: Optional[int] = None,
+    top_k: Optional[int] = None,
+    full_context: bool = False,
+    semantic: bool = False,
+) -> Iterator[str]:
+    """agent_answer_question_about_notes, yielding the answer as it is produced."""
+    args, request = _notes_call(question, max_tokens, top_k, full_context, semantic)
+    return _memoized_stream("answer_question_about_notes", args, request, use_cache)
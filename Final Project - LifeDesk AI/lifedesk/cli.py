@@ -1,7 +1,11 @@
 import argparse
+import sys
+import time
+from itertools import islice
+from pathlib import Path
 from typing import List
 
-from . import tasks, notes, agents
+from . import tasks, notes, storage
 
 
 def _print_task(t) -> None:
@@ -20,6 +24,23 @@ def _print_note(n) -> None:
         print(f"    {line}")
 
 
+def _print_import_report(kind: str, report) -> None:
+    print(
+        f"Imported {report['imported']} {kind} in {report['seconds']:.2f}s "
+        f"({report['per_second']:.0f} records/s)"
+    )
+    if report["imported"]:
+        print(f"Assigned ids {report['first_id']}-{report['last_id']}")
+    if report["failed"]:
+        print(f"{report['failed']} records rejected; see {report['error_file']}")
+
+
+def _page(items, args: argparse.Namespace):
+    """Apply --offset/--limit lazily, so reading stops once the page is full."""
+    stop = args.offset + args.limit if args.limit is not None else None
+    return islice(items, args.offset, stop)
+
+
 def handle_tasks(args: argparse.Namespace) -> None:
     if args.action == "add":
         tag_list: List[str] = args.tags.split(",") if args.tags else []
@@ -34,7 +55,7 @@ def handle_tasks(args: argparse.Namespace) -> None:
         _print_task(t)
 
     elif args.action == "list":
-        for t in tasks.list_tasks(status=args.status):
+        for t in _page(tasks.iter_tasks(status=args.status), args):
             _print_task(t)
 
     elif args.action == "done":
@@ -45,6 +66,12 @@ def handle_tasks(args: argparse.Namespace) -> None:
         else:
             print(f"No task found with id {args.id}")
 
+    elif args.action == "import":
+        from .importer import import_tasks
+
+        report = import_tasks(args.file, fmt=args.format, error_path=args.errors)
+        _print_import_report("tasks", report)
+
 
 def handle_notes(args: argparse.Namespace) -> None:
     if args.action == "add":
@@ -58,20 +85,201 @@ def handle_notes(args: argparse.Namespace) -> None:
         _print_note(n)
 
     elif args.action == "list":
-        for n in notes.list_notes():
+        for n in _page(notes.iter_notes(), args):
             _print_note(n)
 
     elif args.action == "search":
         for n in notes.search_notes(args.keyword):
             _print_note(n)
 
+    elif args.action == "reindex":
+        count = notes.rebuild_index()
+        print(f"Reindexed {count} notes.")
+        print(f"Re-chunked {notes.sync_passages()} new or changed notes into passages.")
+
+    elif args.action == "import":
+        from .importer import import_notes
+
+        report = import_notes(args.file, fmt=args.format, error_path=args.errors)
+        _print_import_report("notes", report)
+
 
 def handle_chat(args: argparse.Namespace) -> None:
-    if args.mode == "tasks":
-        print(agents.agent_suggest_next_tasks())
+    from . import trace
+
+    if not (args.trace or args.trace_file):
+        _run_chat(args)
+        return
+    trace.enable()
+    try:
+        with trace.span("chat", mode=args.mode):
+            _run_chat(args)
+    finally:
+        trace.disable()
+    if args.trace:
+        for line in trace.breakdown():
+            print(f"[trace] {line}", file=sys.stderr)
+    if args.trace_file:
+        trace.write_jsonl(
+            args.trace_file, run=f"{time.time():.6f}", mode=args.mode, question=args.question
+        )
+
+
+def _run_chat(args: argparse.Namespace) -> None:
+    # Imported here so that non-chat commands never load the AI backends.
+    from . import agents
+
+    use_cache = not args.no_cache
+    start = time.perf_counter()
+    if args.stream:
+        if args.mode == "tasks":
+            chunks = agents.stream_suggest_next_tasks(use_cache=use_cache)
+        else:
+            chunks = agents.stream_answer_question_about_notes(
+                args.question,
+                use_cache=use_cache,
+                max_tokens=args.max_prompt_tokens,
+                top_k=args.top_k,
+                full_context=args.full_context,
+                semantic=args.semantic,
+            )
+        _print_stream(chunks, start)
+    elif args.mode == "tasks":
+        print(agents.agent_suggest_next_tasks(use_cache=use_cache))
     elif args.mode == "notes":
-        answer = agents.agent_answer_question_about_notes(args.question)
+        answer = agents.agent_answer_question_about_notes(
+            args.question,
+            use_cache=use_cache,
+            max_tokens=args.max_prompt_tokens,
+            top_k=args.top_k,
+            full_context=args.full_context,
+            semantic=args.semantic,
+        )
         print(answer)
+    if args.metrics:
+        _print_chat_metrics(args, agents.last_metrics, time.perf_counter() - start)
+
+
+def _print_stream(chunks, start: float) -> None:
+    """Print the answer as it arrives, then report timings on stderr."""
+    first = None
+    ends_with_newline = True
+    for chunk in chunks:
+        if first is None:
+            first = time.perf_counter() - start
+        sys.stdout.write(chunk)
+        sys.stdout.flush()
+        ends_with_newline = chunk.endswith("\n")
+    if not ends_with_newline:
+        sys.stdout.write("\n")
+    total = time.perf_counter() - start
+    first_ms = f"{first * 1000:.1f} ms" if first is not None else "n/a"
+    print(f"[stream] first token: {first_ms}, total: {total * 1000:.1f} ms", file=sys.stderr)
+
+
+def _print_chat_metrics(args: argparse.Namespace, metrics, elapsed: float) -> None:
+    """Report prompt size and latency on stderr, keeping stdout for the answer."""
+    from . import prompts
+
+    lines = [f"end-to-end: {elapsed * 1000:.1f} ms"]
+    if metrics.get("memo") == "hit":
+        lines.append("memo: hit (nothing changed since this was last answered today)")
+    elif metrics:
+        lines.append(
+            f"prompt: {metrics['prompt_chars']} chars, ~{metrics['prompt_tokens']} tokens"
+        )
+        if "cache" in metrics:
+            lines.append(f"cache: {metrics['cache']}")
+        if "first_token_seconds" in metrics:
+            lines.append(f"model first token: {metrics['first_token_seconds'] * 1000:.1f} ms")
+        lines.append(f"model call: {metrics['model_seconds'] * 1000:.1f} ms")
+    else:
+        lines.append("prompt: none (answered locally)")
+    if args.mode == "tasks":
+        report = prompts.task_prompt_report(tasks.list_tasks())
+        saved = 100.0 * (1 - report["compact_chars"] / report["json_chars"])
+        lines.append(
+            f"task table: {report['open_tasks']} of {report['tasks']} tasks, "
+            f"{report['compact_chars']} chars, ~{report['compact_tokens']} tokens "
+            f"(JSON prompt would be {report['json_chars']} chars, "
+            f"~{report['json_tokens']} tokens; {saved:.0f}% smaller)"
+        )
+    elif args.mode == "notes" and not args.full_context:
+        full = prompts.full_notes_prompt(args.question)
+        lines.append(
+            f"full-corpus prompt would be: {len(full)} chars, "
+            f"~{prompts.estimate_tokens(full)} tokens"
+        )
+    for line in lines:
+        print(f"[metrics] {line}", file=sys.stderr)
+
+
+def handle_shell(args: argparse.Namespace) -> None:
+    from .shell import run_shell
+
+    run_shell(build_parser())
+
+
+def handle_cache(args: argparse.Namespace) -> None:
+    from .memo import get_memo
+    from .response_cache import get_cache
+
+    cache = get_cache()
+    if args.action == "stats":
+        stats = cache.stats()
+        lookups = stats["hits"] + stats["misses"]
+        rate = 100.0 * stats["hits"] / lookups if lookups else 0.0
+        print(
+            f"entries={stats['entries']} hits={stats['hits']} "
+            f"misses={stats['misses']} hit_rate={rate:.1f}%"
+        )
+        print(f"memoized agent results={get_memo().stats()['entries']}")
+    elif args.action == "clear":
+        print(f"Removed {cache.clear()} cached responses.")
+        print(f"Removed {get_memo().clear()} memoized agent results.")
+
+
+def handle_storage(args: argparse.Namespace) -> None:
+    if args.action == "migrate":
+        from .sqlite_store import migrate_json_to_sqlite
+
+        source = args.source or storage.STATE_FILE
+        target = args.target or storage.sibling_path(storage.DB_FILE_NAME)
+        counts = migrate_json_to_sqlite(source, target)
+        print(
+            f"Imported {counts['tasks']} tasks and {counts['notes']} notes "
+            f"from {source} into {target}"
+        )
+        print(f"Set {storage.BACKEND_ENV}=sqlite to use the new database.")
+
+    elif args.action == "compact":
+        from .journal import compact
+
+        folded = compact()
+        print(f"Folded {folded} journal records into {storage.STATE_FILE}")
+
+
+def _add_paging_arguments(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--limit", type=_non_negative_int, help="Show at most this many entries")
+    p.add_argument("--offset", type=_non_negative_int, default=0, help="Skip this many entries first")
+
+
+def _non_negative_int(value: str) -> int:
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError("must be 0 or greater")
+    return number
+
+
+def _add_import_arguments(p: argparse.ArgumentParser) -> None:
+    p.add_argument(
+        "file",
+        help="JSONL (one object per line), JSON (an array of objects) or CSV file with a header row",
+    )
+    p.add_argument(
+        "--format", choices=["jsonl", "json", "csv"], help="Override the format from the extension"
+    )
+    p.add_argument("--errors", help="Where to write rejected records (default: FILE.errors.jsonl)")
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -95,12 +303,17 @@ def build_parser() -> argparse.ArgumentParser:
 
     p_list = tasks_sub.add_parser("list", help="List tasks")
     p_list.add_argument("--status", choices=["todo", "done"], help="Filter by status")
+    _add_paging_arguments(p_list)
     p_list.set_defaults(func=handle_tasks)
 
     p_done = tasks_sub.add_parser("done", help="Mark a task as done")
     p_done.add_argument("id", type=int)
     p_done.set_defaults(func=handle_tasks)
 
+    p_import = tasks_sub.add_parser("import", help="Bulk-import tasks from JSONL, JSON or CSV")
+    _add_import_arguments(p_import)
+    p_import.set_defaults(func=handle_tasks)
+
     # ---- notes ----
     p_notes = subparsers.add_parser("notes", help="Manage knowledge notes")
     notes_sub = p_notes.add_subparsers(dest="action", required=True)
@@ -112,12 +325,36 @@ def build_parser() -> argparse.ArgumentParser:
     p_n_add.set_defaults(func=handle_notes)
 
     p_n_list = notes_sub.add_parser("list", help="List notes")
+    _add_paging_arguments(p_n_list)
     p_n_list.set_defaults(func=handle_notes)
 
     p_n_search = notes_sub.add_parser("search", help="Search notes")
     p_n_search.add_argument("keyword")
     p_n_search.set_defaults(func=handle_notes)
 
+    p_n_reindex = notes_sub.add_parser("reindex", help="Rebuild the notes search index")
+    p_n_reindex.set_defaults(func=handle_notes)
+
+    p_n_import = notes_sub.add_parser("import", help="Bulk-import notes from JSONL, JSON or CSV")
+    _add_import_arguments(p_n_import)
+    p_n_import.set_defaults(func=handle_notes)
+
+    # ---- storage ----
+    p_storage = subparsers.add_parser("storage", help="Storage maintenance")
+    storage_sub = p_storage.add_subparsers(dest="action", required=True)
+
+    p_migrate = storage_sub.add_parser(
+        "migrate", help="Import the JSON state file into a SQLite database"
+    )
+    p_migrate.add_argument("--source", help="JSON state file (default: data/lifedesk_state.json)")
+    p_migrate.add_argument("--target", help="SQLite database (default: data/lifedesk.db)")
+    p_migrate.set_defaults(func=handle_storage)
+
+    p_compact = storage_sub.add_parser(
+        "compact", help="Fold the journal log back into the state snapshot"
+    )
+    p_compact.set_defaults(func=handle_storage)
+
     # ---- chat ----
     p_chat = subparsers.add_parser("chat", help="Talk to AI agents")
     p_chat.add_argument(
@@ -128,18 +365,97 @@ def build_parser() -> argparse.ArgumentParser:
         "--question",
         help="(Required for 'chat notes') Question about your notes",
     )
+    p_chat.add_argument(
+        "--max-prompt-tokens",
+        type=int,
+        help="Token budget for notes sent to the model (default: LIFEDESK_PROMPT_TOKENS or 3000)",
+    )
+    p_chat.add_argument(
+        "--top-k",
+        type=int,
+        help="How many of the most relevant notes to consider (default: LIFEDESK_TOP_K or 8)",
+    )
+    p_chat.add_argument(
+        "--full-context",
+        action="store_true",
+        help="Send every note to the model (the old behaviour, for comparison)",
+    )
+    p_chat.add_argument(
+        "--semantic",
+        action="store_true",
+        help="Rank notes by similarity (character n-gram vectors, needs NumPy) instead of keywords",
+    )
+    p_chat.add_argument(
+        "--stream",
+        action="store_true",
+        help="Print the answer as it is generated and report time to first token",
+    )
+    p_chat.add_argument(
+        "--metrics",
+        action="store_true",
+        help="Print prompt size and latency to stderr",
+    )
+    p_chat.add_argument(
+        "--trace",
+        action="store_true",
+        help="Print where the time went (state load, ranking, prompt, model call) to stderr",
+    )
+    p_chat.add_argument(
+        "--trace-file",
+        metavar="PATH",
+        help="Append timing spans to PATH as JSON lines",
+    )
+    p_chat.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always ask the model instead of reusing a cached answer",
+    )
     p_chat.set_defaults(func=handle_chat)
 
-    return parser
+    # ---- cache ----
+    p_cache = subparsers.add_parser("cache", help="Inspect the AI response cache")
+    cache_sub = p_cache.add_subparsers(dest="action", required=True)
+    cache_sub.add_parser("stats", help="Show cache size and hit/miss counts").set_defaults(
+        func=handle_cache
+    )
+    cache_sub.add_parser("clear", help="Remove all cached responses").set_defaults(
+        func=handle_cache
+    )
 
+    # ---- shell ----
+    p_shell = subparsers.add_parser(
+        "shell", help="Interactive session that keeps state and indexes loaded"
+    )
+    p_shell.set_defaults(func=handle_shell)
 
-def main(argv=None) -> None:
-    parser = build_parser()
-    args = parser.parse_args(argv)
+    return parser
 
+
+def check_args(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    """Checks argparse cannot express on its own."""
     if args.command == "chat" and args.mode == "notes" and not args.question:
         parser.error("When using 'chat notes', you must pass --question.")
+    if args.command == "chat" and getattr(args, "semantic", False):
+        from . import vectors
+
+        if not vectors.available():
+            parser.error("--semantic needs NumPy. Install it with: pip install numpy")
+    if args.command in ("tasks", "notes") and args.action == "import":
+        from .importer import detect_format
 
+        # Reject the file before anything is read or written.
+        try:
+            detect_format(args.file, args.format)
+        except ValueError as exc:
+            parser.error(str(exc))
+        if not Path(args.file).is_file():
+            parser.error(f"No such file: {args.file}")
+
+
+def main(argv=None) -> None:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    check_args(parser, args)
     args.func(args)
 
 
@@ -0,0 +1,202 @@
+import csv
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from . import notes, storage, tasks
+
+PRIORITIES = ("low", "medium", "high")
+STATUSES = ("todo", "done")
+
+
+FORMATS = ("jsonl", "json", "csv")
+
+
+def detect_format(path: Path, fmt: Optional[str] = None) -> str:
+    """
+    Return the import format for path: `fmt` if given, else the file
+    extension ("ndjson" counts as jsonl). Raises ValueError for anything
+    else, so callers can reject a file before reading it.
+    """
+    fmt = (fmt or Path(path).suffix.lstrip(".")).lower()
+    if fmt == "ndjson":
+        fmt = "jsonl"
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown import format {fmt!r} (expected jsonl, json or csv)")
+    return fmt
+
+
+def read_records(path: Path, fmt: Optional[str] = None) -> Iterator[Tuple[int, Any]]:
+    """
+    Stream (position, record) pairs from a JSONL, JSON or CSV file. The
+    position is the line number, or for a JSON array the item number. A
+    record that is not valid JSON is yielded as a ValueError so the caller
+    can report it. The format is checked before this returns.
+    """
+    path = Path(path)
+    fmt = detect_format(path, fmt)
+    if fmt == "csv":
+        return _read_csv(path)
+    if fmt == "json" and _starts_with_array(path):
+        return _read_json_array(path)
+    # JSONL, or a .json file holding one object per line.
+    return _read_jsonl(path)
+
+
+def _starts_with_array(path: Path) -> bool:
+    with path.open("r", encoding="utf-8") as f:
+        while True:
+            ch = f.read(1)
+            if not ch or not ch.isspace():
+                return ch == "["
+
+
+def _read_jsonl(path: Path) -> Iterator[Tuple[int, Any]]:
+    with path.open("r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield line_no, ValueError(f"invalid JSON: {exc.msg}")
+
+
+def _read_json_array(path: Path) -> Iterator[Tuple[int, Any]]:
+    item_no = 0
+    try:
+        for item_no, item in enumerate(storage.iter_json_list(path), start=1):
+            yield item_no, item
+    except ValueError as exc:
+        # The rest of the array cannot be located; keep what was read so far.
+        msg = exc.msg if isinstance(exc, json.JSONDecodeError) else str(exc)
+        yield item_no + 1, ValueError(f"invalid JSON: {msg}")
+
+
+def _read_csv(path: Path) -> Iterator[Tuple[int, Any]]:
+    with path.open("r", encoding="utf-8", newline="") as f:
+        # Line 1 is the header row.
+        for line_no, row in enumerate(csv.DictReader(f), start=2):
+            yield line_no, row
+
+
+def _text(record: Dict[str, Any], key: str, required: bool = False) -> str:
+    value = record.get(key)
+    if value is None:
+        value = ""
+    if not isinstance(value, str):
+        raise ValueError(f"{key} must be a string")
+    value = value.strip()
+    if required and not value:
+        raise ValueError(f"{key} is required")
+    return value
+
+
+def _tags(record: Dict[str, Any]) -> List[str]:
+    value = record.get("tags")
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [tag.strip() for tag in value.split(",") if tag.strip()]
+    if isinstance(value, list) and all(isinstance(tag, str) for tag in value):
+        return value
+    raise ValueError("tags must be a list of strings or a comma-separated string")
+
+
+def validate_task(record: Any) -> Dict[str, Any]:
+    """Check one imported task record and return its stored fields."""
+    if not isinstance(record, dict):
+        raise ValueError("record must be an object")
+    priority = _text(record, "priority").lower() or "medium"
+    if priority not in PRIORITIES:
+        raise ValueError(f"priority must be one of {', '.join(PRIORITIES)}")
+    status = _text(record, "status").lower() or "todo"
+    if status not in STATUSES:
+        raise ValueError(f"status must be one of {', '.join(STATUSES)}")
+    due = _text(record, "due_date") or _text(record, "due") or None
+    if due:
+        try:
+            datetime.strptime(due, "%Y-%m-%d")
+        except ValueError:
+            raise ValueError("due_date must use YYYY-MM-DD format") from None
+    return tasks.task_fields(
+        _text(record, "title", required=True),
+        priority=priority,
+        due_date=due,
+        tags=_tags(record),
+        notes=_text(record, "notes"),
+        status=status,
+    )
+
+
+def validate_note(record: Any) -> Dict[str, Any]:
+    """Check one imported note record and return its stored fields."""
+    if not isinstance(record, dict):
+        raise ValueError("record must be an object")
+    return {
+        "title": _text(record, "title", required=True),
+        "body": _text(record, "body", required=True),
+        "tags": _tags(record),
+    }
+
+
+def _run_import(
+    path: Path,
+    validate: Callable[[Any], Dict[str, Any]],
+    save: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]],
+    fmt: Optional[str],
+    error_path: Optional[Path],
+) -> Dict[str, Any]:
+    path = Path(path)
+    if error_path is None:
+        error_path = path.with_name(path.name + ".errors.jsonl")
+    start = time.perf_counter()
+
+    valid: List[Dict[str, Any]] = []
+    failed = 0
+    error_file = None
+    try:
+        for line_no, record in read_records(path, fmt):
+            try:
+                if isinstance(record, Exception):
+                    raise record
+                valid.append(validate(record))
+            except ValueError as exc:
+                failed += 1
+                if error_file is None:
+                    error_file = Path(error_path).open("w", encoding="utf-8")
+                entry = {"line": line_no, "error": str(exc)}
+                if not isinstance(record, Exception):
+                    entry["record"] = record
+                error_file.write(json.dumps(entry) + "\n")
+    finally:
+        if error_file is not None:
+            error_file.close()
+
+    created = save(valid)
+    seconds = time.perf_counter() - start
+    return {
+        "imported": len(created),
+        "failed": failed,
+        "seconds": seconds,
+        "per_second": len(created) / seconds if seconds > 0 else 0.0,
+        "first_id": created[0]["id"] if created else None,
+        "last_id": created[-1]["id"] if created else None,
+        "error_file": str(error_path) if failed else None,
+    }
+
+
+def import_tasks(
+    path: Path, fmt: Optional[str] = None, error_path: Optional[Path] = None
+) -> Dict[str, Any]:
+    """Import tasks from a JSONL/JSON/CSV file, saving all valid ones in one write."""
+    return _run_import(path, validate_task, tasks.add_tasks, fmt, error_path)
+
+
+def import_notes(
+    path: Path, fmt: Optional[str] = None, error_path: Optional[Path] = None
+) -> Dict[str, Any]:
+    """Import notes from a JSONL/JSON/CSV file, saving all valid ones in one write."""
+    return _run_import(path, validate_note, notes.add_notes, fmt, error_path)
@@ -0,0 +1,304 @@
+import re
+import sqlite3
+from collections import Counter
+from itertools import islice
+from operator import itemgetter
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Set, Tuple
+
+from . import storage
+
+INDEX_FILE_NAME = "notes_index.db"
+
+# Bump when the layout changes; an index with another version is rebuilt.
+INDEX_VERSION = 2
+
+# Notes written per batch by add_notes/rebuild; bounds memory on big imports.
+BATCH_NOTES = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS vocab (
+    term TEXT PRIMARY KEY,
+    df   INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS postings (
+    term    TEXT NOT NULL,
+    note_id INTEGER NOT NULL,
+    tf      INTEGER NOT NULL,
+    length  INTEGER NOT NULL,
+    PRIMARY KEY (term, note_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS tag_postings (
+    tag     TEXT NOT NULL,
+    note_id INTEGER NOT NULL,
+    PRIMARY KEY (tag, note_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS docs (
+    note_id INTEGER PRIMARY KEY,
+    length  INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS stats (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO stats(key, value) VALUES ('doc_count', 0);
+INSERT OR IGNORE INTO stats(key, value) VALUES ('total_length', 0);
+"""
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase a string and split it into alphanumeric tokens."""
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+def batches(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Yield lists of up to size consecutive items."""
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Bm25Index:
+    """
+    Shared SQLite plumbing for the BM25 indexes: opening the database
+    (rebuilding it when the stored version differs), the vocab/postings/stats
+    bookkeeping and the lookups ranking.bm25_rank makes. Subclasses set
+    SCHEMA, VERSION and DOC_COLUMN, the postings column naming what is
+    ranked (a note id or a chunk id).
+    """
+
+    SCHEMA = ""
+    VERSION = 0
+    DOC_COLUMN = ""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        (version,) = self.conn.execute("PRAGMA user_version").fetchone()
+        if version != self.VERSION:
+            self._drop_tables()
+        self.conn.executescript(self.SCHEMA)
+        self.conn.execute(f"PRAGMA user_version = {self.VERSION}")
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def _drop_tables(self) -> None:
+        tables = [
+            name
+            for (name,) in self.conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            )
+        ]
+        for name in tables:
+            self.conn.execute(f"DROP TABLE IF EXISTS {name}")
+
+    def _insert_documents(self, docs: List[Tuple[int, List[str]]]) -> None:
+        """
+        Add the postings of (doc_id, tokens) pairs and count them in vocab
+        and stats. A batch costs one vocab upsert per distinct term and one
+        stats update, and its postings go in sorted by term so each term's
+        rows land next to each other in the B-tree.
+        """
+        df: Counter = Counter()
+        rows: List[tuple] = []
+        total_length = 0
+        for doc_id, tokens in docs:
+            counts = Counter(tokens)
+            df.update(counts.keys())
+            rows.extend((t, doc_id, tf, len(tokens)) for t, tf in counts.items())
+            total_length += len(tokens)
+        rows.sort(key=itemgetter(0))
+        self.conn.executemany(
+            "INSERT INTO vocab(term, df) VALUES (?, ?) "
+            "ON CONFLICT(term) DO UPDATE SET df = df + excluded.df",
+            sorted(df.items()),
+        )
+        self.conn.executemany(
+            f"INSERT INTO postings(term, {self.DOC_COLUMN}, tf, length) VALUES (?, ?, ?, ?)",
+            rows,
+        )
+        self.conn.execute(
+            "UPDATE stats SET value = value + ? WHERE key = 'doc_count'", (len(docs),)
+        )
+        self.conn.execute(
+            "UPDATE stats SET value = value + ? WHERE key = 'total_length'", (total_length,)
+        )
+
+    def stats(self) -> Dict[str, int]:
+        """Corpus statistics: number of indexed documents and their total token count."""
+        return dict(self.conn.execute("SELECT key, value FROM stats"))
+
+    def document_frequency(self, term: str) -> int:
+        row = self.conn.execute("SELECT df FROM vocab WHERE term = ?", (term,)).fetchone()
+        return row[0] if row else 0
+
+    def term_postings(
+        self, term: str, note_ids: Optional[Iterable[int]] = None
+    ) -> List[tuple]:
+        """
+        Return (doc_id, tf, doc_length) for the documents containing term,
+        optionally restricted to the given ids.
+        """
+        column = self.DOC_COLUMN
+        if note_ids is None:
+            return self.conn.execute(
+                f"SELECT {column}, tf, length FROM postings WHERE term = ?", (term,)
+            ).fetchall()
+        ids = sorted(note_ids)
+        found: List[tuple] = []
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            found.extend(
+                self.conn.execute(
+                    f"SELECT {column}, tf, length FROM postings WHERE term = ? "
+                    f"AND {column} IN ({', '.join('?' * len(chunk))})",
+                    [term, *chunk],
+                )
+            )
+        return found
+
+    def best_postings(
+        self, term: str, limit: int, k1: float, b: float, avgdl: float
+    ) -> List[tuple]:
+        """
+        Return the `limit` postings of term with the highest BM25 term weight,
+        letting SQLite do the sort instead of handing every row to Python.
+        """
+        column = self.DOC_COLUMN
+        return self.conn.execute(
+            f"SELECT {column}, tf, length FROM postings WHERE term = ? "
+            f"ORDER BY tf * 1.0 / (tf + ? * (1 - ? + ? * length / ?)) DESC, {column} "
+            "LIMIT ?",
+            (term, k1, b, b, avgdl, limit),
+        ).fetchall()
+
+
+class NoteIndex(Bm25Index):
+    """
+    Inverted index over notes, stored in SQLite next to the state file.
+    Title/body terms and tags have separate posting lists. Term postings
+    carry the term frequency and the note's length so they can be ranked
+    without a join; document frequencies and corpus totals are kept up to
+    date as notes are added.
+    """
+
+    SCHEMA = SCHEMA
+    VERSION = INDEX_VERSION
+    DOC_COLUMN = "note_id"
+
+    # ---- writing ----
+
+    def _add_batch(self, notes: Iterable[Dict[str, Any]]) -> int:
+        docs: List[Tuple[int, List[str]]] = []
+        tag_rows: List[Tuple[str, int]] = []
+        seen: Set[int] = set()
+        for note in notes:
+            note_id = note["id"]
+            if note_id in seen or self.conn.execute(
+                "SELECT 1 FROM docs WHERE note_id = ?", (note_id,)
+            ).fetchone():
+                continue
+            seen.add(note_id)
+            tokens = tokenize(note.get("title", "")) + tokenize(note.get("body", ""))
+            docs.append((note_id, tokens))
+            tag_rows.extend((tag, note_id) for tag in {t.lower() for t in note.get("tags", [])})
+        self._insert_documents(docs)
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO tag_postings(tag, note_id) VALUES (?, ?)", sorted(tag_rows)
+        )
+        self.conn.executemany(
+            "INSERT INTO docs(note_id, length) VALUES (?, ?)",
+            ((note_id, len(tokens)) for note_id, tokens in docs),
+        )
+        return len(docs)
+
+    def add_notes(self, notes: Iterable[Dict[str, Any]]) -> None:
+        with self.conn:
+            for batch in batches(notes, BATCH_NOTES):
+                self._add_batch(batch)
+
+    def rebuild(self, notes: Iterable[Dict[str, Any]]) -> int:
+        """Throw away the index and build it again from the given notes."""
+        with self.conn:
+            for table in ("vocab", "postings", "tag_postings", "docs"):
+                self.conn.execute(f"DELETE FROM {table}")
+            self.conn.execute("UPDATE stats SET value = 0")
+            count = 0
+            for batch in batches(notes, BATCH_NOTES):
+                count += self._add_batch(batch)
+        return count
+
+    # ---- reading ----
+
+    def doc_count(self) -> int:
+        return self.stats()["doc_count"]
+
+    def last_note_id(self) -> int:
+        (last,) = self.conn.execute("SELECT MAX(note_id) FROM docs").fetchone()
+        return last or 0
+
+    def tagged_with(self, tag: str) -> Set[int]:
+        rows = self.conn.execute(
+            "SELECT note_id FROM tag_postings WHERE tag = ?", (tag.lower(),)
+        )
+        return {note_id for (note_id,) in rows}
+
+    def _ids_with_term_containing(self, fragment: str) -> Set[int]:
+        rows = self.conn.execute(
+            "SELECT DISTINCT note_id FROM postings WHERE term IN "
+            "(SELECT term FROM vocab WHERE instr(term, ?) > 0)",
+            (fragment,),
+        )
+        return {note_id for (note_id,) in rows}
+
+    def candidates(self, keyword: str) -> Optional[Set[int]]:
+        """
+        Return the ids of notes that may contain keyword as a substring of
+        the title, body or a tag. Returns None when the keyword has no
+        searchable characters (every note is then a candidate).
+        """
+        keyword_lower = keyword.lower()
+        tokens = tokenize(keyword_lower)
+        if not tokens:
+            return None
+
+        rows = self.conn.execute(
+            "SELECT DISTINCT note_id FROM tag_postings WHERE instr(tag, ?) > 0",
+            (keyword_lower,),
+        )
+        found = {note_id for (note_id,) in rows}
+
+        # Every token of the keyword must appear inside some term of the note.
+        text_ids: Optional[Set[int]] = None
+        for token in set(tokens):
+            ids = self._ids_with_term_containing(token)
+            text_ids = ids if text_ids is None else text_ids & ids
+            if not text_ids:
+                break
+        return found | (text_ids or set())
+
+
+_indexes: Dict[Path, NoteIndex] = {}
+
+
+def get_index() -> NoteIndex:
+    """Return the notes index for the current data directory (opened once per process)."""
+    path = storage.sibling_path(INDEX_FILE_NAME)
+    index = _indexes.get(path)
+    if index is None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        index = NoteIndex(path)
+        _indexes[path] = index
+    return index
@@ -0,0 +1,371 @@
+import itertools
+import json
+import os
+import subprocess
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, so one writer at a time
+    fcntl = None
+
+from . import storage, trace
+
+LOG_FILE_NAME = "lifedesk_state.log"
+# Next ids and the state version, kept next to the log so that a write can
+# assign them without loading the snapshot.
+COUNTERS_SUFFIX = ".counters"
+# Writes and compaction hold an flock on this file; reads take no lock.
+LOCK_SUFFIX = ".lock"
+
+# Once the log has grown by this many records, a separate process is started
+# to fold it into the snapshot (see start_background_compaction).
+COMPACT_THRESHOLD_ENV = "LIFEDESK_COMPACT_THRESHOLD"
+DEFAULT_COMPACT_THRESHOLD = 1000
+
+
+def _compact_threshold() -> int:
+    try:
+        return int(os.environ.get(COMPACT_THRESHOLD_ENV, DEFAULT_COMPACT_THRESHOLD))
+    except ValueError:
+        return DEFAULT_COMPACT_THRESHOLD
+
+
+def apply_record(
+    state: Dict[str, Any], record: Dict[str, Any], snapshot_version: int = 0
+) -> None:
+    """
+    Apply one log record to an in-memory state. Each record carries the
+    state version it produced. One at or below the snapshot's version was
+    already folded in by a compaction (the log is only replaced after the
+    snapshot), so it is skipped. An add whose id is already taken, which
+    only writers that bypassed the lock can produce, keeps its entry under
+    the next free id rather than losing it.
+    """
+    if "version" in record:
+        if record["version"] <= snapshot_version:
+            return
+        state["version"] = max(state.get("version", 0), record["version"])
+    op = record.get("op")
+    if op == "add_task":
+        _add_item(state, "tasks", "next_task_id", record["task"])
+    elif op == "add_note":
+        _add_item(state, "notes", "next_note_id", record["note"])
+    elif op == "set_task_status":
+        for t in state["tasks"]:
+            if t.get("id") == record["id"]:
+                t["status"] = record["status"]
+                break
+
+
+def _add_item(state: Dict[str, Any], kind: str, counter: str, item: Dict[str, Any]) -> None:
+    next_id = state.get(counter, 1)
+    if item["id"] < next_id:
+        item = {**item, "id": next_id}
+    state[kind].append(item)
+    state[counter] = item["id"] + 1
+
+
+_COMPACT_SCRIPT = (
+    "import sys; from lifedesk.journal import JournalBackend; "
+    "JournalBackend(sys.argv[1], sys.argv[2]).compact()"
+)
+
+# Compaction processes started by this one, reaped once they finish.
+_compactors: List[subprocess.Popen] = []
+
+
+def start_background_compaction(snapshot_path: Path, log_path: Path) -> None:
+    """
+    Fold the log into the snapshot in a separate process, so neither the
+    write that crossed the threshold nor the CLI command making it waits.
+    The compactor takes the journal lock, so writes pause only while it
+    swaps the files in.
+    """
+    _compactors[:] = [p for p in _compactors if p.poll() is None]
+    package_root = str(Path(__file__).resolve().parent.parent)
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (package_root, env.get("PYTHONPATH")) if p)
+    _compactors.append(
+        subprocess.Popen(
+            [sys.executable, "-c", _COMPACT_SCRIPT, str(snapshot_path), str(log_path)],
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    )
+
+
+class JournalBackend:
+    """
+    Snapshot + append-only log. The snapshot is the regular JSON state file;
+    every change appends one compact line to the log, so the cost of a write
+    does not depend on how much is already stored.
+    """
+
+    name = "journal"
+
+    def __init__(self, snapshot_path: Path, log_path: Path) -> None:
+        self.snapshot_path = Path(snapshot_path)
+        self.log_path = Path(log_path)
+        self.counters_path = self.log_path.with_suffix(COUNTERS_SUFFIX)
+        self.lock_path = self.log_path.with_suffix(LOCK_SUFFIX)
+        self._state: Optional[Dict[str, Any]] = None
+        self._snapshot_key = None
+        self._snapshot_version = 0
+        self._log_inode: Optional[int] = None
+        self._log_offset = 0
+        self.log_records = 0
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.lock_path.open("a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    # ---- loading ----
+
+    def _read_log(self, state: Dict[str, Any]) -> None:
+        """Apply log records written since the last read (possibly by another process)."""
+        if not self.log_path.exists():
+            return
+        with self.log_path.open("rb") as f:
+            self._log_inode = os.fstat(f.fileno()).st_ino
+            f.seek(self._log_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Partially written record; pick it up next time.
+                    break
+                self._log_offset += len(line)
+                if line.strip():
+                    apply_record(state, json.loads(line), self._snapshot_version)
+                    self.log_records += 1
+
+    def _log_replaced(self) -> bool:
+        """True if the log read so far is no longer the file on disk (compaction replaced it)."""
+        if self._log_offset == 0:
+            return False
+        try:
+            st = self.log_path.stat()
+        except FileNotFoundError:
+            return True
+        return st.st_ino != self._log_inode or st.st_size < self._log_offset
+
+    def state(self) -> Dict[str, Any]:
+        """Return the current state: the snapshot with the log replayed on top."""
+        with trace.span("load_state") as span:
+            reloaded = False
+            while True:
+                key = storage.file_key(self.snapshot_path)
+                if self._state is None or key != self._snapshot_key or self._log_replaced():
+                    if key is None:
+                        self._state = storage.empty_state()
+                    else:
+                        with self.snapshot_path.open("r", encoding="utf-8") as f:
+                            self._state = json.load(f)
+                    self._snapshot_key = key
+                    self._snapshot_version = self._state.get("version", 0)
+                    self._log_offset = 0
+                    self.log_records = 0
+                    reloaded = True
+                self._read_log(self._state)
+                # A compaction that finished in between may have moved records
+                # from the log into a snapshot not read yet; start over from it.
+                if storage.file_key(self.snapshot_path) == key:
+                    break
+            span.set(cached=not reloaded, log_records=self.log_records)
+            return self._state
+
+    # ---- counters ----
+
+    def _counters(self) -> Dict[str, Any]:
+        """
+        Return the next ids, the state version and how many records the log
+        holds. They come from the counters file when it belongs to the
+        current snapshot; otherwise (first use, or a snapshot written by
+        another backend) they are worked out from the replayed state once.
+        """
+        key = storage.file_key(self.snapshot_path)
+        snapshot = list(key) if key else None
+        try:
+            with self.counters_path.open("r", encoding="utf-8") as f:
+                counters = json.load(f)
+            if counters.get("snapshot") == snapshot:
+                return counters
+        except (FileNotFoundError, ValueError):
+            pass
+        state = self.state()
+        return {
+            "snapshot": snapshot,
+            "version": state.get("version", 0),
+            "next_task_id": state.get("next_task_id", 1),
+            "next_note_id": state.get("next_note_id", 1),
+            "log_records": self.log_records,
+        }
+
+    # ---- writing ----
+
+    def _append(self, counters: Dict[str, Any], *records: Dict[str, Any]) -> bool:
+        """
+        Log records whose ids and version were taken from counters. The
+        caller holds the lock. Returns True when the log just grew past a
+        multiple of the compaction threshold.
+        """
+        before = counters.get("log_records", 0)
+        counters["log_records"] = before + len(records)
+        # Counters first: a crash before the log write skips ids, never reuses them.
+        storage.write_json_atomic(self.counters_path, counters)
+        data = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records)
+        with self.log_path.open("ab") as f:
+            f.write(data.encode("utf-8"))
+        # The cached state is not touched; the next state() replays these
+        # records along with any another process appended.
+        threshold = max(1, _compact_threshold())
+        return before // threshold != counters["log_records"] // threshold
+
+    def compact(self) -> int:
+        """
+        Write the replayed state as a new snapshot and start a new, empty
+        log. Runs under the lock, so no write lands between reading the log
+        and replacing it. Returns how many log records were folded in.
+        """
+        with self._locked():
+            state = self.state()
+            folded = self.log_records
+            if folded == 0:
+                return 0
+            counters = self._counters()
+            storage.write_json_atomic(self.snapshot_path, state)
+            # Replace the log rather than truncate it: a reader still holding
+            # the old one sees a new inode and reloads, and one that reads the
+            # new snapshot with the old log skips the records by version.
+            empty = self.log_path.with_name(self.log_path.name + ".tmp")
+            empty.write_bytes(b"")
+            empty.replace(self.log_path)
+            self._snapshot_key = storage.file_key(self.snapshot_path)
+            self._snapshot_version = state.get("version", 0)
+            self._log_offset = 0
+            self.log_records = 0
+            counters["snapshot"] = list(self._snapshot_key)
+            counters["log_records"] = 0
+            storage.write_json_atomic(self.counters_path, counters)
+        return folded
+
+    # ---- backend API ----
+
+    def insert_task(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        return self.insert_tasks([fields])[0]
+
+    def insert_tasks(self, fields_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return self._insert_many("add_task", "task", "next_task_id", fields_list)
+
+    def _insert_many(
+        self, op: str, key: str, counter: str, fields_list: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        if not fields_list:
+            return []
+        with self._locked():
+            counters = self._counters()
+            first_id = counters[counter]
+            created = [{"id": first_id + i, **fields} for i, fields in enumerate(fields_list)]
+            counters[counter] = first_id + len(created)
+            counters["version"] += 1
+            records = [{"op": op, key: item, "version": counters["version"]} for item in created]
+            due = self._append(counters, *records)
+        if due:
+            start_background_compaction(self.snapshot_path, self.log_path)
+        return created
+
+    def _find_task(self, task_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Look a task up without replaying everything: in the cached state if
+        this process has one, else in the log and then, streaming, in the
+        snapshot (stopping at the match).
+        """
+        if self._state is not None:
+            tasks: Iterator[Dict[str, Any]] = iter(self.state().get("tasks", []))
+        else:
+            tasks = self._logged_tasks()
+            if self.snapshot_path.exists():
+                tasks = itertools.chain(tasks, storage.iter_json_array(self.snapshot_path, "tasks"))
+        return next((t for t in tasks if t.get("id") == task_id), None)
+
+    def _logged_tasks(self) -> Iterator[Dict[str, Any]]:
+        if not self.log_path.exists():
+            return
+        with self.log_path.open("rb") as f:
+            for line in f:
+                if line.endswith(b"\n") and line.strip():
+                    record = json.loads(line)
+                    if record.get("op") == "add_task":
+                        yield record["task"]
+
+    def set_task_status(self, task_id: int, status: str) -> Optional[Dict[str, Any]]:
+        task = self._find_task(task_id)
+        if task is None:
+            return None
+        with self._locked():
+            counters = self._counters()
+            counters["version"] += 1
+            record = {
+                "op": "set_task_status",
+                "id": task_id,
+                "status": status,
+                "version": counters["version"],
+            }
+            due = self._append(counters, record)
+        if due:
+            start_background_compaction(self.snapshot_path, self.log_path)
+        return {**task, "status": status}
+
+    def fetch_tasks(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        tasks: List[Dict[str, Any]] = self.state().get("tasks", [])
+        if status:
+            tasks = [t for t in tasks if t.get("status") == status]
+        return tasks
+
+    def iter_tasks(self, status: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        # The log can change earlier entries, so the state has to be replayed first.
+        return iter(self.fetch_tasks(status=status))
+
+    def insert_note(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        return self.insert_notes([fields])[0]
+
+    def insert_notes(self, fields_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return self._insert_many("add_note", "note", "next_note_id", fields_list)
+
+    def fetch_notes(self) -> List[Dict[str, Any]]:
+        return self.state().get("notes", [])
+
+    def iter_notes(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.fetch_notes())
+
+    def fetch_notes_by_ids(self, note_ids) -> List[Dict[str, Any]]:
+        wanted = set(note_ids)
+        return [n for n in self.fetch_notes() if n.get("id") in wanted]
+
+    def last_note_id(self) -> int:
+        notes = self.fetch_notes()
+        return notes[-1]["id"] if notes else 0
+
+    def version(self) -> int:
+        return self.state().get("version", 0)
+
+
+def compact() -> int:
+    """Fold the on-disk log into the snapshot, whichever backend is active."""
+    backend = storage.get_backend()
+    if not isinstance(backend, JournalBackend):
+        backend = JournalBackend(storage.STATE_FILE, storage.sibling_path(LOG_FILE_NAME))
+    return backend.compact()
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from . import storage
+
+MEMO_FILE_NAME = "agent_memo.db"
+
+MAX_ENTRIES_ENV = "LIFEDESK_MEMO_MAX_ENTRIES"
+DEFAULT_MAX_ENTRIES = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key       TEXT PRIMARY KEY,
+    version   INTEGER NOT NULL,
+    day       TEXT NOT NULL,
+    result    TEXT NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_last_used ON results(last_used);
+"""
+
+
+def memo_key(*parts: Any) -> str:
+    """Hash the agent call (which agent, its arguments, local or model)."""
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoStore:
+    """
+    Agent results stored next to the state file, each tagged with the state
+    version and calendar day it was computed for. A result is only returned
+    while both still match, so any change to tasks or notes, or a new day,
+    invalidates it. At most `max_entries` results are kept (least recently
+    used go first).
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def get(self, key: str, version: int, day: str) -> Optional[str]:
+        with self.conn:
+            row = self.conn.execute(
+                "SELECT result FROM results WHERE key = ? AND version = ? AND day = ?",
+                (key, version, day),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.conn.execute(
+                "UPDATE results SET last_used = ? WHERE key = ?", (self.clock(), key)
+            )
+        self.hits += 1
+        return row[0]
+
+    def put(self, key: str, version: int, day: str, result: str) -> None:
+        with self.conn:
+            # Versions only grow, so results for older versions or other days
+            # can never be returned again.
+            self.conn.execute(
+                "DELETE FROM results WHERE version < ? OR day != ?", (version, day)
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO results(key, version, day, result, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, version, day, result, self.clock()),
+            )
+            (size,) = self.conn.execute("SELECT COUNT(*) FROM results").fetchone()
+            if size > self.max_entries:
+                self.conn.execute(
+                    "DELETE FROM results WHERE key IN "
+                    "(SELECT key FROM results ORDER BY last_used LIMIT ?)",
+                    (size - self.max_entries,),
+                )
+
+    def stats(self) -> Dict[str, int]:
+        (size,) = self.conn.execute("SELECT COUNT(*) FROM results").fetchone()
+        return {"entries": size, "hits": self.hits, "misses": self.misses}
+
+    def clear(self) -> int:
+        with self.conn:
+            return self.conn.execute("DELETE FROM results").rowcount
+
+
+_stores: Dict[Path, MemoStore] = {}
+
+
+def get_memo() -> MemoStore:
+    """Return the memo store for the current data directory."""
+    path = storage.sibling_path(MEMO_FILE_NAME)
+    store = _stores.get(path)
+    if store is None:
+        try:
+            max_entries = int(os.environ.get(MAX_ENTRIES_ENV, DEFAULT_MAX_ENTRIES))
+        except ValueError:
+            max_entries = DEFAULT_MAX_ENTRIES
+        store = MemoStore(path, max_entries=max_entries)
+        _stores[path] = store
+    return store
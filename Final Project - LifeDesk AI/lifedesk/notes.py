@@ -1,5 +1,8 @@
-from typing import List, Dict, Any, Optional
-from .storage import load_state, save_state
+from typing import List, Dict, Any, Iterator, Optional
+from .storage import get_backend
+from .index import NoteIndex, get_index
+from .passages import PassageIndex, get_passage_index
+from . import vectors
 
 
 def add_note(
@@ -8,36 +11,116 @@ def add_note(
     tags: Optional[List[str]] = None,
 ) -> Dict[str, Any]:
     """Create a new note, save it, and return it."""
-    state = load_state()
-    note_id = state.get("next_note_id", 1)
-
-    note = {
-        "id": note_id,
+    fields = {
         "title": title,
         "body": body,
         "tags": tags or [],
     }
-
-    state["notes"].append(note)
-    state["next_note_id"] = note_id + 1
-    save_state(state)
+    note = get_backend().insert_note(fields)
+    _index_new_notes([note])
     return note
 
 
+def add_notes(fields_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Save many notes in one write, index them, and return them."""
+    created = get_backend().insert_notes(fields_list)
+    _index_new_notes(created)
+    return created
+
+
+def _index_new_notes(created: List[Dict[str, Any]]) -> None:
+    get_index().add_notes(created)
+    get_passage_index().sync(created)
+    if vectors.available():
+        index = vectors.get_vector_index()
+        if created and index.last_note_id() == created[0]["id"] - 1:
+            index.append(created)
+        else:
+            # The vectors were behind already (or were just reset); catch up.
+            current_vector_index()
+
+
 def list_notes() -> List[Dict[str, Any]]:
     """Return all notes."""
-    state = load_state()
-    return state.get("notes", [])
+    return get_backend().fetch_notes()
+
+
+def iter_notes() -> Iterator[Dict[str, Any]]:
+    """Yield notes one at a time, streaming them from disk where the backend allows it."""
+    return get_backend().iter_notes()
+
+
+def has_notes() -> bool:
+    """Return True if at least one note is stored."""
+    return get_backend().last_note_id() > 0
+
+
+def get_notes(note_ids: List[int]) -> List[Dict[str, Any]]:
+    """Return the notes with the given ids, in the order the ids were given."""
+    by_id = {n["id"]: n for n in get_backend().fetch_notes_by_ids(note_ids)}
+    return [by_id[i] for i in note_ids if i in by_id]
+
+
+def rebuild_index() -> int:
+    """Rebuild the search indexes from scratch. Returns the number of notes indexed."""
+    count = get_index().rebuild(list_notes())
+    if vectors.available():
+        vectors.get_vector_index().rebuild(iter_notes())
+    return count
+
+
+def current_index() -> NoteIndex:
+    """Return the notes index, rebuilding it first if it has fallen behind the store."""
+    index = get_index()
+    if index.last_note_id() != get_backend().last_note_id():
+        # Notes were added without going through add_note; catch up.
+        get_index().rebuild(list_notes())
+    return index
+
+
+def current_passage_index() -> PassageIndex:
+    """Return the passage index, chunking any notes it has not seen yet."""
+    index = get_passage_index()
+    last = index.last_note_id()
+    if last != get_backend().last_note_id():
+        index.sync(n for n in iter_notes() if n["id"] > last)
+    return index
+
+
+def sync_passages() -> int:
+    """Re-chunk notes whose title or body changed. Returns how many were chunked."""
+    return get_passage_index().sync(iter_notes())
+
+
+def current_vector_index() -> "vectors.VectorIndex":
+    """Return the note vector index, appending any notes it has not seen yet."""
+    index = vectors.get_vector_index()
+    last = index.last_note_id()
+    if last != get_backend().last_note_id():
+        index.append(n for n in iter_notes() if n["id"] > last)
+    return index
+
+
+def _matches(note: Dict[str, Any], keyword_lower: str) -> bool:
+    return (
+        keyword_lower in note["title"].lower()
+        or keyword_lower in note["body"].lower()
+        or any(keyword_lower in tag.lower() for tag in note.get("tags", []))
+    )
 
 
 def search_notes(keyword: str) -> List[Dict[str, Any]]:
     """
     Return notes where the keyword appears in title, body, or tags.
+    Candidates come from the inverted index; only those are checked.
     """
+    index = current_index()
     keyword_lower = keyword.lower()
-    return [
-        n for n in list_notes()
-        if keyword_lower in n["title"].lower()
-        or keyword_lower in n["body"].lower()
-        or any(keyword_lower in tag.lower() for tag in n.get("tags", []))
-    ]
\ No newline at end of file
+    candidate_ids = index.candidates(keyword_lower)
+    if candidate_ids is None:
+        pool = list_notes()
+    elif not candidate_ids:
+        return []
+    else:
+        pool = get_backend().fetch_notes_by_ids(candidate_ids)
+    return [n for n in pool if _matches(n, keyword_lower)]
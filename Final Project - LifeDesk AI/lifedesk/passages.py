@@ -0,0 +1,236 @@
+import hashlib
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from . import storage
+from .index import BATCH_NOTES, Bm25Index, batches, tokenize
+
+PASSAGES_FILE_NAME = "passages_index.db"
+
+# Bump when chunking or the layout changes; an index with another version is rebuilt.
+PASSAGES_VERSION = 3
+
+# Paragraphs longer than this are cut at the last space before the limit.
+MAX_CHUNK_CHARS = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS notes (
+    note_id INTEGER PRIMARY KEY,
+    hash    TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS chunks (
+    chunk_id INTEGER PRIMARY KEY,
+    note_id  INTEGER NOT NULL,
+    start    INTEGER NOT NULL,
+    end      INTEGER NOT NULL,
+    length   INTEGER NOT NULL,
+    terms    TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_chunks_note ON chunks(note_id);
+
+CREATE TABLE IF NOT EXISTS vocab (
+    term TEXT PRIMARY KEY,
+    df   INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS postings (
+    term     TEXT NOT NULL,
+    chunk_id INTEGER NOT NULL,
+    tf       INTEGER NOT NULL,
+    length   INTEGER NOT NULL,
+    PRIMARY KEY (term, chunk_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS tags (
+    tag     TEXT NOT NULL,
+    note_id INTEGER NOT NULL,
+    PRIMARY KEY (tag, note_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS stats (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO stats(key, value) VALUES ('doc_count', 0);
+INSERT OR IGNORE INTO stats(key, value) VALUES ('total_length', 0);
+"""
+
+_PARAGRAPH_BREAK = re.compile(r"\n[ \t\r]*\n")
+
+
+def _trimmed_pieces(body: str, start: int, end: int) -> List[Tuple[int, int]]:
+    while start < end and body[start].isspace():
+        start += 1
+    while end > start and body[end - 1].isspace():
+        end -= 1
+    pieces = []
+    while end - start > MAX_CHUNK_CHARS:
+        cut = body.rfind(" ", start + 1, start + MAX_CHUNK_CHARS)
+        if cut == -1:
+            cut = start + MAX_CHUNK_CHARS
+        pieces.append((start, cut))
+        start = cut
+        while start < end and body[start].isspace():
+            start += 1
+    if end > start:
+        pieces.append((start, end))
+    return pieces
+
+
+def chunk_offsets(body: str) -> List[Tuple[int, int]]:
+    """
+    Split a note body into paragraphs (separated by blank lines) and return
+    their (start, end) character offsets, whitespace trimmed. A body with no
+    text still gets one empty chunk so the note's title stays searchable.
+    """
+    offsets: List[Tuple[int, int]] = []
+    start = 0
+    for m in _PARAGRAPH_BREAK.finditer(body):
+        offsets.extend(_trimmed_pieces(body, start, m.start()))
+        start = m.end()
+    offsets.extend(_trimmed_pieces(body, start, len(body)))
+    return offsets or [(0, 0)]
+
+
+def content_hash(note: Dict[str, Any]) -> str:
+    tags = sorted({tag.lower() for tag in note.get("tags", [])})
+    text = "\0".join([note.get("title", ""), note.get("body", ""), *tags])
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class PassageIndex(Bm25Index):
+    """
+    Inverted index over paragraph chunks of notes, stored in SQLite next to
+    the state file. Each chunk is scored on its own (the note title counts
+    towards every chunk of the note). It offers the same lookups as
+    NoteIndex, with chunk ids in place of note ids, so bm25_rank works on
+    either.
+    """
+
+    SCHEMA = SCHEMA
+    VERSION = PASSAGES_VERSION
+    DOC_COLUMN = "chunk_id"
+
+    # ---- writing ----
+
+    def _remove(self, note_id: int) -> None:
+        # Each chunk row lists its distinct terms, so postings are deleted by
+        # primary key; a second index on postings(chunk_id) would make every
+        # insert cost about three times as much.
+        chunks = self.conn.execute(
+            "SELECT chunk_id, terms, length FROM chunks WHERE note_id = ?", (note_id,)
+        ).fetchall()
+        doomed = [(term, chunk_id) for chunk_id, terms, _ in chunks for term in terms.split()]
+        self.conn.executemany("DELETE FROM postings WHERE term = ? AND chunk_id = ?", doomed)
+        self.conn.executemany(
+            "UPDATE vocab SET df = df - ? WHERE term = ?",
+            ((count, term) for term, count in Counter(term for term, _ in doomed).items()),
+        )
+        self.conn.execute("DELETE FROM chunks WHERE note_id = ?", (note_id,))
+        self.conn.execute("DELETE FROM tags WHERE note_id = ?", (note_id,))
+        self.conn.execute(
+            "UPDATE stats SET value = value - ? WHERE key = 'doc_count'", (len(chunks),)
+        )
+        self.conn.execute(
+            "UPDATE stats SET value = value - ? WHERE key = 'total_length'",
+            (sum(length for _, _, length in chunks),),
+        )
+
+    def _add_batch(self, pending: Dict[int, Tuple[Dict[str, Any], str]]) -> None:
+        docs: List[Tuple[int, List[str]]] = []
+        tag_rows: List[Tuple[str, int]] = []
+        for note_id, (note, _) in pending.items():
+            body = note.get("body", "")
+            title_tokens = tokenize(note.get("title", ""))
+            for start, end in chunk_offsets(body):
+                tokens = title_tokens + tokenize(body[start:end])
+                cur = self.conn.execute(
+                    "INSERT INTO chunks(note_id, start, end, length, terms) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (note_id, start, end, len(tokens), " ".join(dict.fromkeys(tokens))),
+                )
+                docs.append((cur.lastrowid, tokens))
+            tag_rows.extend((tag, note_id) for tag in {t.lower() for t in note.get("tags", [])})
+        self._insert_documents(docs)
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO tags(tag, note_id) VALUES (?, ?)", sorted(tag_rows)
+        )
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO notes(note_id, hash) VALUES (?, ?)",
+            ((note_id, digest) for note_id, (_, digest) in pending.items()),
+        )
+
+    def sync(self, notes: Iterable[Dict[str, Any]]) -> int:
+        """
+        Bring the given notes up to date. Notes whose title, body and tags
+        hash is unchanged are skipped; only new or edited notes are (re-)chunked,
+        BATCH_NOTES at a time. Returns how many notes were chunked.
+        """
+        chunked = 0
+        with self.conn:
+            for batch in batches(notes, BATCH_NOTES):
+                pending: Dict[int, Tuple[Dict[str, Any], str]] = {}
+                for note in batch:
+                    digest = content_hash(note)
+                    row = self.conn.execute(
+                        "SELECT hash FROM notes WHERE note_id = ?", (note["id"],)
+                    ).fetchone()
+                    if row is not None:
+                        if row[0] == digest:
+                            continue
+                        self._remove(note["id"])
+                    pending[note["id"]] = (note, digest)
+                self._add_batch(pending)
+                chunked += len(pending)
+        return chunked
+
+    # ---- reading ----
+
+    def last_note_id(self) -> int:
+        (last,) = self.conn.execute("SELECT MAX(note_id) FROM notes").fetchone()
+        return last or 0
+
+    def chunks_of(self, note_id: int) -> List[Tuple[int, int]]:
+        return self.conn.execute(
+            "SELECT start, end FROM chunks WHERE note_id = ? ORDER BY start", (note_id,)
+        ).fetchall()
+
+    def locate(self, chunk_ids: Iterable[int]) -> Dict[int, Tuple[int, int, int]]:
+        """Map chunk ids to (note_id, start, end)."""
+        ids = sorted(set(chunk_ids))
+        found: Dict[int, Tuple[int, int, int]] = {}
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            for chunk_id, note_id, s, e in self.conn.execute(
+                "SELECT chunk_id, note_id, start, end FROM chunks "
+                f"WHERE chunk_id IN ({', '.join('?' * len(chunk))})",
+                chunk,
+            ):
+                found[chunk_id] = (note_id, s, e)
+        return found
+
+    def tagged_with(self, tag: str) -> Set[int]:
+        """Chunks of the notes carrying tag."""
+        rows = self.conn.execute(
+            "SELECT chunk_id FROM chunks WHERE note_id IN "
+            "(SELECT note_id FROM tags WHERE tag = ?)",
+            (tag.lower(),),
+        )
+        return {chunk_id for (chunk_id,) in rows}
+
+
+_indexes: Dict[Path, PassageIndex] = {}
+
+
+def get_passage_index() -> PassageIndex:
+    """Return the passage index for the current data directory (opened once per process)."""
+    path = storage.sibling_path(PASSAGES_FILE_NAME)
+    index = _indexes.get(path)
+    if index is None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        index = PassageIndex(path)
+        _indexes[path] = index
+    return index
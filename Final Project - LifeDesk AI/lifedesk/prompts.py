@@ -0,0 +1,205 @@
+import json
+import math
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from .notes import get_notes, list_notes
+from .ranking import rank_notes
+from .storage import get_backend
+
+PROMPT_TOKENS_ENV = "LIFEDESK_PROMPT_TOKENS"
+TOP_K_ENV = "LIFEDESK_TOP_K"
+DEFAULT_PROMPT_TOKENS = 3000
+DEFAULT_TOP_K = 8
+
+# Rough average for English text with OpenAI tokenizers.
+CHARS_PER_TOKEN = 4
+
+# Layout of the task table sent to the model. The schema name is part of the
+# prompt, so bumping it whenever the layout changes also keeps cached answers
+# for the old layout from being reused.
+TASKS_SCHEMA = "lifedesk-tasks/1"
+TASK_COLUMNS = ("id", "title", "priority", "due", "tags", "notes")
+TASK_NOTE_CHARS = 80
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (about four characters per token)."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def default_prompt_tokens() -> int:
+    return _env_int(PROMPT_TOKENS_ENV, DEFAULT_PROMPT_TOKENS)
+
+
+def default_top_k() -> int:
+    return _env_int(TOP_K_ENV, DEFAULT_TOP_K)
+
+
+def _encode_note(note: Dict[str, Any]) -> str:
+    return json.dumps(
+        {"id": note["id"], "title": note["title"], "tags": note.get("tags", []), "body": note["body"]},
+        ensure_ascii=False,
+    )
+
+
+def _truncated_line(note: Dict[str, Any], budget: int) -> Optional[str]:
+    """
+    Encode note with the longest cut of its body (marked " [truncated]")
+    that fits budget tokens, or None if not even one character fits.
+    Quotes, newlines and control characters grow when JSON-escaped, so the
+    encoded line is measured for each candidate length (a binary search).
+    """
+    body = note["body"]
+    best = None
+    low, high = 1, len(body)
+    while low <= high:
+        mid = (low + high) // 2
+        line = _encode_note({**note, "body": body[:mid] + " [truncated]"})
+        if estimate_tokens(line) <= budget:
+            best, low = line, mid + 1
+        else:
+            high = mid - 1
+    return best
+
+
+def select_notes_for_prompt(
+    question: str, max_tokens: int, top_k: int, semantic: bool = False
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Pick the notes most relevant to the question (BM25 over the notes index,
+    or vector similarity if semantic) and encode them, best first, until
+    max_tokens is used up. A note that does not fit whole has its body cut
+    so that its encoded line fits the remaining budget.
+
+    When nothing matches the question's words, the newest notes are used
+    instead so the model still sees some context.
+    Returns (selected notes, encoded note lines).
+    """
+    ranked = rank_notes(question, k=top_k, semantic=semantic)
+    if ranked:
+        candidates = get_notes([note_id for _, note_id in ranked])
+    else:
+        last = get_backend().last_note_id()
+        candidates = get_notes(list(range(last, max(0, last - top_k), -1)))
+
+    selected: List[Dict[str, Any]] = []
+    lines: List[str] = []
+    remaining = max_tokens
+    for note in candidates:
+        line = _encode_note(note)
+        cost = estimate_tokens(line)
+        if cost > remaining:
+            line = _truncated_line(note, remaining)
+            if line is None:
+                break
+            cost = estimate_tokens(line)
+        selected.append(note)
+        lines.append(line)
+        remaining -= cost
+        if remaining <= 0:
+            break
+    return selected, lines
+
+
+def full_notes_prompt(question: str) -> str:
+    """The original user prompt: every note, pretty-printed as JSON."""
+    notes_json = json.dumps(list_notes(), indent=2)
+    return (
+        f"Here are my notes as JSON:\n{notes_json}\n\n"
+        f"My question is: {question}"
+    )
+
+
+def build_notes_prompt(question: str, note_lines: List[str]) -> str:
+    """User prompt for note Q&A, given the encoded notes to include."""
+    notes_block = "\n".join(note_lines)
+    return (
+        f"Here are the notes most relevant to my question, one JSON object per line:\n"
+        f"{notes_block}\n\n"
+        f"My question is: {question}"
+    )
+
+
+# ---------------------------
+# Task prompts
+# ---------------------------
+
+def _cell(value: Any) -> str:
+    if isinstance(value, list):
+        value = ",".join(value)
+    text = " ".join(str(value or "").split())
+    return text.replace("|", "/")
+
+
+def encode_tasks(tasks_list: List[Dict[str, Any]]) -> str:
+    """
+    Encode open tasks as a compact table: a schema line, a header row, then
+    one |-separated row per task. Done tasks are dropped, as are columns
+    that are empty for every task, and long notes are cut to TASK_NOTE_CHARS.
+    """
+    rows: List[List[str]] = []
+    for t in tasks_list:
+        if t.get("status") == "done":
+            continue
+        notes = _cell(t.get("notes"))
+        if len(notes) > TASK_NOTE_CHARS:
+            notes = notes[: TASK_NOTE_CHARS - 3].rstrip() + "..."
+        rows.append([
+            str(t["id"]),
+            _cell(t.get("title")),
+            _cell(t.get("priority")),
+            _cell(t.get("due_date")),
+            _cell(t.get("tags")),
+            notes,
+        ])
+
+    keep = [i for i in range(len(TASK_COLUMNS)) if any(row[i] for row in rows)]
+    lines = [
+        f"schema {TASKS_SCHEMA}: open tasks, one per line, fields separated by |, blank = not set",
+        "|".join(TASK_COLUMNS[i] for i in keep),
+    ]
+    lines.extend("|".join(row[i] for i in keep) for row in rows)
+    return "\n".join(lines)
+
+
+def build_tasks_prompt(tasks_table: str) -> str:
+    """User prompt for task suggestions, given encode_tasks() output."""
+    return (
+        "Here are my open tasks. "
+        "Suggest the top 3 tasks I should do next and explain why, "
+        "using bullet points.\n\n"
+        f"{tasks_table}"
+    )
+
+
+def json_tasks_prompt(tasks_list: List[Dict[str, Any]]) -> str:
+    """The original user prompt: every task, pretty-printed as JSON."""
+    tasks_json = json.dumps(tasks_list, indent=2)
+    return (
+        "Here is my current task list as JSON. "
+        "Suggest the top 3 tasks I should do next and explain why, "
+        "using bullet points.\n\n"
+        f"{tasks_json}"
+    )
+
+
+def task_prompt_report(tasks_list: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Size of the compact task prompt next to the original JSON one."""
+    compact = build_tasks_prompt(encode_tasks(tasks_list))
+    original = json_tasks_prompt(tasks_list)
+    return {
+        "tasks": len(tasks_list),
+        "open_tasks": sum(1 for t in tasks_list if t.get("status") != "done"),
+        "compact_chars": len(compact),
+        "compact_tokens": estimate_tokens(compact),
+        "json_chars": len(original),
+        "json_tokens": estimate_tokens(original),
+    }
@@ -0,0 +1,117 @@
+import heapq
+import math
+from typing import Dict, List, Tuple
+
+from .index import NoteIndex, tokenize
+from .notes import current_index, current_passage_index, current_vector_index
+from . import trace
+
+# Standard BM25 parameters.
+K1 = 1.2
+B = 0.75
+
+# Extra score when a question word is exactly one of the note's tags.
+TAG_BOOST = 2.0
+
+# Terms found in more than this share of notes only re-score candidates.
+COMMON_FRACTION = 0.05
+CANDIDATE_LIMIT = 200
+
+STOPWORDS = {
+    "the", "and", "for", "are", "but", "not", "you", "your", "all", "any",
+    "can", "her", "was", "one", "our", "out", "his", "has", "had", "how",
+    "what", "when", "where", "which", "who", "why", "with", "this", "that",
+    "from", "they", "them", "then", "there", "these", "those", "about",
+    "into", "should", "would", "could", "does", "did", "have", "been", "will",
+    "tell", "explain", "give", "show",
+}
+
+
+def question_terms(question: str) -> List[str]:
+    """Tokenize a question, dropping short words and common stopwords."""
+    seen: List[str] = []
+    for token in tokenize(question):
+        if len(token) > 2 and token not in STOPWORDS and token not in seen:
+            seen.append(token)
+    return seen
+
+
+def _bm25_weight(idf: float, tf: int, length: int, avgdl: float) -> float:
+    norm = tf + K1 * (1 - B + B * length / avgdl)
+    return idf * tf * (K1 + 1) / norm
+
+
+def bm25_rank(index: NoteIndex, terms: List[str], k: int = 3) -> List[Tuple[float, int]]:
+    """
+    Score notes against the query terms with BM25 and return the best k as
+    (score, note_id) pairs, highest first.
+
+    Rare terms have their whole posting list scored. Common terms (found in
+    more than COMMON_FRACTION of a large corpus) carry little weight, so they only
+    add to notes that are already candidates; if every term is common, the
+    rarest one contributes its best CANDIDATE_LIMIT postings as candidates.
+    """
+    stats = index.stats()
+    n_docs = stats["doc_count"]
+    if n_docs == 0 or not terms:
+        return []
+    avgdl = (stats["total_length"] / n_docs) or 1.0
+    common_df = max(CANDIDATE_LIMIT, int(n_docs * COMMON_FRACTION))
+
+    weighted = []
+    for term in terms:
+        df = index.document_frequency(term)
+        if df:
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            weighted.append((df, term, idf))
+    weighted.sort()
+
+    scores: Dict[int, float] = {}
+
+    def add(idf: float, postings) -> None:
+        for note_id, tf, length in postings:
+            scores[note_id] = scores.get(note_id, 0.0) + _bm25_weight(idf, tf, length, avgdl)
+
+    common = []
+    for df, term, idf in weighted:
+        if df <= common_df:
+            add(idf, index.term_postings(term))
+        else:
+            common.append((term, idf))
+
+    for term in terms:
+        for note_id in index.tagged_with(term):
+            scores[note_id] = scores.get(note_id, 0.0) + TAG_BOOST
+
+    if common and not scores:
+        term, idf = common.pop(0)
+        add(idf, index.best_postings(term, CANDIDATE_LIMIT, K1, B, avgdl))
+    for term, idf in common:
+        add(idf, index.term_postings(term, note_ids=list(scores)))
+
+    # Ties go to the older note, like a stable sort would.
+    best = heapq.nsmallest(k, scores.items(), key=lambda item: (-item[1], item[0]))
+    return [(score, note_id) for note_id, score in best]
+
+
+def rank_notes(question: str, k: int = 3, semantic: bool = False) -> List[Tuple[float, int]]:
+    """
+    Best k (score, note_id) pairs for a question: BM25 keyword ranking, or
+    hashed n-gram vector similarity when semantic is True (needs NumPy).
+    """
+    with trace.span("rank_notes", semantic=semantic):
+        if semantic:
+            return current_vector_index().search(question, k=k)
+        return bm25_rank(current_index(), question_terms(question), k=k)
+
+
+def rank_passages(question: str, k: int = 3) -> List[Tuple[float, int, int, int]]:
+    """
+    Best k paragraph chunks for a question, scored with BM25 chunk by chunk.
+    Returns (score, note_id, start, end) with character offsets into the body.
+    """
+    with trace.span("rank_passages"):
+        index = current_passage_index()
+        ranked = bm25_rank(index, question_terms(question), k=k)
+        where = index.locate(chunk_id for _, chunk_id in ranked)
+        return [(score, *where[chunk_id]) for score, chunk_id in ranked]
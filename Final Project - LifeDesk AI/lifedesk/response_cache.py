@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from . import storage
+
+CACHE_FILE_NAME = "response_cache.db"
+
+TTL_ENV = "LIFEDESK_CACHE_TTL"
+MAX_ENTRIES_ENV = "LIFEDESK_CACHE_MAX_ENTRIES"
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key       TEXT PRIMARY KEY,
+    response  TEXT NOT NULL,
+    created   REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used);
+
+CREATE TABLE IF NOT EXISTS counters (
+    name  TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO counters(name, value) VALUES ('hits', 0);
+INSERT OR IGNORE INTO counters(name, value) VALUES ('misses', 0);
+"""
+
+
+def make_key(model: str, system_prompt: str, user_prompt: str) -> str:
+    """Hash everything that determines a model response."""
+    payload = json.dumps([model, system_prompt, user_prompt], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+class ResponseCache:
+    """
+    Model responses stored in SQLite next to the state file. Entries expire
+    after `ttl` seconds and the least recently used ones are evicted once
+    there are more than `max_entries`.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        ttl: float = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def _count(self, name: str) -> None:
+        self.conn.execute("UPDATE counters SET value = value + 1 WHERE name = ?", (name,))
+
+    def get(self, key: str) -> Optional[str]:
+        now = self.clock()
+        with self.conn:
+            row = self.conn.execute(
+                "SELECT response, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[1] > self.ttl:
+                self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self._count("misses")
+                return None
+            self.conn.execute(
+                "UPDATE responses SET last_used = ? WHERE key = ?", (now, key)
+            )
+            self._count("hits")
+        return row[0]
+
+    def put(self, key: str, response: str) -> None:
+        now = self.clock()
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses(key, response, created, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                (key, response, now, now),
+            )
+            (size,) = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+            if size > self.max_entries:
+                self.conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY last_used LIMIT ?)",
+                    (size - self.max_entries,),
+                )
+
+    def stats(self) -> Dict[str, int]:
+        counters = dict(self.conn.execute("SELECT name, value FROM counters"))
+        (size,) = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        return {"entries": size, "hits": counters["hits"], "misses": counters["misses"]}
+
+    def clear(self) -> int:
+        """Remove every entry and reset the counters. Returns how many entries were removed."""
+        with self.conn:
+            removed = self.conn.execute("DELETE FROM responses").rowcount
+            self.conn.execute("UPDATE counters SET value = 0")
+        return removed
+
+
+_caches: Dict[Path, ResponseCache] = {}
+
+
+def get_cache() -> ResponseCache:
+    """Return the response cache for the current data directory."""
+    path = storage.sibling_path(CACHE_FILE_NAME)
+    cache = _caches.get(path)
+    if cache is None:
+        cache = ResponseCache(
+            path,
+            ttl=_env_number(TTL_ENV, DEFAULT_TTL_SECONDS),
+            max_entries=int(_env_number(MAX_ENTRIES_ENV, DEFAULT_MAX_ENTRIES)),
+        )
+        _caches[path] = cache
+    return cache
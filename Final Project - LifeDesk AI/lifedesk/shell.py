@@ -0,0 +1,113 @@
+import argparse
+import shlex
+import sys
+import time
+from typing import List, Optional, TextIO, Tuple
+
+from . import storage
+from .journal import LOG_FILE_NAME
+
+PROMPT = "lifedesk> "
+
+SHELL_HELP = """\
+Type any lifedesk command without the leading 'lifedesk', for example:
+  tasks list --status todo
+  notes add "Heaps" "A binary heap is a tree." --tags cs
+  chat notes --question "Explain heaps to me"
+Shortcuts:
+  ask <question>    same as: chat notes --question "<question>"
+  help              show this message (help <command> for its options)
+  quit / exit       leave the shell
+Each command's latency is printed on stderr."""
+
+
+def _files_signature() -> Tuple:
+    """What the state looks like on disk; changes when another process writes."""
+    return (
+        storage.file_key(storage.STATE_FILE),
+        storage.file_key(storage.sibling_path(LOG_FILE_NAME)),
+    )
+
+
+def warm_up() -> None:
+    """Open the storage backend, the search indexes and the AI client once."""
+    from . import agents, notes, vectors
+
+    agents._get_client()
+    backend = storage.get_backend()
+    backend.version()
+    for _ in backend.iter_tasks():
+        pass
+    notes.current_index()
+    notes.current_passage_index()
+    if vectors.available():
+        notes.current_vector_index()
+
+
+def _to_argv(line: str) -> List[str]:
+    argv = shlex.split(line) or ["help"]
+    if argv[0] == "ask":
+        return ["chat", "notes", "--question", " ".join(argv[1:])]
+    if argv[0] == "help":
+        return argv[1:] + ["--help"]
+    return argv
+
+
+def run_shell(parser: argparse.ArgumentParser, stdin: Optional[TextIO] = None) -> None:
+    """
+    Read commands until EOF or 'quit', running each one against the state
+    loaded at startup. State is only reloaded when the files on disk have
+    changed since the previous command (i.e. another process wrote them).
+    """
+    from .cli import check_args
+
+    stdin = stdin or sys.stdin
+    interactive = stdin.isatty()
+    if interactive:
+        try:
+            import readline  # noqa: F401  (line editing and history)
+        except ImportError:
+            pass
+
+    start = time.perf_counter()
+    warm_up()
+    signature = _files_signature()
+    print(f"[shell] loaded in {(time.perf_counter() - start) * 1000:.1f} ms", file=sys.stderr)
+
+    while True:
+        if interactive:
+            sys.stdout.write(PROMPT)
+            sys.stdout.flush()
+        line = stdin.readline()
+        if not line:
+            break
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line in ("quit", "exit"):
+            break
+        if line == "help":
+            print(SHELL_HELP)
+            continue
+
+        start = time.perf_counter()
+        reloaded = False
+        try:
+            argv = _to_argv(line)
+            if _files_signature() != signature:
+                warm_up()
+                reloaded = True
+            args = parser.parse_args(argv)
+            if args.command == "shell":
+                raise ValueError("already in the shell")
+            check_args(parser, args)
+            args.func(args)
+        except SystemExit:
+            # argparse has already printed the usage error (or --help).
+            pass
+        except Exception as exc:
+            print(f"error: {exc}", file=sys.stderr)
+        signature = _files_signature()
+        elapsed = (time.perf_counter() - start) * 1000
+        note = ", reloaded state" if reloaded else ""
+        print(f"[shell] {elapsed:.1f} ms{note}", file=sys.stderr)
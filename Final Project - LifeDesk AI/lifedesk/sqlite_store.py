@@ -0,0 +1,261 @@
+import json
+import sqlite3
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id       INTEGER PRIMARY KEY,
+    title    TEXT NOT NULL,
+    status   TEXT NOT NULL DEFAULT 'todo',
+    priority TEXT NOT NULL DEFAULT 'medium',
+    due_date TEXT,
+    due_ordinal INTEGER,
+    tags     TEXT NOT NULL DEFAULT '[]',
+    notes    TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status);
+
+CREATE TABLE IF NOT EXISTS notes (
+    id    INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    body  TEXT NOT NULL,
+    tags  TEXT NOT NULL DEFAULT '[]'
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta(key, value) VALUES ('next_task_id', 1);
+INSERT OR IGNORE INTO meta(key, value) VALUES ('next_note_id', 1);
+INSERT OR IGNORE INTO meta(key, value) VALUES ('version', 0);
+"""
+
+TASK_COLUMNS = (
+    "id", "title", "status", "priority", "due_date", "due_ordinal", "tags", "notes",
+)
+NOTE_COLUMNS = ("id", "title", "body", "tags")
+
+
+def _row_to_task(row) -> Dict[str, Any]:
+    task = dict(zip(TASK_COLUMNS, row))
+    task["tags"] = json.loads(task["tags"])
+    return task
+
+
+def _row_to_note(row) -> Dict[str, Any]:
+    note = dict(zip(NOTE_COLUMNS, row))
+    note["tags"] = json.loads(note["tags"])
+    return note
+
+
+class SqliteBackend:
+    """
+    SQLite storage (WAL mode). Every add or status change touches a single
+    row instead of rewriting the whole state.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._upgrade()
+
+    def _upgrade(self) -> None:
+        """Bring databases created by older versions up to the current schema."""
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(tasks)")}
+        if "due_ordinal" not in columns:
+            from .tasks import due_ordinal
+
+            with self.conn:
+                self.conn.execute("ALTER TABLE tasks ADD COLUMN due_ordinal INTEGER")
+                rows = self.conn.execute(
+                    "SELECT id, due_date FROM tasks WHERE due_date IS NOT NULL"
+                ).fetchall()
+                self.conn.executemany(
+                    "UPDATE tasks SET due_ordinal = ? WHERE id = ?",
+                    [(due_ordinal(due), task_id) for task_id, due in rows],
+                )
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def _take_ids(self, key: str, count: int = 1) -> int:
+        """Reserve `count` consecutive ids and return the first one."""
+        (value,) = self.conn.execute(
+            "SELECT value FROM meta WHERE key = ?", (key,)
+        ).fetchone()
+        self.conn.execute("UPDATE meta SET value = ? WHERE key = ?", (value + count, key))
+        return value
+
+    def _bump_version(self) -> None:
+        self.conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+
+    def version(self) -> int:
+        (value,) = self.conn.execute(
+            "SELECT value FROM meta WHERE key = 'version'"
+        ).fetchone()
+        return value
+
+    # ---- tasks ----
+
+    def insert_task(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        return self.insert_tasks([fields])[0]
+
+    def insert_tasks(self, fields_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insert many tasks in one transaction."""
+        if not fields_list:
+            return []
+        with self.conn:
+            first_id = self._take_ids("next_task_id", len(fields_list))
+            created = [{"id": first_id + i, **f} for i, f in enumerate(fields_list)]
+            for task in created:
+                self._insert_task_row(task)
+            self._bump_version()
+        return created
+
+    def _insert_task_row(self, task: Dict[str, Any]) -> None:
+        from .tasks import due_ordinal
+
+        ordinal = task.get("due_ordinal")
+        if ordinal is None:
+            ordinal = due_ordinal(task.get("due_date"))
+        self.conn.execute(
+            "INSERT INTO tasks(id, title, status, priority, due_date, due_ordinal, tags, notes) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                task["id"],
+                task["title"],
+                task.get("status", "todo"),
+                task.get("priority", "medium"),
+                task.get("due_date"),
+                ordinal,
+                json.dumps(task.get("tags", [])),
+                task.get("notes", ""),
+            ),
+        )
+
+    def set_task_status(self, task_id: int, status: str) -> Optional[Dict[str, Any]]:
+        with self.conn:
+            cur = self.conn.execute(
+                "UPDATE tasks SET status = ? WHERE id = ?", (status, task_id)
+            )
+            if cur.rowcount:
+                self._bump_version()
+        if cur.rowcount == 0:
+            return None
+        row = self.conn.execute(
+            f"SELECT {', '.join(TASK_COLUMNS)} FROM tasks WHERE id = ?", (task_id,)
+        ).fetchone()
+        return _row_to_task(row)
+
+    def fetch_tasks(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        return list(self.iter_tasks(status=status))
+
+    def iter_tasks(self, status: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        query = f"SELECT {', '.join(TASK_COLUMNS)} FROM tasks"
+        params: tuple = ()
+        if status:
+            query += " WHERE status = ?"
+            params = (status,)
+        query += " ORDER BY id"
+        for row in self.conn.execute(query, params):
+            yield _row_to_task(row)
+
+    # ---- notes ----
+
+    def insert_note(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        return self.insert_notes([fields])[0]
+
+    def insert_notes(self, fields_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insert many notes in one transaction."""
+        if not fields_list:
+            return []
+        with self.conn:
+            first_id = self._take_ids("next_note_id", len(fields_list))
+            created = [{"id": first_id + i, **f} for i, f in enumerate(fields_list)]
+            for note in created:
+                self._insert_note_row(note)
+            self._bump_version()
+        return created
+
+    def _insert_note_row(self, note: Dict[str, Any]) -> None:
+        self.conn.execute(
+            "INSERT INTO notes(id, title, body, tags) VALUES (?, ?, ?, ?)",
+            (note["id"], note["title"], note["body"], json.dumps(note.get("tags", []))),
+        )
+
+    def fetch_notes(self) -> List[Dict[str, Any]]:
+        return list(self.iter_notes())
+
+    def iter_notes(self) -> Iterator[Dict[str, Any]]:
+        query = f"SELECT {', '.join(NOTE_COLUMNS)} FROM notes ORDER BY id"
+        for row in self.conn.execute(query):
+            yield _row_to_note(row)
+
+    def fetch_notes_by_ids(self, note_ids) -> List[Dict[str, Any]]:
+        ids = sorted(set(note_ids))
+        found: List[Dict[str, Any]] = []
+        # Stay below SQLite's bound-parameter limit.
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            query = (
+                f"SELECT {', '.join(NOTE_COLUMNS)} FROM notes "
+                f"WHERE id IN ({', '.join('?' * len(chunk))}) ORDER BY id"
+            )
+            found.extend(_row_to_note(row) for row in self.conn.execute(query, chunk))
+        return found
+
+    def last_note_id(self) -> int:
+        (last,) = self.conn.execute("SELECT MAX(id) FROM notes").fetchone()
+        return last or 0
+
+    # ---- migration ----
+
+    def import_state(self, state: Dict[str, Any]) -> Dict[str, int]:
+        """
+        Copy a whole JSON-style state into the database in one transaction.
+        Whatever the database held before is replaced.
+        """
+        tasks = state.get("tasks", [])
+        notes = state.get("notes", [])
+        with self.conn:
+            self.conn.execute("DELETE FROM tasks")
+            self.conn.execute("DELETE FROM notes")
+            for t in tasks:
+                self._insert_task_row(t)
+            for n in notes:
+                self._insert_note_row(n)
+            next_task = max(
+                [state.get("next_task_id", 1)] + [t["id"] + 1 for t in tasks]
+            )
+            next_note = max(
+                [state.get("next_note_id", 1)] + [n["id"] + 1 for n in notes]
+            )
+            self.conn.execute(
+                "UPDATE meta SET value = ? WHERE key = 'next_task_id'", (next_task,)
+            )
+            self.conn.execute(
+                "UPDATE meta SET value = ? WHERE key = 'next_note_id'", (next_note,)
+            )
+            self.conn.execute(
+                "UPDATE meta SET value = MAX(value, ?) + 1 WHERE key = 'version'",
+                (state.get("version", 0),),
+            )
+        return {"tasks": len(tasks), "notes": len(notes)}
+
+
+def migrate_json_to_sqlite(json_path: Path, db_path: Path) -> Dict[str, int]:
+    """One-shot import of an existing JSON state file into a SQLite database."""
+    with Path(json_path).open("r", encoding="utf-8") as f:
+        state = json.load(f)
+    backend = SqliteBackend(db_path)
+    try:
+        return backend.import_state(state)
+    finally:
+        backend.close()
@@ -1,26 +1,404 @@
 import json
+import os
+import tempfile
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, List, Optional
+
+from . import trace
 
 DATA_DIR = Path(__file__).resolve().parent.parent / "data"
 STATE_FILE = DATA_DIR / "lifedesk_state.json"
 
+# Which storage backend to use: "json" (default), "sqlite" or "journal".
+BACKEND_ENV = "LIFEDESK_BACKEND"
+DB_FILE_NAME = "lifedesk.db"
+
+
 def _ensure_data_dir() -> None:
     DATA_DIR.mkdir(parents=True, exist_ok=True)
 
+
+def sibling_path(name: str) -> Path:
+    """Return a path that lives next to the state file."""
+    return STATE_FILE.parent / name
+
+
+def empty_state() -> Dict[str, Any]:
+    return {
+        "version": 0,
+        "tasks": [],
+        "notes": [],
+        "next_task_id": 1,
+        "next_note_id": 1,
+    }
+
+
+# ---------------------------
+# Parsed-state cache
+# ---------------------------
+
+class StateCache:
+    """
+    Keeps the last parsed state file in memory. An entry is only reused
+    while the file's (mtime, size, inode) are unchanged, so edits by other
+    processes are always picked up.
+    """
+
+    def __init__(self) -> None:
+        self.key = None
+        self.state: Optional[Dict[str, Any]] = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        if key is not None and key == self.key:
+            self.hits += 1
+            return self.state
+        self.misses += 1
+        return None
+
+    def put(self, key, state: Dict[str, Any]) -> None:
+        self.key = key
+        self.state = state
+
+    def invalidate(self) -> None:
+        self.key = None
+        self.state = None
+
+
+_cache = StateCache()
+
+
+def file_key(path: Path):
+    """Identify one version of a file by path, mtime, size and inode (None if missing)."""
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return (str(path), st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def cache_stats() -> Dict[str, int]:
+    """Return hit/miss counters of the state cache."""
+    return {"hits": _cache.hits, "misses": _cache.misses}
+
+
+def clear_cache() -> None:
+    """Drop the cached state and reset the counters."""
+    _cache.invalidate()
+    _cache.hits = 0
+    _cache.misses = 0
+
+
 def load_state() -> Dict[str, Any]:
-    _ensure_data_dir()
-    if not STATE_FILE.exists():
-        return {
-            "tasks": [],
-            "notes": [],
-            "next_task_id": 1,
-            "next_note_id": 1,
-        }
-    with STATE_FILE.open("r", encoding="utf-8") as f:
-        return json.load(f)
+    """
+    Return the parsed state file. Repeated calls return the same cached
+    object until the file changes, so treat the result as read-only unless
+    you pass it back to save_state().
+    """
+    with trace.span("load_state") as span:
+        _ensure_data_dir()
+        key = file_key(STATE_FILE)
+        if key is None:
+            return empty_state()
+        state = _cache.get(key)
+        if state is not None:
+            span.set(cached=True)
+            return state
+        with STATE_FILE.open("r", encoding="utf-8") as f:
+            state = json.load(f)
+        _cache.put(key, state)
+        span.set(cached=False, bytes=key[2])
+        return state
+
+
+def write_json_atomic(path: Path, data: Any) -> None:
+    """Write JSON to a temp file and move it into place, so readers never see half a file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        mode="w", encoding="utf-8", dir=path.parent, delete=False
+    ) as tmp:
+        json.dump(data, tmp, indent=2)
+        temp_name = Path(tmp.name)
+    temp_name.replace(path)
+
+
+def bump_version(state: Dict[str, Any]) -> int:
+    """Advance the state version; every change to tasks or notes calls this."""
+    state["version"] = state.get("version", 0) + 1
+    return state["version"]
+
 
 def save_state(state: Dict[str, Any]) -> None:
     _ensure_data_dir()
-    with STATE_FILE.open("w", encoding="utf-8") as f:
-        json.dump(state, f, indent=2)
\ No newline at end of file
+    _cache.invalidate()
+    # "version" goes first so read_json_value() finds it without a full parse.
+    write_json_atomic(STATE_FILE, {"version": state.get("version", 0), **state})
+    # We already hold what was just written, so the next read is a hit.
+    _cache.put(file_key(STATE_FILE), state)
+
+
+# ---------------------------
+# Streaming reads
+# ---------------------------
+
+class _JsonStream:
+    """Reads JSON values one at a time from a file without loading all of it."""
+
+    def __init__(self, f, chunk_size: int) -> None:
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, size: int = 0) -> bool:
+        chunk = self.f.read(max(size, self.chunk_size))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character ("" at end of file)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def take(self, allowed: str) -> str:
+        ch = self.peek()
+        if not ch or ch not in allowed:
+            raise ValueError(f"Malformed JSON file: expected one of {allowed!r}, got {ch!r}")
+        self.pos += 1
+        return ch
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # Each retry decodes from the item's start again, so read as
+                # much as is already buffered: the buffer doubles and an item
+                # spanning many chunks costs O(its size), not O(size^2 / chunk).
+                if not self._fill(len(self.buf) - self.pos):
+                    raise
+                continue
+            # A number at the very end of the buffer may continue in the next chunk.
+            if end == len(self.buf) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def array_items(self) -> Iterator[Any]:
+        self.take("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.take(",]") == "]":
+                return
+
+
+def iter_json_array(path: Path, key: str, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """
+    Yield the items of the top-level array `key` of a JSON object file one
+    at a time. Memory use is bounded by the largest single item, and the
+    caller can stop early without reading the rest of the file.
+    """
+    with Path(path).open("r", encoding="utf-8") as f:
+        stream = _JsonStream(f, chunk_size)
+        stream.take("{")
+        if stream.peek() == "}":
+            return
+        while True:
+            name = stream.value()
+            stream.take(":")
+            if stream.peek() == "[":
+                items = stream.array_items()
+                if name == key:
+                    yield from items
+                    return
+                for _ in items:
+                    pass
+            else:
+                stream.value()
+            if stream.take(",}") == "}":
+                return
+
+
+def iter_json_list(path: Path, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """Yield the items of a file holding one top-level JSON array, one at a time."""
+    with Path(path).open("r", encoding="utf-8") as f:
+        yield from _JsonStream(f, chunk_size).array_items()
+
+
+def read_json_value(path: Path, key: str, default: Any = None, chunk_size: int = 1 << 16) -> Any:
+    """
+    Return the top-level value `key` of a JSON object file, reading only
+    as far as needed (arrays before it are skipped item by item).
+    """
+    with Path(path).open("r", encoding="utf-8") as f:
+        stream = _JsonStream(f, chunk_size)
+        stream.take("{")
+        if stream.peek() == "}":
+            return default
+        while True:
+            name = stream.value()
+            stream.take(":")
+            if stream.peek() == "[" and name != key:
+                for _ in stream.array_items():
+                    pass
+            else:
+                value = stream.value()
+                if name == key:
+                    return value
+            if stream.take(",}") == "}":
+                return default
+
+
+# ---------------------------
+# Backends
+# ---------------------------
+
+class JsonBackend:
+    """
+    The original storage: the whole state lives in one JSON file that is
+    read and rewritten on every change.
+    """
+
+    name = "json"
+
+    def insert_task(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        return self.insert_tasks([fields])[0]
+
+    def insert_tasks(self, fields_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Assign ids to many tasks and save them with a single write."""
+        return self._insert_many("tasks", "next_task_id", fields_list)
+
+    def _insert_many(
+        self, kind: str, counter: str, fields_list: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        if not fields_list:
+            return []
+        state = load_state()
+        first_id = state.get(counter, 1)
+        created = [{"id": first_id + i, **fields} for i, fields in enumerate(fields_list)]
+        state[kind].extend(created)
+        state[counter] = first_id + len(created)
+        bump_version(state)
+        save_state(state)
+        return created
+
+    def set_task_status(self, task_id: int, status: str) -> Optional[Dict[str, Any]]:
+        state = load_state()
+        for t in state.get("tasks", []):
+            if t.get("id") == task_id:
+                t["status"] = status
+                bump_version(state)
+                save_state(state)
+                return t
+        return None
+
+    def fetch_tasks(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        tasks: List[Dict[str, Any]] = load_state().get("tasks", [])
+        if status:
+            tasks = [t for t in tasks if t.get("status") == status]
+        return tasks
+
+    def _iter_items(self, kind: str) -> Iterator[Dict[str, Any]]:
+        key = file_key(STATE_FILE)
+        if key is None:
+            return iter(())
+        state = _cache.get(key)
+        if state is not None:
+            # Already parsed in this process; no need to touch the disk.
+            return iter(state.get(kind, []))
+        return iter_json_array(STATE_FILE, kind)
+
+    def iter_tasks(self, status: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        for t in self._iter_items("tasks"):
+            if not status or t.get("status") == status:
+                yield t
+
+    def insert_note(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        return self.insert_notes([fields])[0]
+
+    def insert_notes(self, fields_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Assign ids to many notes and save them with a single write."""
+        return self._insert_many("notes", "next_note_id", fields_list)
+
+    def fetch_notes(self) -> List[Dict[str, Any]]:
+        return load_state().get("notes", [])
+
+    def iter_notes(self) -> Iterator[Dict[str, Any]]:
+        return self._iter_items("notes")
+
+    def fetch_notes_by_ids(self, note_ids) -> List[Dict[str, Any]]:
+        wanted = set(note_ids)
+        return [n for n in self.fetch_notes() if n.get("id") in wanted]
+
+    def last_note_id(self) -> int:
+        notes = self.fetch_notes()
+        return notes[-1]["id"] if notes else 0
+
+    def version(self) -> int:
+        key = file_key(STATE_FILE)
+        if key is None:
+            return 0
+        state = _cache.get(key)
+        if state is not None:
+            return state.get("version", 0)
+        return read_json_value(STATE_FILE, "version", 0)
+
+
+_backends: Dict[Any, Any] = {}
+
+
+def backend_name() -> str:
+    return os.environ.get(BACKEND_ENV, "json").strip().lower() or "json"
+
+
+def get_backend():
+    """
+    Return the storage backend selected by the LIFEDESK_BACKEND environment
+    variable. Backends are created once per process and data location.
+    """
+    name = backend_name()
+    key = (name, STATE_FILE)
+    backend = _backends.get(key)
+    if backend is not None:
+        return backend
+
+    if name == "json":
+        backend = JsonBackend()
+    elif name == "sqlite":
+        from .sqlite_store import SqliteBackend
+        _ensure_data_dir()
+        backend = SqliteBackend(sibling_path(DB_FILE_NAME))
+    elif name == "journal":
+        from .journal import JournalBackend, LOG_FILE_NAME
+        backend = JournalBackend(STATE_FILE, sibling_path(LOG_FILE_NAME))
+    else:
+        raise ValueError(
+            f"Unknown storage backend {name!r} (expected json, sqlite or journal)"
+        )
+
+    _backends[key] = backend
+    return backend
+
+
+def state_version() -> int:
+    """
+    Version of the stored tasks and notes. It only ever increases, by at
+    least one for every change, so equal versions mean nothing changed.
+    """
+    return get_backend().version()
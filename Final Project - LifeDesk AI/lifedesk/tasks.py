@@ -1,5 +1,22 @@
-from typing import List, Dict, Any, Optional
-from .storage import load_state, save_state
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Dict, Any, Iterator, Optional
+from .storage import get_backend
+
+
+@lru_cache(maxsize=4096)
+def due_ordinal(due_date: Optional[str]) -> Optional[int]:
+    """
+    Turn a "YYYY-MM-DD" string into a day number (date.toordinal()), or None
+    if it is missing or malformed. Stored on each task so ranking never has
+    to parse dates.
+    """
+    if not due_date:
+        return None
+    try:
+        return datetime.strptime(due_date, "%Y-%m-%d").date().toordinal()
+    except (TypeError, ValueError):
+        return None
 
 
 def add_task(
@@ -10,46 +27,52 @@ def add_task(
     notes: str = "",
 ) -> Dict[str, Any]:
     """Create a new task, save it, and return it."""
-    state = load_state()
-    task_id = state.get("next_task_id", 1)
+    fields = task_fields(title, priority=priority, due_date=due_date, tags=tags, notes=notes)
+    return get_backend().insert_task(fields)
 
-    task = {
-        "id": task_id,
+
+def task_fields(
+    title: str,
+    priority: str = "medium",
+    due_date: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    notes: str = "",
+    status: str = "todo",
+) -> Dict[str, Any]:
+    """Build the stored fields of a task (everything except its id)."""
+    return {
         "title": title,
-        "status": "todo",        # todo | done
+        "status": status,        # todo | done
         "priority": priority,    # low | medium | high
         "due_date": due_date,    # string like "2025-11-20"
+        "due_ordinal": due_ordinal(due_date),
         "tags": tags or [],
         "notes": notes,
     }
 
-    state["tasks"].append(task)
-    state["next_task_id"] = task_id + 1
-    save_state(state)
-    return task
+
+def add_tasks(fields_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Save many tasks (built with task_fields) in one write and return them."""
+    return get_backend().insert_tasks(fields_list)
 
 
 def list_tasks(status: Optional[str] = None) -> List[Dict[str, Any]]:
     """
     Return all tasks, or only tasks with a given status (todo/done).
     """
-    state = load_state()
-    tasks: List[Dict[str, Any]] = state.get("tasks", [])
+    return get_backend().fetch_tasks(status=status)
 
-    if status:
-        tasks = [t for t in tasks if t.get("status") == status]
 
-    return tasks
+def iter_tasks(status: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield tasks one at a time, streaming them from disk where the backend
+    allows it. Stop iterating early to avoid reading the rest.
+    """
+    return get_backend().iter_tasks(status=status)
 
 
 def complete_task(task_id: int) -> Optional[Dict[str, Any]]:
     """
     Mark a task as done. Returns the updated task or None if not found.
     """
-    state = load_state()
-    for t in state.get("tasks", []):
-        if t.get("id") == task_id:
-            t["status"] = "done"
-            save_state(state)
-            return t
-    return None
\ No newline at end of file
+    return get_backend().set_task_status(task_id, "done")
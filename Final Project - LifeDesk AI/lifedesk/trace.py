@@ -0,0 +1,116 @@
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Tracing is off unless enable() is called (chat --trace / --trace-file).
+# While off, span() returns one shared no-op object, so instrumented code
+# pays a function call and a flag check.
+_enabled = False
+_t0 = 0.0
+_stack: List[str] = []
+_records: List[Dict[str, Any]] = []
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+    def set(self, **attrs: Any) -> None:
+        pass
+
+
+_NULL = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "attrs", "path", "start")
+
+    def __init__(self, name: str, attrs: Dict[str, Any]) -> None:
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self) -> "_Span":
+        _stack.append(self.name)
+        self.path = "/".join(_stack)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        end = time.perf_counter()
+        _stack.pop()
+        _records.append({
+            "span": self.name,
+            "path": self.path,
+            "start_ms": round((self.start - _t0) * 1000, 3),
+            "ms": round((end - self.start) * 1000, 3),
+            **self.attrs,
+        })
+        return False
+
+    def set(self, **attrs: Any) -> None:
+        """Attach extra fields (e.g. cache hit or miss) once they are known."""
+        self.attrs.update(attrs)
+
+
+def span(name: str, **attrs: Any):
+    """Time a block: `with trace.span("load_state"): ...`."""
+    if not _enabled:
+        return _NULL
+    return _Span(name, attrs)
+
+
+def enable() -> None:
+    """Start recording spans, dropping any recorded before."""
+    global _enabled, _t0
+    _enabled = True
+    _t0 = time.perf_counter()
+    _stack.clear()
+    _records.clear()
+
+
+def disable() -> None:
+    global _enabled
+    _enabled = False
+
+
+def records() -> List[Dict[str, Any]]:
+    """Finished spans, in the order they ended."""
+    return list(_records)
+
+
+def breakdown(spans: Optional[List[Dict[str, Any]]] = None) -> List[str]:
+    """
+    Human-readable summary: one line per span path, indented by nesting
+    depth, with repeated spans (e.g. several state loads) added up.
+    """
+    spans = records() if spans is None else spans
+    totals: Dict[str, List[float]] = {}
+    first_start: Dict[str, float] = {}
+    for s in spans:
+        entry = totals.setdefault(s["path"], [0, 0.0])
+        entry[0] += 1
+        entry[1] += s["ms"]
+        first_start[s["path"]] = min(first_start.get(s["path"], s["start_ms"]), s["start_ms"])
+
+    lines = []
+    for path in sorted(totals, key=lambda p: (first_start[p], p.count("/"))):
+        count, ms = totals[path]
+        depth = path.count("/")
+        label = "  " * depth + path.rsplit("/", 1)[-1]
+        times = f" x{count}" if count > 1 else ""
+        lines.append(f"{label:<32} {ms:9.2f} ms{times}")
+    return lines
+
+
+def write_jsonl(path: Path, spans: Optional[List[Dict[str, Any]]] = None, **run: Any) -> None:
+    """Append spans as JSON lines, each tagged with the `run` fields."""
+    spans = records() if spans is None else spans
+    with Path(path).open("a", encoding="utf-8") as f:
+        for s in spans:
+            f.write(json.dumps({**run, **s}, ensure_ascii=False) + "\n")
@@ -0,0 +1,232 @@
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+from . import storage
+
+# Hashed character n-grams: DIM buckets, float32, one row per note. The file
+# names carry DIM, so rows written with another width are never misread.
+DIM = 1024
+NGRAM = 3
+
+MATRIX_FILE_NAME = f"note_vectors.{DIM}.f32"
+IDS_FILE_NAME = f"note_vectors.{DIM}.ids"
+
+# Rows multiplied per step; bounds memory use regardless of corpus size.
+BLOCK_ROWS = 65536
+
+# Notes embedded per embed_many call when appending, for the same reason.
+EMBED_ROWS = 1000
+
+# Scores at or below this are treated as "no match".
+MIN_SIMILARITY = 0.05
+
+
+# Optional NumPy support (only needed for semantic search). It is imported on
+# first use so that commands which never touch vectors don't pay for loading it.
+_numpy = None
+_numpy_loaded = False
+
+
+def _get_numpy():
+    """Return the numpy module, or None if it is not installed."""
+    global _numpy, _numpy_loaded
+    if not _numpy_loaded:
+        _numpy_loaded = True
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = None
+    return _numpy
+
+
+def available() -> bool:
+    """Semantic search needs NumPy."""
+    return _get_numpy() is not None
+
+
+def _require_numpy():
+    np = _get_numpy()
+    if np is None:
+        raise RuntimeError(
+            "Semantic search needs NumPy. Install it with: pip install numpy"
+        )
+    return np
+
+
+def _ngrams(word: str) -> List[str]:
+    padded = f" {word} "
+    if len(padded) <= NGRAM:
+        return [padded]
+    return [padded[i:i + NGRAM] for i in range(len(padded) - NGRAM + 1)]
+
+
+def embed_many(texts: Iterable[str]):
+    """
+    Map each text to a unit-length DIM vector of hashed character n-grams
+    with sublinear (1 + log tf) weights, as rows of one float32 matrix.
+    Similar spellings and word forms ("heap", "heaps", "heapify") end up
+    close together.
+
+    Python only splits words and looks up each distinct word's n-grams once
+    per batch; counting n-grams per text and summing the signed weights into
+    buckets are done by np.unique and np.bincount over the whole batch.
+    """
+    np = _require_numpy()
+    gram_ids: Dict[str, int] = {}
+    word_grams: Dict[str, List[int]] = {}
+    occurrences: List[int] = []
+    row_sizes: List[int] = []
+    for text in texts:
+        before = len(occurrences)
+        for word in text.lower().split():
+            ids = word_grams.get(word)
+            if ids is None:
+                ids = [gram_ids.setdefault(g, len(gram_ids)) for g in _ngrams(word)]
+                word_grams[word] = ids
+            occurrences.extend(ids)
+        row_sizes.append(len(occurrences) - before)
+
+    rows = len(row_sizes)
+    if not occurrences:
+        return np.zeros((rows, DIM), dtype=np.float32)
+    hashes = np.array(
+        [zlib.crc32(g.encode("utf-8")) for g in gram_ids], dtype=np.int64
+    )
+    bucket_of = hashes % DIM
+    sign_of = np.where(hashes & 0x80000000, 1.0, -1.0)
+
+    # One key per (text, n-gram) occurrence; counting equal keys gives each tf.
+    row_of = np.repeat(np.arange(rows, dtype=np.int64), row_sizes)
+    keys, tf = np.unique(
+        row_of * len(gram_ids) + np.array(occurrences, dtype=np.int64),
+        return_counts=True,
+    )
+    row_of, gram_of = np.divmod(keys, len(gram_ids))
+    matrix = np.bincount(
+        row_of * DIM + bucket_of[gram_of],
+        weights=sign_of[gram_of] * (1.0 + np.log(tf)),
+        minlength=rows * DIM,
+    ).reshape(rows, DIM)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+def embed(text: str):
+    """The embed_many vector of a single text."""
+    return embed_many([text])[0]
+
+
+def _note_text(note: Dict[str, Any]) -> str:
+    return " ".join([note.get("title", ""), note.get("body", ""), " ".join(note.get("tags", []))])
+
+
+class VectorIndex:
+    """
+    Note vectors in a flat float32 file (memory-mapped for queries) plus a
+    parallel file of int64 note ids. Adding notes only appends rows.
+    """
+
+    def __init__(self, matrix_path: Path, ids_path: Path) -> None:
+        self.matrix_path = Path(matrix_path)
+        self.ids_path = Path(ids_path)
+
+    def count(self) -> int:
+        rows = self.ids_path.stat().st_size // 8 if self.ids_path.exists() else 0
+        # A crash between the two appends can leave one file a row ahead.
+        if self.matrix_path.exists():
+            rows = min(rows, self.matrix_path.stat().st_size // (DIM * 4))
+        else:
+            rows = 0
+        return rows
+
+    def _ids(self):
+        np = _require_numpy()
+        n = self.count()
+        if n == 0:
+            return np.zeros(0, dtype=np.int64)
+        return np.memmap(self.ids_path, dtype=np.int64, mode="r", shape=(n,))
+
+    def last_note_id(self) -> int:
+        ids = self._ids()
+        return int(ids[-1]) if len(ids) else 0
+
+    def append(self, notes: Iterable[Dict[str, Any]]) -> int:
+        """Embed notes and append them. Returns how many rows were written."""
+        np = _require_numpy()
+        notes = list(notes)
+        if not notes:
+            return 0
+        self.matrix_path.parent.mkdir(parents=True, exist_ok=True)
+        self._truncate_to(self.count())
+        for start in range(0, len(notes), EMBED_ROWS):
+            batch = notes[start:start + EMBED_ROWS]
+            rows = embed_many(_note_text(n) for n in batch)
+            ids = np.array([n["id"] for n in batch], dtype=np.int64)
+            with self.matrix_path.open("ab") as f:
+                f.write(rows.tobytes())
+            with self.ids_path.open("ab") as f:
+                f.write(ids.tobytes())
+        return len(notes)
+
+    def _truncate_to(self, rows: int) -> None:
+        for path, width in ((self.matrix_path, DIM * 4), (self.ids_path, 8)):
+            if path.exists() and path.stat().st_size != rows * width:
+                with path.open("r+b") as f:
+                    f.truncate(rows * width)
+
+    def rebuild(self, notes: Iterable[Dict[str, Any]]) -> int:
+        _require_numpy()
+        for path in (self.matrix_path, self.ids_path):
+            if path.exists():
+                path.unlink()
+        total = 0
+        batch: List[Dict[str, Any]] = []
+        for note in notes:
+            batch.append(note)
+            if len(batch) >= EMBED_ROWS:
+                total += self.append(batch)
+                batch = []
+        return total + self.append(batch)
+
+    def search(self, text: str, k: int = 3) -> List[Tuple[float, int]]:
+        """
+        Return up to k (similarity, note_id) pairs, best first. The matrix is
+        scanned in blocks of BLOCK_ROWS with one matrix-vector product each.
+        """
+        np = _require_numpy()
+        n = self.count()
+        if n == 0 or k <= 0:
+            return []
+        query = embed(text)
+        matrix = np.memmap(self.matrix_path, dtype=np.float32, mode="r", shape=(n, DIM))
+        ids = self._ids()
+
+        best_scores = np.zeros(0, dtype=np.float32)
+        best_rows = np.zeros(0, dtype=np.int64)
+        for start in range(0, n, BLOCK_ROWS):
+            scores = matrix[start:start + BLOCK_ROWS] @ query
+            if len(scores) > k:
+                top = np.argpartition(-scores, k)[:k]
+            else:
+                top = np.arange(len(scores))
+            best_scores = np.concatenate([best_scores, scores[top]])
+            best_rows = np.concatenate([best_rows, top + start])
+            if len(best_scores) > k:
+                keep = np.argpartition(-best_scores, k)[:k]
+                best_scores, best_rows = best_scores[keep], best_rows[keep]
+
+        order = sorted(range(len(best_scores)), key=lambda i: (-best_scores[i], best_rows[i]))
+        return [
+            (float(best_scores[i]), int(ids[best_rows[i]]))
+            for i in order
+            if best_scores[i] > MIN_SIMILARITY
+        ]
+
+
+def get_vector_index() -> VectorIndex:
+    return VectorIndex(
+        storage.sibling_path(MATRIX_FILE_NAME), storage.sibling_path(IDS_FILE_NAME)
+    )
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from lifedesk import agents, index, memo, passages, response_cache, storage
+
+
+class FakeClient:
+    """Stands in for openai.OpenAI; records every request."""
+
+    def __init__(self) -> None:
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    @property
+    def calls(self) -> int:
+        return len(self.requests)
+
+    def _create(self, model, messages, stream=False, **kwargs):
+        self.requests.append({"model": model, "messages": messages, "stream": stream, **kwargs})
+        content = f" answer {self.calls} "
+        if stream:
+            return self._chunks(["", " answer", f" {self.calls} "])
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    @staticmethod
+    def _chunks(pieces):
+        for piece in pieces:
+            delta = SimpleNamespace(content=piece)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path: Path, monkeypatch) -> Path:
+    """Point every LifeDesk file at a temporary directory."""
+    target = tmp_path / "data"
+    monkeypatch.setattr(storage, "DATA_DIR", target)
+    monkeypatch.setattr(storage, "STATE_FILE", target / "lifedesk_state.json")
+    monkeypatch.delenv(storage.BACKEND_ENV, raising=False)
+    storage.clear_cache()
+    yield target
+    storage._backends.clear()
+    index._indexes.clear()
+    response_cache._caches.clear()
+    memo._stores.clear()
+    passages._indexes.clear()
+
+
+@pytest.fixture(params=["json", "sqlite", "journal"])
+def backend(request, monkeypatch) -> str:
+    monkeypatch.setenv(storage.BACKEND_ENV, request.param)
+    return request.param
+
+
+@pytest.fixture
+def fake_client(monkeypatch) -> FakeClient:
+    client = FakeClient()
+    monkeypatch.setattr(agents, "_get_client", lambda: client)
+    return client
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from lifedesk import agents, cli, notes, tasks, vectors
+
+
+def _fill_notes():
+    notes.add_note("Heaps", "A binary heap keeps the smallest item on top.", tags=["cs"])
+    notes.add_note("Plato", "Book 10: the soul is immortal.", tags=["philosophy"])
+
+
+def test_stream_yields_pieces_and_caches_answer(data_dir, fake_client):
+    _fill_notes()
+    pieces = list(agents.stream_answer_question_about_notes("binary heap?"))
+    assert pieces == ["answer", " 1 "]
+    assert fake_client.requests[-1]["stream"] is True
+    assert "first_token_seconds" in agents.last_metrics
+
+    # The streamed answer is cached and matches the non-streaming one.
+    assert agents.agent_answer_question_about_notes("binary heap?") == "answer 1"
+    assert list(agents.stream_answer_question_about_notes("binary heap?")) == ["answer 1"]
+    assert fake_client.calls == 1
+
+
+def test_local_answers_stream_line_by_line(data_dir):
+    tasks.add_task("Exam", priority="high", due_date="2025-11-25")
+    pieces = list(agents.stream_suggest_next_tasks(use_cache=False))
+    assert len(pieces) > 1
+    assert agents.last_metrics == {}
+    assert "".join(pieces) == agents.agent_suggest_next_tasks(use_cache=False)
+
+
+def test_cli_stream_reports_timings(data_dir, fake_client, capsys):
+    _fill_notes()
+    cli.main(["chat", "notes", "--question", "binary heap?", "--stream", "--metrics"])
+    out, err = capsys.readouterr()
+    assert out == "answer 1 \n"
+    assert "[stream] first token:" in err
+    assert "[metrics] model first token:" in err
+
+
+# ---------------------------
+# Stand-in chat completions server
+# ---------------------------
+
+class _ChatHandler(BaseHTTPRequestHandler):
+    """Answers POST /v1/chat/completions like the OpenAI API does with stream=True."""
+
+    pieces = ["Heaps", " keep", " the", " smallest", " item", " on", " top."]
+    delay = 0.05
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length))
+        self.server.requests.append(body)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for i, piece in enumerate([""] + self.pieces):
+            chunk = {
+                "id": "chatcmpl-test",
+                "object": "chat.completion.chunk",
+                "created": 0,
+                "model": body["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "delta": {"role": "assistant", "content": piece} if i == 0 else {"content": piece},
+                        "finish_reason": None,
+                    }
+                ],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            time.sleep(self.delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def chat_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ChatHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_semantic_without_numpy_is_a_usage_error(data_dir, monkeypatch, capsys):
+    notes.add_note("Heaps", "A heap is a tree.")
+    monkeypatch.setattr(vectors, "_get_numpy", lambda: None)
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main(["chat", "notes", "--question", "heap?", "--semantic"])
+    assert exit_info.value.code == 2
+    assert "--semantic needs NumPy" in capsys.readouterr().err
+
+
+def test_stream_against_stand_in_server(data_dir, chat_server, monkeypatch):
+    openai = pytest.importorskip("openai")
+    host, port = chat_server.server_address
+    client = openai.OpenAI(base_url=f"http://{host}:{port}/v1", api_key="test")
+    monkeypatch.setattr(agents, "_get_client", lambda: client)
+    _fill_notes()
+
+    chunks = agents.stream_answer_question_about_notes("binary heap?", use_cache=False)
+    start = time.perf_counter()
+    first = next(chunks)
+    first_seconds = time.perf_counter() - start
+    rest = list(chunks)
+    total_seconds = time.perf_counter() - start
+
+    assert first == "Heaps"
+    assert "".join([first] + rest) == "".join(_ChatHandler.pieces)
+    assert chat_server.requests[0]["stream"] is True
+    # The first piece arrives long before the whole answer has been sent.
+    assert first_seconds < total_seconds / 2
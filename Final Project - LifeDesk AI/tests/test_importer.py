@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from lifedesk import cli, notes, storage, tasks
+from lifedesk.importer import import_notes, import_tasks, read_records
+
+
+def test_import_tasks_jsonl_in_one_write(backend, data_dir, tmp_path):
+    tasks.add_task("Existing")
+    source = tmp_path / "tasks.jsonl"
+    source.write_text(
+        "\n".join(
+            [
+                json.dumps({"title": "Read", "priority": "high", "tags": ["school"]}),
+                json.dumps({"title": "", "priority": "low"}),
+                "{not json",
+                json.dumps({"title": "Write", "due_date": "2025-11-30", "status": "done"}),
+                json.dumps({"title": "Bad", "priority": "urgent"}),
+            ]
+        )
+        + "\n"
+    )
+
+    report = import_tasks(source)
+    assert report["imported"] == 2
+    assert report["failed"] == 3
+    assert (report["first_id"], report["last_id"]) == (2, 3)
+
+    stored = tasks.list_tasks()
+    assert [t["title"] for t in stored] == ["Existing", "Read", "Write"]
+    assert stored[2]["status"] == "done"
+    assert stored[2]["due_ordinal"] is not None
+
+    errors = [json.loads(line) for line in open(report["error_file"])]
+    assert [e["line"] for e in errors] == [2, 3, 5]
+    assert "title is required" in errors[0]["error"]
+
+
+def test_import_notes_csv_updates_index(backend, tmp_path):
+    source = tmp_path / "notes.csv"
+    source.write_text(
+        "title,body,tags\n"
+        "Heaps,A heap is a tree,\"cs,exam\"\n"
+        "Missing body,,\n"
+    )
+
+    report = import_notes(source)
+    assert (report["imported"], report["failed"]) == (1, 1)
+    assert notes.list_notes()[0]["tags"] == ["cs", "exam"]
+    assert [n["id"] for n in notes.search_notes("heap")] == [1]
+
+
+def test_json_import_saves_state_once(data_dir, tmp_path, monkeypatch):
+    source = tmp_path / "tasks.jsonl"
+    source.write_text("".join(json.dumps({"title": f"T{i}"}) + "\n" for i in range(50)))
+    writes = []
+    real_save = storage.save_state
+    monkeypatch.setattr(storage, "save_state", lambda s: (writes.append(1), real_save(s)))
+
+    assert import_tasks(source)["imported"] == 50
+    assert len(writes) == 1
+
+
+def test_cli_import_reports_throughput(tmp_path, capsys):
+    source = tmp_path / "tasks.jsonl"
+    source.write_text(json.dumps({"title": "From CLI"}) + "\n")
+
+    cli.main(["tasks", "import", str(source)])
+    out = capsys.readouterr().out
+    assert "Imported 1 tasks" in out
+    assert "records/s" in out
+
+
+def test_import_json_array_and_json_lines(tmp_path):
+    source = tmp_path / "tasks.json"
+    source.write_text(json.dumps([{"title": "One"}, {"title": ""}, {"title": "Two"}], indent=2))
+    report = import_tasks(source)
+    assert (report["imported"], report["failed"]) == (2, 1)
+    assert [json.loads(line)["line"] for line in open(report["error_file"])] == [2]
+
+    # A .json file with one object per line is still read as JSONL.
+    lines = tmp_path / "more.json"
+    lines.write_text(json.dumps({"title": "Three"}) + "\n")
+    assert import_tasks(lines)["imported"] == 1
+    assert [t["title"] for t in tasks.list_tasks()] == ["One", "Two", "Three"]
+
+
+def test_import_json_array_keeps_items_before_a_syntax_error(tmp_path):
+    source = tmp_path / "tasks.json"
+    source.write_text('[{"title": "Good"}, {"title": oops}, {"title": "Lost"}]')
+    report = import_tasks(source)
+    assert (report["imported"], report["failed"]) == (1, 1)
+    assert json.loads(open(report["error_file"]).readline())["line"] == 2
+
+
+def test_unknown_format_is_rejected_before_reading(tmp_path, capsys):
+    source = tmp_path / "tasks.xml"
+    source.write_text("<tasks/>")
+    with pytest.raises(ValueError, match="Unknown import format"):
+        read_records(source)  # raised by the call, not on first iteration
+
+    with pytest.raises(SystemExit):
+        cli.main(["tasks", "import", str(source)])
+    assert "Unknown import format 'xml'" in capsys.readouterr().err
+    with pytest.raises(SystemExit):
+        cli.main(["notes", "import", str(tmp_path / "missing.csv")])
+    assert "No such file" in capsys.readouterr().err
+    assert tasks.list_tasks() == [] and notes.list_notes() == []
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from lifedesk import index, notes, passages, storage
+from lifedesk.index import NoteIndex, get_index, tokenize
+from lifedesk.passages import PassageIndex
+
+
+def _ids(results):
+    return [n["id"] for n in results]
+
+
+def test_tokenize_splits_on_punctuation():
+    assert tokenize("Heap-sort, O(n log n)!") == ["heap", "sort", "o", "n", "log", "n"]
+
+
+def test_search_uses_postings_and_keeps_substring_semantics(backend):
+    notes.add_note("Heaps", "A binary heap is a tree.", tags=["cs", "data-structures"])
+    notes.add_note("Plato", "Book 10: the soul is immortal.", tags=["philosophy"])
+    notes.add_note("Python", "List comprehensions", tags=[])
+
+    assert _ids(notes.search_notes("heap")) == [1]
+    assert _ids(notes.search_notes("YTHO")) == [3]          # substring of a term
+    assert _ids(notes.search_notes("book 10")) == [2]       # spans two terms
+    assert _ids(notes.search_notes("data-struct")) == [1]   # tag substring
+    assert _ids(notes.search_notes("losoph")) == [2]
+    assert _ids(notes.search_notes("nothing")) == []
+    assert _ids(notes.search_notes("")) == [1, 2, 3]
+
+
+def test_add_note_updates_index_incrementally(data_dir):
+    notes.add_note("Graphs", "BFS and DFS")
+    index = get_index()
+    assert index.doc_count() == 1
+    assert index.candidates("bfs") == {1}
+    assert index.candidates("dfs and bfs") == {1}
+
+
+def test_stale_index_is_rebuilt_on_search(data_dir):
+    notes.add_note("Graphs", "BFS and DFS")
+    storage.get_backend().insert_note({"title": "Trees", "body": "AVL", "tags": []})
+
+    assert _ids(notes.search_notes("avl")) == [2]
+    assert get_index().doc_count() == 2
+
+
+def test_rebuild_index_from_scratch(data_dir):
+    notes.add_note("Graphs", "BFS and DFS")
+    notes.add_note("Trees", "AVL")
+    get_index().rebuild([])
+    assert notes.rebuild_index() == 2
+    assert get_index().candidates("avl") == {2}
+
+
+def test_batched_adds_match_one_note_at_a_time(tmp_path, monkeypatch):
+    batch = [
+        {"id": i, "title": f"Week {i % 3}", "body": f"heap sort {'tree ' * i}", "tags": ["CS"]}
+        for i in range(1, 8)
+    ]
+    monkeypatch.setattr(index, "BATCH_NOTES", 3)
+    monkeypatch.setattr(passages, "BATCH_NOTES", 3)
+    bulk, single = NoteIndex(tmp_path / "bulk.db"), NoteIndex(tmp_path / "single.db")
+    bulk.add_notes(batch + batch[:2])  # already indexed notes are skipped
+    for note in batch:
+        single.add_notes([note])
+    bulk_passages = PassageIndex(tmp_path / "bulk_passages.db")
+    single_passages = PassageIndex(tmp_path / "single_passages.db")
+    assert bulk_passages.sync(batch) == len(batch)
+    for note in batch:
+        single_passages.sync([note])
+
+    for built, expected in ((bulk, single), (bulk_passages, single_passages)):
+        assert built.stats() == expected.stats()
+        for term in ("week", "1", "heap", "tree"):
+            assert built.document_frequency(term) == expected.document_frequency(term)
+            assert sorted(built.term_postings(term)) == sorted(expected.term_postings(term))
+        assert built.tagged_with("cs") == expected.tagged_with("cs")
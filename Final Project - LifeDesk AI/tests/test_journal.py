@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import json
+import multiprocessing
+
+from lifedesk import journal, notes, storage, tasks
+from lifedesk.journal import COMPACT_THRESHOLD_ENV, LOG_FILE_NAME, JournalBackend, compact
+
+
+def _log_lines(data_dir):
+    path = data_dir / LOG_FILE_NAME
+    return path.read_text().splitlines() if path.exists() else []
+
+
+def test_mutations_append_one_record_each(data_dir, monkeypatch):
+    monkeypatch.setenv(storage.BACKEND_ENV, "journal")
+    tasks.add_task("First")
+    tasks.complete_task(1)
+    notes.add_note("Heaps", "tree")
+
+    records = [json.loads(line) for line in _log_lines(data_dir)]
+    assert [r["op"] for r in records] == ["add_task", "set_task_status", "add_note"]
+    assert not storage.STATE_FILE.exists()
+
+
+def test_replay_in_fresh_backend_and_compact(data_dir, monkeypatch):
+    monkeypatch.setenv(storage.BACKEND_ENV, "journal")
+    tasks.add_task("First")
+    tasks.add_task("Second")
+    tasks.complete_task(2)
+
+    fresh = JournalBackend(storage.STATE_FILE, data_dir / LOG_FILE_NAME)
+    assert [t["status"] for t in fresh.fetch_tasks()] == ["todo", "done"]
+
+    assert compact() == 3
+    assert _log_lines(data_dir) == []
+    snapshot = json.loads(storage.STATE_FILE.read_text())
+    assert snapshot["next_task_id"] == 3
+    assert tasks.add_task("Third")["id"] == 3
+
+
+def test_replay_is_idempotent_after_interrupted_compaction(data_dir, monkeypatch):
+    monkeypatch.setenv(storage.BACKEND_ENV, "journal")
+    tasks.add_task("Only")
+    log_copy = (data_dir / LOG_FILE_NAME).read_text()
+    compact()
+    # Simulate a crash between writing the snapshot and truncating the log.
+    (data_dir / LOG_FILE_NAME).write_text(log_copy)
+
+    fresh = JournalBackend(storage.STATE_FILE, data_dir / LOG_FILE_NAME)
+    assert len(fresh.fetch_tasks()) == 1
+
+
+def test_automatic_compaction_threshold(data_dir, monkeypatch):
+    monkeypatch.setenv(storage.BACKEND_ENV, "journal")
+    monkeypatch.setenv(COMPACT_THRESHOLD_ENV, "3")
+    started = []
+
+    def compact_now(snapshot_path, log_path):
+        started.append(len(_log_lines(data_dir)))
+        JournalBackend(snapshot_path, log_path).compact()
+
+    monkeypatch.setattr(journal, "start_background_compaction", compact_now)
+    for i in range(4):
+        tasks.add_task(f"Task {i}")
+
+    assert started == [3]  # once, after the write that reached the threshold
+    assert len(_log_lines(data_dir)) == 1
+    assert len(json.loads(storage.STATE_FILE.read_text())["tasks"]) == 3
+    assert len(tasks.list_tasks()) == 4
+
+
+def test_writes_do_not_load_the_snapshot(data_dir, monkeypatch):
+    monkeypatch.setenv(storage.BACKEND_ENV, "journal")
+    tasks.add_task("First")
+    tasks.add_task("Second")
+    compact()
+
+    fresh = JournalBackend(storage.STATE_FILE, data_dir / LOG_FILE_NAME)
+    assert fresh.insert_task(tasks.task_fields("Third"))["id"] == 3
+    assert fresh.set_task_status(2, "done")["title"] == "Second"
+    assert fresh.set_task_status(3, "done")["title"] == "Third"
+    assert fresh.set_task_status(9, "done") is None
+    assert fresh._state is None  # ids and version came from the counters file
+
+    assert [t["status"] for t in tasks.list_tasks()] == ["todo", "done", "done"]
+    assert storage.state_version() == 5
+
+
+def test_compaction_runs_in_a_separate_process(data_dir, monkeypatch):
+    monkeypatch.setenv(storage.BACKEND_ENV, "journal")
+    monkeypatch.setenv(COMPACT_THRESHOLD_ENV, "2")
+    tasks.add_task("First")
+    tasks.add_task("Second")
+    assert journal._compactors
+    for process in journal._compactors:
+        assert process.wait(timeout=30) == 0
+
+    assert _log_lines(data_dir) == []
+    assert [t["title"] for t in json.loads(storage.STATE_FILE.read_text())["tasks"]] == [
+        "First",
+        "Second",
+    ]
+
+
+def test_replay_keeps_entries_with_duplicate_ids(data_dir):
+    # Two writers that did not share the lock both used id 1.
+    records = [
+        {"op": "add_task", "task": {"id": 1, "title": "Mine", "status": "todo"}, "version": 1},
+        {"op": "add_task", "task": {"id": 1, "title": "Theirs", "status": "todo"}, "version": 2},
+    ]
+    data_dir.mkdir()
+    (data_dir / LOG_FILE_NAME).write_text("".join(json.dumps(r) + "\n" for r in records))
+
+    state = JournalBackend(storage.STATE_FILE, data_dir / LOG_FILE_NAME).state()
+    assert [(t["id"], t["title"]) for t in state["tasks"]] == [(1, "Mine"), (2, "Theirs")]
+    assert state["next_task_id"] == 3
+
+
+def _add_many(data_dir: str, worker: int, count: int) -> None:
+    from pathlib import Path
+
+    storage.DATA_DIR = Path(data_dir)
+    storage.STATE_FILE = storage.DATA_DIR / "lifedesk_state.json"
+    for i in range(count):
+        tasks.add_task(f"worker {worker} task {i}")
+
+
+def test_compaction_during_parallel_writes_loses_nothing(data_dir, monkeypatch):
+    monkeypatch.setenv(storage.BACKEND_ENV, "journal")
+    monkeypatch.setenv(COMPACT_THRESHOLD_ENV, "1000000")
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(target=_add_many, args=(str(data_dir), worker, 25))
+        for worker in range(3)
+    ]
+    for process in workers:
+        process.start()
+    while any(process.is_alive() for process in workers):
+        compact()
+    for process in workers:
+        process.join()
+        assert process.exitcode == 0
+    compact()
+
+    fresh = JournalBackend(storage.STATE_FILE, data_dir / LOG_FILE_NAME)
+    assert sorted(t["id"] for t in fresh.fetch_tasks()) == list(range(1, 76))
+    assert len({t["title"] for t in fresh.fetch_tasks()}) == 75
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import datetime as dt
+
+import pytest
+
+from lifedesk import agents, notes, storage, tasks
+from lifedesk.memo import MemoStore, get_memo, memo_key
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        self.now += 1
+        return self.now
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = MemoStore(tmp_path / "memo.db", max_entries=3, clock=Clock())
+    yield s
+    s.close()
+
+
+def test_every_mutation_bumps_state_version(backend):
+    seen = [storage.state_version()]
+    tasks.add_task("Exam")
+    seen.append(storage.state_version())
+    tasks.add_tasks([tasks.task_fields("A"), tasks.task_fields("B")])
+    seen.append(storage.state_version())
+    tasks.complete_task(1)
+    seen.append(storage.state_version())
+    notes.add_note("Heaps", "A binary heap.")
+    seen.append(storage.state_version())
+    notes.add_notes([{"title": "Trees", "body": "AVL", "tags": []}])
+    seen.append(storage.state_version())
+    assert seen == sorted(set(seen)) and seen[0] == 0
+
+    # Reads and failed updates leave it alone.
+    tasks.list_tasks()
+    notes.search_notes("heap")
+    tasks.complete_task(99)
+    assert storage.state_version() == seen[-1]
+
+
+def test_version_survives_a_fresh_process(backend):
+    tasks.add_task("Exam")
+    notes.add_note("Heaps", "A binary heap.")
+    version = storage.state_version()
+    storage.clear_cache()
+    storage._backends.clear()
+    assert storage.state_version() == version
+
+
+def test_json_version_is_read_without_parsing_everything(data_dir):
+    notes.add_notes([{"title": f"n{i}", "body": "x" * 100, "tags": []} for i in range(100)])
+    assert storage.read_json_value(storage.STATE_FILE, "version", 0, chunk_size=64) == 1
+    assert storage.read_json_value(storage.STATE_FILE, "next_note_id", chunk_size=64) == 101
+    assert storage.read_json_value(storage.STATE_FILE, "missing", "dflt", chunk_size=64) == "dflt"
+
+
+def test_memo_hit_requires_same_version_and_day(store):
+    store.put("k", 3, "2025-11-20", "answer")
+    assert store.get("k", 3, "2025-11-20") == "answer"
+    assert store.get("k", 4, "2025-11-20") is None
+    assert store.get("k", 3, "2025-11-21") is None
+    assert store.stats() == {"entries": 1, "hits": 1, "misses": 2}
+
+
+def test_put_invalidates_older_versions_and_days(store):
+    store.put("a", 1, "2025-11-20", "old version")
+    store.put("b", 2, "2025-11-19", "old day")
+    store.put("c", 2, "2025-11-20", "current")
+    assert store.stats()["entries"] == 1
+    assert store.get("c", 2, "2025-11-20") == "current"
+
+
+def test_least_recently_used_results_are_evicted(store):
+    for key in "abc":
+        store.put(key, 1, "2025-11-20", key)
+    assert store.get("a", 1, "2025-11-20") == "a"  # a is now the most recent
+    store.put("d", 1, "2025-11-20", "d")
+    assert store.stats()["entries"] == 3
+    assert store.get("b", 1, "2025-11-20") is None
+    assert [store.get(k, 1, "2025-11-20") for k in "acd"] == ["a", "c", "d"]
+
+
+def test_clear(store):
+    store.put("a", 1, "2025-11-20", "a")
+    assert store.clear() == 1
+    assert store.get("a", 1, "2025-11-20") is None
+
+
+def test_memo_key_depends_on_every_part():
+    assert memo_key("notes", "local", "q", 8) == memo_key("notes", "local", "q", 8)
+    assert memo_key("notes", "local", "q", 8) != memo_key("notes", "local", "q", 9)
+    assert memo_key("notes", "local", "q") != memo_key("notes", "gpt", "q")
+
+
+def test_repeat_agent_calls_are_lookups(backend, fake_client):
+    tasks.add_task("Exam", priority="high")
+    first = agents.agent_suggest_next_tasks()
+    assert agents.agent_suggest_next_tasks() == first
+    assert agents.last_metrics == {"memo": "hit"}
+    assert fake_client.calls == 1
+
+    # Bypassing the cache also bypasses the memo.
+    agents.agent_suggest_next_tasks(use_cache=False)
+    assert fake_client.calls == 2
+
+    tasks.add_task("Essay")
+    agents.agent_suggest_next_tasks()
+    assert fake_client.calls == 3
+    assert get_memo().stats()["entries"] == 1
+
+
+def test_local_memo_expires_with_the_day(data_dir, monkeypatch):
+    tasks.add_task("Exam", priority="high", due_date="2025-11-25")
+    calls = []
+    original = agents._local_suggest_next_tasks
+    monkeypatch.setattr(
+        agents, "_local_suggest_next_tasks", lambda: calls.append(1) or original()
+    )
+
+    class Today(dt.date):
+        value = dt.date(2025, 11, 20)
+
+        @classmethod
+        def today(cls):
+            return cls.value
+
+    monkeypatch.setattr(agents, "date", Today)
+    agents.agent_suggest_next_tasks()
+    agents.agent_suggest_next_tasks()
+    assert len(calls) == 1
+    Today.value = dt.date(2025, 11, 21)
+    agents.agent_suggest_next_tasks()
+    assert len(calls) == 2
+
+
+def test_notes_answers_memoized_per_question(data_dir, fake_client):
+    notes.add_note("Heaps", "A binary heap keeps the smallest key at the root.")
+    agents.agent_answer_question_about_notes("binary heap?")
+    agents.agent_answer_question_about_notes("binary heap?")
+    assert list(agents.stream_answer_question_about_notes("binary heap?")) == ["answer 1"]
+    assert fake_client.calls == 1
+
+    agents.agent_answer_question_about_notes("binary heap?", top_k=2)
+    agents.agent_answer_question_about_notes("root?")
+    # A new top_k is a new memo entry (its prompt is identical, so the
+    # response cache still answers it); a new question reaches the model.
+    assert get_memo().stats()["entries"] == 3
+    assert fake_client.calls == 2
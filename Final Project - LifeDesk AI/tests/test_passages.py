@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from lifedesk import agents, notes, storage
+from lifedesk.passages import MAX_CHUNK_CHARS, chunk_offsets, get_passage_index
+from lifedesk.ranking import rank_passages
+
+LONG_BODY = "\n\n".join(
+    [
+        "Week 1: introduction to the course and its grading policy.",
+        "Week 2: arrays, linked lists and amortized analysis.",
+        "Week 3: Dijkstra's algorithm finds shortest paths with a priority queue.",
+        "Week 4: review session before the midterm.",
+    ]
+)
+
+
+def _pieces(body):
+    return [body[s:e] for s, e in chunk_offsets(body)]
+
+
+def test_chunk_offsets_split_paragraphs():
+    body = "  First para\nstill first.\n\n\n  Second para.  \n \nThird."
+    assert _pieces(body) == ["First para\nstill first.", "Second para.", "Third."]
+    assert chunk_offsets("") == [(0, 0)]
+
+
+def test_long_paragraphs_are_cut_at_spaces():
+    body = "word " * 500
+    pieces = _pieces(body)
+    assert len(pieces) > 1
+    assert all(0 < len(p) <= MAX_CHUNK_CHARS and not p.startswith(" ") for p in pieces)
+    assert " ".join(pieces).split() == body.split()
+
+
+def test_offsets_are_stored_per_note(data_dir):
+    note = notes.add_note("CSC 300", LONG_BODY)
+    assert get_passage_index().chunks_of(note["id"]) == chunk_offsets(LONG_BODY)
+
+
+def test_best_passage_is_returned(backend):
+    notes.add_note("CSC 300", LONG_BODY, tags=["school"])
+    notes.add_note("Groceries", "Buy milk and eggs.")
+
+    score, note_id, start, end = rank_passages("shortest path algorithm", k=1)[0]
+    assert note_id == 1
+    assert LONG_BODY[start:end].startswith("Week 3: Dijkstra")
+
+    answer = agents._local_answer_question_about_notes("shortest path algorithm")
+    assert "Week 3: Dijkstra's algorithm" in answer
+    assert "Week 1" not in answer
+
+
+def test_unseen_notes_are_chunked_on_query(data_dir):
+    notes.add_note("Groceries", "Buy milk and eggs.")
+    storage.get_backend().insert_note({"title": "CSC 300", "body": LONG_BODY, "tags": []})
+    assert rank_passages("midterm review", k=1)[0][1] == 2
+
+
+def test_only_changed_notes_are_rechunked(data_dir):
+    notes.add_note("CSC 300", LONG_BODY)
+    notes.add_note("Groceries", "Buy milk and eggs.")
+    assert notes.sync_passages() == 0
+
+    state = storage.load_state()
+    state["notes"][1]["body"] = "Buy bread.\n\nPick up the parcel."
+    storage.save_state(state)
+
+    assert notes.sync_passages() == 1
+    index = get_passage_index()
+    assert len(index.chunks_of(2)) == 2
+    assert index.stats()["doc_count"] == len(chunk_offsets(LONG_BODY)) + 2
+    assert index.document_frequency("milk") == 0
+    assert rank_passages("parcel", k=1)[0][1] == 2
+    assert rank_passages("milk", k=1) == []
+
+
+def test_tag_only_edit_is_resynced(data_dir):
+    notes.add_note("CSC 300", LONG_BODY, ["school"])
+    index = get_passage_index()
+    assert index.tagged_with("school")
+
+    state = storage.load_state()
+    state["notes"][0]["tags"] = ["exams"]
+    storage.save_state(state)
+
+    assert notes.sync_passages() == 1
+    assert index.tagged_with("school") == set()
+    assert len(index.tagged_with("exams")) == len(chunk_offsets(LONG_BODY))
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import json
+
+from lifedesk import agents, cli, notes, tasks
+from lifedesk.prompts import (
+    TASK_NOTE_CHARS,
+    TASKS_SCHEMA,
+    encode_tasks,
+    estimate_tokens,
+    select_notes_for_prompt,
+    task_prompt_report,
+)
+
+
+def _fill_notes():
+    notes.add_note("Heaps", "A binary heap keeps the smallest key at the root.", tags=["cs"])
+    notes.add_note("Plato", "Book 10 argues the soul is immortal.", tags=["philosophy"])
+    for i in range(30):
+        notes.add_note(f"Filler {i}", "Unrelated words about gardening. " * 20)
+
+
+def test_selects_relevant_notes_first(data_dir):
+    _fill_notes()
+    selected, lines = select_notes_for_prompt("what is a binary heap?", 1000, 5)
+    assert selected[0]["title"] == "Heaps"
+    assert all("gardening" not in line for line in lines)
+
+
+def test_respects_token_budget_and_truncates(data_dir):
+    notes.add_note("Long", "heap " * 2000)
+    selected, lines = select_notes_for_prompt("heap", 100, 5)
+    assert len(selected) == 1
+    assert lines[0].endswith('[truncated]"}')
+    assert estimate_tokens(lines[0]) <= 110
+
+
+def test_truncation_measures_the_escaped_line(data_dir):
+    notes.add_note("Quotes", 'say "heap"\n\n' * 40)
+    selected, lines = select_notes_for_prompt("heap", 100, 5)
+    assert len(selected) == 1
+    assert lines[0].endswith('[truncated]"}')
+    assert 99 <= estimate_tokens(lines[0]) <= 100
+    assert json.loads(lines[0])["body"].startswith('say "heap"\n')
+
+
+def test_falls_back_to_newest_notes(data_dir):
+    _fill_notes()
+    selected, _ = select_notes_for_prompt("zzz qqq", 10000, 3)
+    assert [n["title"] for n in selected] == ["Filler 29", "Filler 28", "Filler 27"]
+
+
+def test_model_prompt_only_contains_retrieved_notes(data_dir, fake_client):
+    _fill_notes()
+    agents.agent_answer_question_about_notes("binary heap root?", max_tokens=500)
+    small = fake_client.requests[-1]["messages"][1]["content"]
+    assert "Heaps" in small and "Filler 5" not in small
+
+    agents.agent_answer_question_about_notes("binary heap root?", full_context=True)
+    full = fake_client.requests[-1]["messages"][1]["content"]
+    assert "Filler 5" in full
+    assert len(small) * 10 < len(full)
+
+
+def test_chat_metrics_report_prompt_sizes(data_dir, fake_client, capsys):
+    _fill_notes()
+    cli.main(["chat", "notes", "--question", "binary heap?", "--metrics"])
+    err = capsys.readouterr().err
+    assert "[metrics] end-to-end:" in err
+    assert "[metrics] prompt:" in err
+    assert "full-corpus prompt would be:" in err
+
+
+def _fill_tasks():
+    tasks.add_task("Study heaps", priority="high", due_date="2025-11-25", tags=["cs", "exam"],
+                   notes="Read chapter 6 | do the exercises\n" + "and then review everything " * 10)
+    tasks.add_task("Buy milk", priority="low")
+    tasks.add_task("Old essay", priority="medium")
+    tasks.complete_task(3)
+
+
+def test_encode_tasks_is_compact_table(data_dir):
+    _fill_tasks()
+    table = encode_tasks(tasks.list_tasks())
+    lines = table.splitlines()
+    assert lines[0].startswith(f"schema {TASKS_SCHEMA}:")
+    assert lines[1] == "id|title|priority|due|tags|notes"
+    assert lines[2].startswith("1|Study heaps|high|2025-11-25|cs,exam|Read chapter 6 / do the exercises and")
+    assert lines[2].endswith("...")
+    assert len(lines[2].split("|")[-1]) <= TASK_NOTE_CHARS
+    assert lines[3] == "2|Buy milk|low|||"
+    assert "Old essay" not in table
+
+
+def test_encode_tasks_drops_empty_columns(data_dir):
+    tasks.add_task("Buy milk", priority="low")
+    assert encode_tasks(tasks.list_tasks()).splitlines()[1:] == ["id|title|priority", "1|Buy milk|low"]
+
+
+def test_task_prompt_report_and_model_prompt(data_dir, fake_client):
+    _fill_tasks()
+    report = task_prompt_report(tasks.list_tasks())
+    assert report["tasks"] == 3 and report["open_tasks"] == 2
+    assert report["compact_chars"] * 2 < report["json_chars"]
+
+    agents.agent_suggest_next_tasks()
+    prompt = fake_client.requests[-1]["messages"][1]["content"]
+    assert TASKS_SCHEMA in prompt
+    assert len(prompt) == report["compact_chars"]
+
+
+def test_no_model_call_when_every_task_is_done(data_dir, fake_client):
+    tasks.add_task("Old essay")
+    tasks.complete_task(1)
+    assert "no TODO tasks" in agents.agent_suggest_next_tasks()
+    assert fake_client.calls == 0
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from lifedesk import agents, notes
+from lifedesk.index import get_index
+from lifedesk.ranking import bm25_rank, question_terms
+
+
+def test_question_terms_drop_stopwords_and_short_words():
+    assert question_terms("What should I study for Plato's Republic?") == [
+        "study", "plato", "republic",
+    ]
+
+
+def test_stats_update_when_notes_are_added(data_dir):
+    notes.add_note("Heaps", "heap heap tree")
+    notes.add_note("Graphs", "bfs")
+    index = get_index()
+    assert index.stats() == {"doc_count": 2, "total_length": 6}
+    assert index.document_frequency("heap") == 1
+    assert index.term_postings("heap") == [(1, 2, 4)]
+
+
+def test_bm25_prefers_precise_note_over_long_note(data_dir):
+    filler = " ".join(f"word{i}" for i in range(300))
+    notes.add_note("Misc", f"heap {filler} heap {filler} heap")
+    notes.add_note("Heaps", "A heap is a complete binary tree.")
+    notes.add_note("Plato", "The soul is immortal.")
+
+    ranked = bm25_rank(get_index(), question_terms("explain a binary heap"), k=3)
+    assert [note_id for _, note_id in ranked] == [2, 1]
+
+
+def test_rare_term_outranks_repeated_common_term(data_dir):
+    notes.add_notes(
+        [{"title": f"Week {i}", "body": "study schedule", "tags": []} for i in range(20)]
+    )
+    notes.add_note("Cramming", "study study study study study study")
+    notes.add_note("Graphs", "dijkstra finds shortest paths, then study it")
+
+    ranked = bm25_rank(get_index(), question_terms("study dijkstra"), k=3)
+    assert [note_id for _, note_id in ranked][:2] == [22, 21]
+
+
+def test_tags_boost_ranking(data_dir):
+    notes.add_note("Chapter 1", "Some reading.", tags=["exam"])
+    notes.add_note("Chapter 2", "Exam reading.")
+
+    ranked = bm25_rank(get_index(), ["exam"], k=3)
+    assert ranked[0][1] == 1
+
+
+def test_local_answer_lists_best_notes(data_dir):
+    notes.add_note("Heaps", "A heap is a complete binary tree.", tags=["cs"])
+    notes.add_note("Plato", "The soul is immortal.", tags=["philosophy"])
+
+    answer = agents._local_answer_question_about_notes("What is a heap?")
+    assert "[1] Heaps" in answer
+    assert "Plato" not in answer
+
+    missing = agents._local_answer_question_about_notes("quantum chromodynamics")
+    assert "could not find anything" in missing
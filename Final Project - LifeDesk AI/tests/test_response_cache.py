@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from lifedesk import agents, cli
+from lifedesk.response_cache import ResponseCache, get_cache, make_key
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_key_depends_on_model_and_prompts():
+    base = make_key("m", "sys", "user")
+    assert base == make_key("m", "sys", "user")
+    assert len({base, make_key("m2", "sys", "user"), make_key("m", "sys", "user2")}) == 3
+
+
+def test_ttl_expiry(tmp_path):
+    clock = Clock()
+    cache = ResponseCache(tmp_path / "c.db", ttl=60, clock=clock)
+    cache.put("k", "v")
+    clock.now += 59
+    assert cache.get("k") == "v"
+    clock.now += 2
+    assert cache.get("k") is None
+    assert cache.stats() == {"entries": 0, "hits": 1, "misses": 1}
+
+
+def test_lru_eviction(tmp_path):
+    clock = Clock()
+    cache = ResponseCache(tmp_path / "c.db", max_entries=2, clock=clock)
+    cache.put("a", "1")
+    clock.now += 1
+    cache.put("b", "2")
+    clock.now += 1
+    assert cache.get("a") == "1"  # a is now more recent than b
+    clock.now += 1
+    cache.put("c", "3")
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("1", "3")
+
+
+def test_call_openai_reuses_cached_answer(fake_client):
+    fake = fake_client
+
+    assert agents._call_openai("sys", "question") == "answer 1"
+    assert agents._call_openai("sys", "question") == "answer 1"
+    assert agents._call_openai("sys", "other") == "answer 2"
+    assert agents._call_openai("sys", "question", use_cache=False) == "answer 3"
+    assert fake.calls == 3
+    assert get_cache().stats()["hits"] == 1
+
+
+def test_cache_cli(data_dir, capsys):
+    get_cache().put("k", "v")
+    cli.main(["cache", "stats"])
+    assert "entries=1" in capsys.readouterr().out
+    cli.main(["cache", "clear"])
+    assert "Removed 1" in capsys.readouterr().out
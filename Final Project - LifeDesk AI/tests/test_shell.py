@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import io
+import json
+import os
+
+from lifedesk import cli, storage
+from lifedesk.shell import run_shell
+
+
+class ScriptedInput(io.StringIO):
+    """stdin stand-in that can run a callback before handing out a given line."""
+
+    def __init__(self, lines, before=None) -> None:
+        super().__init__()
+        self.lines = list(lines)
+        self.before = before or {}
+
+    def readline(self, *args) -> str:
+        if not self.lines:
+            return ""
+        line = self.lines.pop(0)
+        if line in self.before:
+            self.before.pop(line)()
+        return line + "\n"
+
+
+def _run(lines, before=None):
+    run_shell(cli.build_parser(), ScriptedInput(lines, before))
+
+
+def test_shell_runs_commands_and_reports_latency(data_dir, capsys):
+    _run([
+        'tasks add "Study heaps" --priority high',
+        'notes add "Heaps" "A binary heap keeps the smallest item on top." --tags cs',
+        "tasks list",
+        "ask binary heap?",
+        "quit",
+        "tasks list",
+    ])
+    out, err = capsys.readouterr()
+    assert "Created task:" in out
+    assert "[1] Study heaps  (status=todo" in out
+    assert "[1] Heaps" in out
+    assert err.startswith("[shell] loaded in ")
+    # One latency line per command; nothing runs after quit.
+    assert err.count(" ms\n") == 5
+    assert "reloaded" not in err
+
+
+def test_shell_survives_bad_commands(data_dir, capsys):
+    _run(["tasks frobnicate", 'notes add "unterminated', "chat notes", "help", "tasks list"])
+    out, err = capsys.readouterr()
+    assert "invalid choice" in err
+    assert "error: No closing quotation" in err
+    assert "you must pass --question" in err
+    assert "ask <question>" in out
+    assert err.count("[shell]") == 5
+
+
+def test_shell_reloads_only_after_external_change(data_dir, capsys):
+    def external_write():
+        state = storage.empty_state()
+        state["tasks"] = [
+            {"id": 1, "title": "Written elsewhere", "status": "todo", "priority": "low",
+             "due_date": None, "tags": [], "notes": ""}
+        ]
+        state["next_task_id"] = 2
+        storage.STATE_FILE.write_text(json.dumps(state), encoding="utf-8")
+        stat = storage.STATE_FILE.stat()
+        os.utime(storage.STATE_FILE, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    _run(
+        ['tasks add "Local task"', "tasks list", "tasks list --status todo", "tasks list"],
+        before={"tasks list --status todo": external_write},
+    )
+    out, err = capsys.readouterr()
+    assert out.count("Local task") == 2  # the add, then the first list
+    assert out.count("Written elsewhere") == 2
+    assert err.count("reloaded state") == 1
+
+
+def test_warm_up_uses_the_backend_and_every_index(backend, monkeypatch):
+    from lifedesk import notes, passages, vectors
+    from lifedesk.shell import warm_up
+
+    storage.get_backend().insert_note({"title": "Heaps", "body": "A binary heap.", "tags": []})
+    loads = []
+    load_state = storage.load_state
+    monkeypatch.setattr(
+        storage, "load_state", lambda *a, **kw: loads.append(1) or load_state(*a, **kw)
+    )
+    warm_up()
+    if backend != "json":
+        assert loads == []  # the sqlite and journal backends never read the JSON state
+    assert passages.get_passage_index().last_note_id() == 1
+    if vectors.available():
+        assert vectors.get_vector_index().last_note_id() == 1
+    assert notes.current_index().doc_count() == 1
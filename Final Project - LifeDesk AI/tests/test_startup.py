@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+# Generous ceiling for importing the CLI and running `tasks list` in a fresh
+# interpreter; loading the openai stack alone usually costs more than this.
+STARTUP_BUDGET_SECONDS = 0.5
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+SCRIPT = """
+import json, sys, time
+from pathlib import Path
+start = time.perf_counter()
+from lifedesk import cli, storage
+storage.DATA_DIR = Path(sys.argv[1])
+storage.STATE_FILE = storage.DATA_DIR / "lifedesk_state.json"
+cli.main(["tasks", "list"])
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "elapsed": elapsed,
+    "loaded": sorted(m for m in ("openai", "httpx", "pydantic", "numpy", "lifedesk.agents")
+                     if m in sys.modules),
+}))
+"""
+
+
+def test_tasks_list_does_not_load_ai_backends(data_dir):
+    result = subprocess.run(
+        [sys.executable, "-c", SCRIPT, str(data_dir)],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    assert report["loaded"] == []
+    assert report["elapsed"] < STARTUP_BUDGET_SECONDS
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import json
+
+from lifedesk import notes, storage, tasks
+from lifedesk.sqlite_store import SqliteBackend, migrate_json_to_sqlite
+
+
+def test_tasks_round_trip(backend):
+    first = tasks.add_task("Read chapter", priority="high", tags=["school"])
+    second = tasks.add_task("Do laundry")
+
+    assert (first["id"], second["id"]) == (1, 2)
+    assert tasks.complete_task(first["id"])["status"] == "done"
+    assert tasks.complete_task(99) is None
+    assert [t["id"] for t in tasks.list_tasks(status="todo")] == [2]
+    assert [t["id"] for t in tasks.list_tasks(status="done")] == [1]
+    assert tasks.list_tasks()[0]["tags"] == ["school"]
+
+
+def test_notes_round_trip(backend):
+    notes.add_note("Heaps", "A heap is a tree", tags=["cs"])
+    notes.add_note("Plato", "The soul is immortal")
+
+    assert [n["title"] for n in notes.list_notes()] == ["Heaps", "Plato"]
+    assert [n["id"] for n in notes.search_notes("soul")] == [2]
+    assert [n["id"] for n in notes.search_notes("CS")] == [1]
+
+
+def test_sqlite_status_filter_uses_index(data_dir, monkeypatch):
+    monkeypatch.setenv(storage.BACKEND_ENV, "sqlite")
+    backend = storage.get_backend()
+    plan = backend.conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM tasks WHERE status = 'todo'"
+    ).fetchall()
+    assert "idx_tasks_status" in " ".join(str(row) for row in plan)
+
+
+def test_migrate_json_to_sqlite(data_dir):
+    tasks.add_task("Old task")
+    notes.add_note("Old note", "body")
+    state = json.loads(storage.STATE_FILE.read_text())
+    state["next_task_id"] = 10
+
+    source = data_dir / "export.json"
+    source.write_text(json.dumps(state))
+    counts = migrate_json_to_sqlite(source, data_dir / "lifedesk.db")
+    assert counts == {"tasks": 1, "notes": 1}
+
+    backend = SqliteBackend(data_dir / "lifedesk.db")
+    assert backend.fetch_tasks()[0]["title"] == "Old task"
+    assert backend.insert_task({"title": "New"})["id"] == 10
+    backend.close()
+
+
+def test_repeated_reads_hit_the_state_cache(data_dir):
+    tasks.add_task("Cached")
+    storage.clear_cache()
+
+    tasks.list_tasks()
+    tasks.list_tasks(status="todo")
+    notes.list_notes()
+    assert storage.cache_stats() == {"hits": 2, "misses": 1}
+
+
+def test_writes_and_external_edits_refresh_the_cache(data_dir):
+    tasks.add_task("First")
+    tasks.list_tasks()
+    tasks.complete_task(1)
+    assert tasks.list_tasks()[0]["status"] == "done"
+
+    state = json.loads(storage.STATE_FILE.read_text())
+    state["tasks"][0]["title"] = "Edited elsewhere"
+    storage.STATE_FILE.write_text(json.dumps(state))
+
+    misses = storage.cache_stats()["misses"]
+    assert tasks.list_tasks()[0]["title"] == "Edited elsewhere"
+    assert storage.cache_stats()["misses"] == misses + 1
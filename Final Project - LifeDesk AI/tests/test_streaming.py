@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import json
+from itertools import islice
+
+import pytest
+
+from lifedesk import cli, notes, storage, tasks
+from lifedesk.storage import iter_json_array
+
+STATE = {
+    "tasks": [
+        {"id": 1, "title": "Brace } in [title]", "tags": ["a", "b"], "n": 12345},
+        {"id": 2, "title": "Ünïcode \"quoted\"", "tags": [], "n": -0.5e3},
+    ],
+    "notes": [{"id": 7, "title": "Heaps", "body": "line1\nline2", "tags": []}],
+    "next_task_id": 3,
+    "next_note_id": 8,
+}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 64, 1 << 16])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_iter_json_array_matches_json_load(tmp_path, chunk_size, indent):
+    path = tmp_path / "state.json"
+    path.write_text(json.dumps(STATE, indent=indent), encoding="utf-8")
+
+    assert list(iter_json_array(path, "tasks", chunk_size)) == STATE["tasks"]
+    assert list(iter_json_array(path, "notes", chunk_size)) == STATE["notes"]
+    assert list(iter_json_array(path, "missing", chunk_size)) == []
+
+
+def test_iteration_stops_reading_early(tmp_path):
+    path = tmp_path / "state.json"
+    # Everything after the first task is garbage; it must never be parsed.
+    path.write_text('{"tasks": [{"id": 1}, ' + "x" * 10000)
+    assert list(islice(iter_json_array(path, "tasks", chunk_size=16), 1)) == [{"id": 1}]
+
+
+def test_large_item_is_read_in_growing_chunks(tmp_path):
+    path = tmp_path / "state.json"
+    big = {"id": 1, "body": "x" * 200_000}
+    path.write_text(json.dumps({"notes": [big, {"id": 2}]}))
+    reads = []
+
+    class CountingFile:
+        def __init__(self, f):
+            self.f = f
+
+        def read(self, size):
+            reads.append(size)
+            return self.f.read(size)
+
+    with path.open(encoding="utf-8") as f:
+        stream = storage._JsonStream(CountingFile(f), 16)
+        stream.take("{")
+        stream.value()
+        stream.take(":")
+        assert list(stream.array_items()) == [big, {"id": 2}]
+    # Doubling reads: a few dozen, not 200_000 / 16.
+    assert len(reads) < 40
+
+
+def test_iter_tasks_streams_from_disk(data_dir):
+    for i in range(5):
+        tasks.add_task(f"Task {i}")
+    tasks.complete_task(2)
+    storage.clear_cache()
+
+    assert [t["id"] for t in tasks.iter_tasks(status="done")] == [2]
+    # Streamed from disk: a cache miss, without parsing the whole file.
+    assert storage.cache_stats() == {"hits": 0, "misses": 1}
+
+    tasks.list_tasks()
+    assert [t["id"] for t in tasks.iter_tasks(status="done")] == [2]
+    assert storage.state_version() == 6
+    assert storage.cache_stats() == {"hits": 2, "misses": 2}
+
+
+def test_list_limit_and_offset(backend, capsys):
+    for i in range(1, 6):
+        tasks.add_task(f"Task {i}")
+        notes.add_note(f"Note {i}", "body")
+
+    cli.main(["tasks", "list", "--offset", "1", "--limit", "2"])
+    out = capsys.readouterr().out
+    assert "[2] Task 2" in out and "[3] Task 3" in out
+    assert "Task 1" not in out and "Task 4" not in out
+
+    cli.main(["notes", "list", "--limit", "1"])
+    out = capsys.readouterr().out
+    assert "Note 1" in out and "Note 2" not in out
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import os
+import random
+import time
+from datetime import date
+
+import pytest
+
+from lifedesk import agents, storage, tasks
+
+TODAY = date(2025, 11, 20)
+
+
+def test_add_task_stores_due_ordinal(backend):
+    t = tasks.add_task("Exam", due_date="2025-11-25")
+    assert t["due_ordinal"] == date(2025, 11, 25).toordinal()
+    assert tasks.list_tasks()[0]["due_ordinal"] == t["due_ordinal"]
+    assert tasks.add_task("Bad date", due_date="25/11/2025")["due_ordinal"] is None
+
+
+def test_score_task_uses_injected_today():
+    today = TODAY.toordinal()
+    overdue = {"priority": "low", "due_date": "2025-11-01"}
+    soon = {"priority": "low", "due_ordinal": today + 5}
+    assert agents._score_task(overdue, today) == 20
+    assert agents._score_task(soon, today) == 15
+    assert agents._score_task({"priority": "high", "due_date": "garbage"}, today) == 30
+
+
+def test_local_suggestions_are_deterministic(data_dir):
+    tasks.add_task("Later", priority="low", due_date="2025-12-30")
+    tasks.add_task("Overdue", priority="low", due_date="2025-11-10")
+    tasks.add_task("Urgent", priority="high", due_date="2025-11-21")
+    tasks.add_task("Done", priority="high")
+    tasks.complete_task(4)
+
+    text = agents._local_suggest_next_tasks(today=TODAY)
+    lines = [line for line in text.splitlines() if line.startswith("- ")]
+    assert [line.split("]")[0] for line in lines] == ["- [#3", "- [#2", "- [#1"]
+
+
+def test_top_tasks_matches_full_sort():
+    rng = random.Random(7)
+    pool = [
+        {
+            "id": i,
+            "priority": rng.choice(["low", "medium", "high"]),
+            "due_ordinal": TODAY.toordinal() + rng.randint(-10, 60),
+        }
+        for i in range(2000)
+    ]
+    today = TODAY.toordinal()
+    expected = sorted(pool, key=lambda t: agents._score_task(t, today), reverse=True)[:3]
+    assert agents.top_tasks(pool, k=3, today=TODAY) == expected
+
+
+@pytest.mark.skipif(
+    os.environ.get("LIFEDESK_BENCH") != "1",
+    reason="builds 1M tasks and checks wall-clock time; set LIFEDESK_BENCH=1 to run",
+)
+def test_suggestion_latency_benchmark():
+    """Top-3 selection over LIFEDESK_BENCH_TASKS tasks (default 1M)."""
+    size = int(os.environ.get("LIFEDESK_BENCH_TASKS", "1000000"))
+    base = TODAY.toordinal()
+    priorities = ("low", "medium", "high")
+    pool = [
+        {"id": i, "priority": priorities[i % 3], "due_ordinal": base + (i * 7919) % 90 - 30}
+        for i in range(size)
+    ]
+    start = time.perf_counter()
+    top = agents.top_tasks(pool, k=3, today=TODAY)
+    elapsed = time.perf_counter() - start
+    print(f"top_tasks over {size} tasks: {elapsed * 1000:.0f} ms")
+    assert len(top) == 3
+    assert elapsed < 5.0
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import json
+import time
+
+import pytest
+
+from lifedesk import cli, notes, tasks, trace
+
+
+@pytest.fixture(autouse=True)
+def tracing_off():
+    yield
+    trace.disable()
+
+
+def test_disabled_spans_record_nothing():
+    with trace.span("load_state") as span:
+        span.set(cached=True)
+    assert trace.records() == []
+
+
+def test_nested_spans_and_breakdown():
+    trace.enable()
+    with trace.span("chat"):
+        for _ in range(2):
+            with trace.span("load_state") as span:
+                span.set(cached=False)
+        with trace.span("call_openai"):
+            pass
+    spans = trace.records()
+    assert [s["path"] for s in spans] == [
+        "chat/load_state", "chat/load_state", "chat/call_openai", "chat",
+    ]
+    assert spans[0]["cached"] is False
+
+    lines = trace.breakdown()
+    assert [line.split()[0] for line in lines] == ["chat", "load_state", "call_openai"]
+    assert lines[1].startswith("  load_state") and lines[1].endswith("x2")
+
+
+def test_chat_trace_breakdown(data_dir, fake_client, capsys):
+    tasks.add_task("Exam", priority="high", due_date="2025-11-25")
+    cli.main(["chat", "tasks", "--trace"])
+    err = capsys.readouterr().err
+    labels = {line.split()[1] for line in err.splitlines() if line.startswith("[trace]")}
+    assert {"chat", "memo_lookup", "load_state", "build_prompt", "call_openai"} <= labels
+
+
+def test_chat_trace_file(data_dir, tmp_path, capsys):
+    notes.add_note("Heaps", "A binary heap keeps the smallest key at the root.")
+    path = tmp_path / "spans.jsonl"
+    cli.main(["chat", "notes", "--question", "binary heap?", "--trace-file", str(path)])
+    cli.main(["chat", "notes", "--question", "binary heap?", "--trace-file", str(path)])
+    assert "[trace]" not in capsys.readouterr().err
+
+    spans = [json.loads(line) for line in path.read_text().splitlines()]
+    runs = {s["run"] for s in spans}
+    assert len(runs) == 2
+    first = [s for s in spans if s["run"] == min(runs)]
+    assert {"chat", "memo_lookup", "rank_passages"} <= {s["span"] for s in first}
+    assert all(s["question"] == "binary heap?" and s["ms"] >= 0 for s in spans)
+    # The second run is answered from the memo without ranking.
+    second = [s for s in spans if s["run"] == max(runs)]
+    assert "rank_passages" not in {s["span"] for s in second}
+
+
+def test_disabled_overhead_is_tiny():
+    n = 200_000
+    start = time.perf_counter()
+    for _ in range(n):
+        with trace.span("load_state") as span:
+            span.set(cached=True)
+    per_call = (time.perf_counter() - start) / n
+    assert per_call < 2e-6, f"disabled span costs {per_call * 1e9:.0f} ns"
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import os
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from lifedesk import agents, notes, storage, vectors  # noqa: E402
+from lifedesk.ranking import rank_notes  # noqa: E402
+
+
+def test_embed_is_unit_length_and_matches_word_forms():
+    heap = vectors.embed("heap")
+    assert np.isclose(np.linalg.norm(heap), 1.0)
+    assert float(heap @ vectors.embed("heaps")) > float(heap @ vectors.embed("plato"))
+
+
+def test_embed_many_matches_embed_row_by_row():
+    texts = ["Binary heaps", "", "heap heap heap", "Plato's Republic, book 10"]
+    matrix = vectors.embed_many(texts)
+    assert matrix.shape == (4, vectors.DIM) and matrix.dtype == np.float32
+    for row, text in zip(matrix, texts):
+        assert np.allclose(row, vectors.embed(text))
+    assert not matrix[1].any()
+
+
+def test_semantic_rank_finds_related_word_forms(data_dir):
+    notes.add_note("Heaps", "A binary heap keeps the smallest item on top.", tags=["cs"])
+    notes.add_note("Plato", "Book 10: the soul is immortal.", tags=["philosophy"])
+    notes.add_note("Graphs", "BFS and DFS traversals.", tags=["cs"])
+
+    # No note contains the word "heapify", so keyword ranking finds nothing.
+    assert rank_notes("heapify", k=3) == []
+    ranked = rank_notes("heapify", k=3, semantic=True)
+    assert ranked[0][1] == 1
+
+    answer = agents._local_answer_question_about_notes("heapify", semantic=True)
+    assert "[1] Heaps" in answer
+
+
+def test_add_note_appends_vectors(data_dir):
+    index = vectors.get_vector_index()
+    notes.add_note("Graphs", "BFS and DFS")
+    assert index.count() == 1
+    notes.add_notes([{"title": "Trees", "body": "AVL", "tags": []}] * 2)
+    assert index.count() == 3
+    assert index.last_note_id() == 3
+
+
+def test_add_note_backfills_missing_vectors(data_dir):
+    notes.add_note("Graphs", "BFS and DFS")
+    index = vectors.get_vector_index()
+    index.matrix_path.unlink()
+    index.ids_path.unlink()
+
+    notes.add_note("Trees", "AVL rotations")
+    assert index.count() == 2
+    assert index.search("bfs dfs", k=1)[0][1] == 1
+
+
+def test_stale_vectors_catch_up_on_search(data_dir):
+    notes.add_note("Graphs", "BFS and DFS")
+    storage.get_backend().insert_note({"title": "Trees", "body": "AVL rotations", "tags": []})
+
+    ranked = rank_notes("avl rotation", k=1, semantic=True)
+    assert ranked[0][1] == 2
+    assert vectors.get_vector_index().count() == 2
+
+
+def test_search_merges_blocks(data_dir, monkeypatch):
+    monkeypatch.setattr(vectors, "BLOCK_ROWS", 3)
+    titles = ["apples", "bananas", "cherries", "dates", "elderberry", "figs", "grapes"]
+    for title in titles:
+        notes.add_note(title, f"all about {title}")
+
+    index = vectors.get_vector_index()
+    for i, title in enumerate(titles, start=1):
+        assert index.search(title, k=1)[0][1] == i
+
+
+def test_rebuild_and_torn_append(data_dir):
+    notes.add_note("Graphs", "BFS and DFS")
+    notes.add_note("Trees", "AVL")
+    index = vectors.get_vector_index()
+
+    # Simulate a crash after the matrix row was written but not its id.
+    with index.ids_path.open("r+b") as f:
+        f.truncate(8)
+    assert index.count() == 1
+    assert rank_notes("avl", k=1, semantic=True)[0][1] == 2
+    assert index.count() == 2
+
+    assert notes.rebuild_index() == 2
+    assert index.count() == 2
+
+
+def test_vector_search_latency_benchmark(data_dir):
+    """Top-3 search over LIFEDESK_BENCH_NOTES note vectors (default 200k)."""
+    size = int(os.environ.get("LIFEDESK_BENCH_NOTES", "200000"))
+    index = vectors.get_vector_index()
+    index.matrix_path.parent.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(7)
+    with index.matrix_path.open("wb") as m, index.ids_path.open("wb") as ids:
+        for start in range(0, size, 100_000):
+            rows = rng.standard_normal((min(100_000, size - start), vectors.DIM), dtype=np.float32)
+            rows /= np.linalg.norm(rows, axis=1, keepdims=True)
+            m.write(rows.tobytes())
+            ids.write(np.arange(start + 1, start + len(rows) + 1, dtype=np.int64).tobytes())
+
+    index.search("warm up the page cache", k=3)
+    start = time.perf_counter()
+    best = index.search("binary heap priority queue", k=3)
+    elapsed = time.perf_counter() - start
+
+    assert len(best) == 3
+    assert elapsed < 1.0, f"vector search over {size} notes took {elapsed:.3f}s"
@@ -0,0 +1,78 @@
+"""Benchmark main.py's batch summarizer against a local mock chat completions endpoint.
+
+    python bench.py --count 200 --latency 0.1 --error-rate 0.05 --workers 1 8 32
+"""
+import os, sys, json, time, random, argparse, threading, tempfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import main
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    """Sleeps `latency` seconds, then answers like /v1/chat/completions (or fails with 429/503)."""
+
+    protocol_version = "HTTP/1.1"    # keep-alive, so connection pooling shows up
+    wbufsize = 1 << 16               # send headers and body in one packet
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests += 1
+        time.sleep(self.server.latency)
+        if random.random() < self.server.error_rate:
+            status, payload = random.choice([429, 503]), {"error": {"message": "try again"}}
+            self.server.errors += 1
+        else:
+            words = body["messages"][-1]["content"].split()[:6]
+            status = 200
+            payload = {"choices": [{"index": 0, "message": {"role": "assistant", "content": " ".join(words)}}]}
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if status == 429:
+            self.send_header("Retry-After", "0")
+        self.end_headers()
+        self.wfile.write(data)
+        self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server(latency, error_rate):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockHandler)
+    server.daemon_threads = True
+    server.latency, server.error_rate = latency, error_rate
+    server.requests = server.errors = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    return server, f"http://{host}:{port}/v1/chat/completions"
+
+
+def main_bench(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.1, help="Mock response time in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="Share of requests answered with 429/503")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("OPENAI_API_KEY", "mock")
+    main.BACKOFF_BASE = 0.01
+    server, url = start_server(args.latency, args.error_rate)
+    descriptions = [f"Task number {i}: write the report for project {i} and send it to the team." for i in range(args.count)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in args.workers:
+            server.requests = server.errors = 0
+            output = os.path.join(tmp, f"summaries-{workers}.txt")
+            count, seconds = main.run(descriptions, output=output, workers=workers, quiet=True, api_url=url)
+            with open(output, encoding="utf-8") as f:
+                failed = f.read().count("Summary: (error)")
+            print(f"workers={workers:3d}  {count} items in {seconds:6.2f}s  {count / seconds:7.1f}/s  "
+                  f"requests={server.requests} retried={server.errors} failed={failed}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    sys.exit(main_bench())
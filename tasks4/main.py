@@ -1,57 +1,176 @@
-import os, sys, json
+import os, sys, json, time, random, argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+from requests.adapters import HTTPAdapter
+
+API_URL = os.environ.get("OPENAI_API_URL", "https://api.openai.com/v1/chat/completions")
+MODEL = "gpt-5-mini"
+SYSTEM_PROMPT = "Summarize the user's task as a short, clear phrase (<= 10 words). Return ONLY the phrase."
+
+DEFAULT_WORKERS = 8
+MAX_RETRIES = 5
+BACKOFF_BASE = 0.5    # seconds; doubles on every retry
+BACKOFF_MAX = 20.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+DEFAULT_DESCRIPTIONS = [
+    """Develop a Python tool that analyzes large CSV files containing sales
+    transactions, computes key statistics like total revenue and average
+    order value, and exports the summary to a new file.""",
+    """Design an AI-powered chatbot that assists students with homework
+    questions, uses natural language understanding to detect question
+    topics, and suggests follow-up resources or explanations."""
+]
 
-API_URL = "https://api.openai.com/v1/chat/completions"
 
-def summarize(paragraph: str) -> str:
-    headers = {
+class RetryableError(RuntimeError):
+    pass
+
+
+def make_session(pool_size: int) -> requests.Session:
+    """One Session for every request, keeping up to pool_size connections open."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
         "Authorization": f"Bearer {os.environ['OPENAI_API_KEY']}",
         "Content-Type": "application/json",
-    }
+    })
+    return session
+
+
+def _backoff(attempt: int, retry_after=None) -> float:
+    if retry_after:
+        try:
+            return min(float(retry_after), BACKOFF_MAX)
+        except ValueError:
+            pass
+    # Full jitter keeps parallel workers from retrying in lockstep.
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def summarize(paragraph: str, session=None, api_url=API_URL, timeout=60, retries=MAX_RETRIES) -> str:
     body = {
-        "model": "gpt-5-mini",
+        "model": MODEL,
         "messages": [
-            {"role": "system", "content": "Summarize the user's task as a short, clear phrase (<= 10 words). Return ONLY the phrase."},
+            {"role": "system", "content": SYSTEM_PROMPT},
             {"role": "user", "content": paragraph.strip()}
         ]
     }
-    r = requests.post(API_URL, headers=headers, data=json.dumps(body), timeout=60)
-    if r.status_code != 200:
-        raise RuntimeError(f"HTTP {r.status_code}: {r.text}")
-    data = r.json()
-    return (data["choices"][0]["message"].get("content") or "").strip()
+    if session is None:
+        session = make_session(1)
+    for attempt in range(retries + 1):
+        try:
+            r = session.post(api_url, data=json.dumps(body), timeout=timeout)
+            if r.status_code in RETRY_STATUSES:
+                raise RetryableError(f"HTTP {r.status_code}: {r.text}")
+        except (RetryableError, requests.ConnectionError, requests.Timeout) as e:
+            if attempt == retries:
+                raise RuntimeError(f"gave up after {retries + 1} attempts: {e}") from None
+            retry_after = r.headers.get("Retry-After") if isinstance(e, RetryableError) else None
+            time.sleep(_backoff(attempt, retry_after))
+            continue
+        if r.status_code != 200:
+            raise RuntimeError(f"HTTP {r.status_code}: {r.text}")
+        data = r.json()
+        return (data["choices"][0]["message"].get("content") or "").strip()
+
+
+def read_descriptions(f):
+    """Yield descriptions from a text stream; blank lines separate descriptions."""
+    para = []
+    for line in f:
+        if line.strip():
+            para.append(line.rstrip("\n"))
+        elif para:
+            yield "\n".join(para)
+            para = []
+    if para:
+        yield "\n".join(para)
 
-def main():
-    if not os.getenv("OPENAI_API_KEY"):
-        print("❌ OPENAI_API_KEY is not set. Run: export OPENAI_API_KEY='YOUR_KEY_HERE'")
-        sys.exit(1)
 
-    descriptions = [
-        """Develop a Python tool that analyzes large CSV files containing sales
-        transactions, computes key statistics like total revenue and average
-        order value, and exports the summary to a new file.""",
-        """Design an AI-powered chatbot that assists students with homework
-        questions, uses natural language understanding to detect question
-        topics, and suggests follow-up resources or explanations."""
-    ]
-
-    lines = []
-    for i, para in enumerate(descriptions, start=1):
-        print(f"\n--- Original Task {i} ---")
-        print(para.strip())
+def summarize_all(descriptions, workers=DEFAULT_WORKERS, **kwargs):
+    """
+    Summarize descriptions concurrently and yield (index, description, summary)
+    in input order as soon as each one (and every one before it) is done.
+    At most 4 * workers descriptions are in flight, so input can be any size.
+    """
+    session = make_session(workers)
+    window = deque()
+
+    def work(para):
         try:
-            summary = summarize(para)
+            return summarize(para, session=session, **kwargs)
         except Exception as e:
-            summary = f"(error) {e}"
-        print("\n--- Summary ---")
-        print(summary)
+            return f"(error) {e}"
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for i, para in enumerate(descriptions, start=1):
+            window.append((i, para, pool.submit(work, para)))
+            while len(window) >= 4 * workers or (window and window[0][2].done()):
+                j, done_para, future = window.popleft()
+                yield j, done_para, future.result()
+        while window:
+            j, done_para, future = window.popleft()
+            yield j, done_para, future.result()
+
 
-        # also save to file
-        lines.append(f"Task {i}:\n{para.strip()}\nSummary: {summary}\n")
+def run(descriptions, output="summaries.txt", workers=DEFAULT_WORKERS, quiet=False, **kwargs):
+    """Summarize everything, streaming results to `output`. Returns (count, seconds)."""
+    start = time.perf_counter()
+    count = 0
+    with open(output, "w", encoding="utf-8") as f:
+        for i, para, summary in summarize_all(descriptions, workers=workers, **kwargs):
+            if not quiet:
+                print(f"\n--- Original Task {i} ---")
+                print(para.strip())
+                print("\n--- Summary ---")
+                print(summary)
+            if count:
+                f.write("\n\n")
+            f.write(f"Task {i}:\n{para.strip()}\nSummary: {summary}\n")
+            f.flush()
+            count += 1
+        f.write("\n")
+    return count, time.perf_counter() - start
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize task descriptions with the OpenAI API.")
+    parser.add_argument("file", nargs="?",
+                        help="Descriptions separated by blank lines ('-' for stdin). "
+                             "Uses two built-in examples if omitted.")
+    parser.add_argument("-o", "--output", default="summaries.txt")
+    parser.add_argument("-w", "--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Requests in parallel (default {DEFAULT_WORKERS})")
+    parser.add_argument("--retries", type=int, default=MAX_RETRIES,
+                        help="Retries on 429/5xx and connection errors")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--api-url", default=API_URL)
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only print the final count")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not os.getenv("OPENAI_API_KEY"):
+        print("❌ OPENAI_API_KEY is not set. Run: export OPENAI_API_KEY='YOUR_KEY_HERE'")
+        sys.exit(1)
 
-    with open("summaries.txt", "w", encoding="utf-8") as f:
-        f.write("\n\n".join(lines) + "\n")
-    print("\n📝 Results saved to summaries.txt")
+    options = dict(output=args.output, workers=args.workers, quiet=args.quiet,
+                   api_url=args.api_url, timeout=args.timeout, retries=args.retries)
+    if args.file == "-":
+        count, seconds = run(read_descriptions(sys.stdin), **options)
+    elif args.file:
+        with open(args.file, encoding="utf-8") as f:
+            count, seconds = run(read_descriptions(f), **options)
+    else:
+        count, seconds = run(DEFAULT_DESCRIPTIONS, **options)
+    rate = count / seconds if seconds > 0 else 0.0
+    print(f"\n📝 {count} results saved to {args.output} in {seconds:.2f}s ({rate:.1f}/s)")
 
 if __name__ == "__main__":
     main()
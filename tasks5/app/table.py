@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+from array import array
+from datetime import date, datetime, timedelta, timezone
+from itertools import accumulate, compress, filterfalse, islice
+from typing import Iterable, List, Optional, Sequence
+
+from app.models import Priority, Task, gc_paused, _is_fast_timestamp
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+# Column values standing in for None.
+NO_DUE = 0  # date ordinals start at 1
+NO_TIME = -(2**63)
+# Sorts tasks without a due date after date.max, as sort_tasks does.
+_NO_DUE_SORT = date.max.toordinal() + 1
+
+_PRIORITY_CODES = {Priority.LOW: 0, Priority.MEDIUM: 1, Priority.HIGH: 2}
+_PRIORITIES = sorted(_PRIORITY_CODES, key=_PRIORITY_CODES.__getitem__)
+# Rows sampled by TaskTable.select to find its cutoff key.
+SELECT_SAMPLE = 4096
+# Maps a completed flag to its "pending" flag in one bytes.translate call.
+_INVERT = bytes([1, 0]) + bytes(254)
+
+
+def _micros(value: datetime) -> int:
+    return (value - EPOCH) // _MICROSECOND
+
+
+def _datetime(micros: int) -> datetime:
+    return EPOCH + timedelta(microseconds=micros)
+
+
+class TaskTable:
+    """Tasks stored column by column instead of as Task objects.
+
+    Ids, priority codes, due dates (as ordinals), completed flags and
+    timestamps (as microseconds since the epoch, UTC) live in typed arrays,
+    and all descriptions share one string addressed by offsets. A million
+    tasks take tens of megabytes instead of the better part of a gigabyte.
+
+    filter and sort work on row numbers and return new row-number lists,
+    leaving the columns untouched; to_tasks turns rows back into Task
+    objects, e.g. for the ones actually printed.
+    """
+
+    __slots__ = (
+        "ids",
+        "priorities",
+        "due",
+        "completed",
+        "created",
+        "completed_at",
+        "_text",
+        "_offsets",
+    )
+
+    def __init__(self) -> None:
+        self.ids = array("q")
+        self.priorities = array("b")
+        self.due = array("l")
+        self.completed = bytearray()
+        self.created = array("q")
+        self.completed_at = array("q")
+        self._text = ""
+        self._offsets = array("q", [0])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    # ---- building ----
+
+    @classmethod
+    def from_tasks(cls, tasks: Sequence[Task]) -> "TaskTable":
+        table = cls()
+        with gc_paused():
+            table.ids = array("q", [task.id for task in tasks])
+            table.priorities = array("b", [_PRIORITY_CODES[task.priority] for task in tasks])
+            table.due = array(
+                "l", [task.due.toordinal() if task.due else NO_DUE for task in tasks]
+            )
+            table.completed = bytearray(bool(task.completed) for task in tasks)
+            table.created = array("q", [_micros(task.created_at) for task in tasks])
+            table.completed_at = array(
+                "q",
+                [_micros(task.completed_at) if task.completed_at else NO_TIME for task in tasks],
+            )
+            table._set_descriptions([task.description for task in tasks])
+        return table
+
+    @classmethod
+    def from_payload(cls, payload: Iterable[dict]) -> "TaskTable":
+        """Build straight from decoded JSON records, without making Task objects.
+
+        Records in the layout Task.to_dict writes are read directly; any
+        other record goes through Task.from_dict, so values and errors match
+        the list-of-tasks path.
+        """
+        table = cls()
+        ids, priorities, due, completed = table.ids, table.priorities, table.due, table.completed
+        created, completed_at = table.created, table.completed_at
+        descriptions: List[str] = []
+        due_ordinals = {None: NO_DUE}
+        codes = {p.value: code for p, code in _PRIORITY_CODES.items()}
+        codes[None] = _PRIORITY_CODES[Priority.MEDIUM]
+        fromisoformat = datetime.fromisoformat
+
+        with gc_paused():
+            for item in payload:
+                created_value = item.get("created_at")
+                done_value = item.get("completed_at")
+                due_value = item.get("due")
+                code = codes.get(item.get("priority"))
+                slow = (
+                    not _is_fast_timestamp(created_value)
+                    or not (done_value is None or _is_fast_timestamp(done_value))
+                    or code is None
+                    or (due_value is not None and due_value not in due_ordinals)
+                )
+                if not slow:
+                    try:
+                        created_micros = _micros(fromisoformat(created_value))
+                        done_micros = _micros(fromisoformat(done_value)) if done_value else NO_TIME
+                    except ValueError:
+                        slow = True
+                if slow:
+                    # Unusual, invalid or first-seen values: let from_dict parse and validate.
+                    task = Task.from_dict(item)
+                    if due_value is not None:
+                        due_ordinals[due_value] = task.due.toordinal() if task.due else NO_DUE
+                    ids.append(task.id)
+                    priorities.append(_PRIORITY_CODES[task.priority])
+                    due.append(task.due.toordinal() if task.due else NO_DUE)
+                    completed.append(bool(task.completed))
+                    created.append(_micros(task.created_at))
+                    completed_at.append(
+                        _micros(task.completed_at) if task.completed_at else NO_TIME
+                    )
+                    descriptions.append(task.description)
+                    continue
+
+                ids.append(int(item["id"]))
+                priorities.append(code)
+                due.append(due_ordinals[due_value])
+                completed.append(bool(item.get("completed", False)))
+                created.append(created_micros)
+                completed_at.append(done_micros)
+                descriptions.append(item["description"])
+            table._set_descriptions(descriptions)
+        return table
+
+    def _set_descriptions(self, descriptions: List[str]) -> None:
+        self._text = "".join(descriptions)
+        self._offsets = array("q", [0])
+        self._offsets.extend(accumulate(map(len, descriptions)))
+
+    # ---- reading ----
+
+    def description(self, row: int) -> str:
+        return self._text[self._offsets[row] : self._offsets[row + 1]]
+
+    def task(self, row: int) -> Task:
+        due = self.due[row]
+        completed_at = self.completed_at[row]
+        return Task(
+            id=self.ids[row],
+            description=self.description(row),
+            created_at=_datetime(self.created[row]),
+            priority=_PRIORITIES[self.priorities[row]],
+            due=date.fromordinal(due) if due != NO_DUE else None,
+            completed=bool(self.completed[row]),
+            completed_at=_datetime(completed_at) if completed_at != NO_TIME else None,
+        )
+
+    def to_tasks(self, rows: Optional[Iterable[int]] = None) -> List[Task]:
+        if rows is None:
+            rows = range(len(self))
+        return [self.task(row) for row in rows]
+
+    # ---- queries ----
+
+    def filter(self, view: str, rows: Optional[Sequence[int]] = None) -> List[int]:
+        """Rows for the given view (all/completed/pending), like filter_tasks."""
+        if rows is None:
+            if view == "all":
+                return list(range(len(self)))
+            flags = self.completed if view == "completed" else self.completed.translate(_INVERT)
+            return list(compress(range(len(self)), flags))
+        if view == "all":
+            return list(rows)
+        want = view == "completed"
+        completed = self.completed
+        return [row for row in rows if bool(completed[row]) is want]
+
+    def sort(self, rows: Sequence[int], sort_key: Optional[str]) -> List[int]:
+        """Order rows like sort_tasks orders tasks; ties keep their order."""
+        if sort_key == "priority":
+            return sorted(rows, key=self.priorities.__getitem__, reverse=True)
+        by_created = sorted(rows, key=self.created.__getitem__)
+        if sort_key == "due":
+            due = self.due
+            return sorted(
+                by_created, key=lambda row: due[row] if due[row] != NO_DUE else _NO_DUE_SORT
+            )
+        return by_created
+
+    def count(self, view: str) -> int:
+        """How many rows filter(view) would return."""
+        if view == "all":
+            return len(self)
+        done = self.completed.count(1)
+        return done if view == "completed" else len(self) - done
+
+    def _in_view(self, view: str, rows: Iterable[int]) -> Iterable[int]:
+        if view == "all":
+            return rows
+        if view == "completed":
+            return filter(self.completed.__getitem__, rows)
+        return filterfalse(self.completed.__getitem__, rows)
+
+    def select(
+        self,
+        view: str,
+        sort_key: Optional[str],
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[int]:
+        """sort(filter(view), sort_key)[offset:offset + limit], without sorting everything.
+
+        With a small limit, a sample of the rows in view gives a cutoff key
+        that the first offset + limit rows cannot exceed. One pass over the
+        key column (run by itertools/map at C speed) keeps only the rows
+        within it, and just those are filtered and sorted. Priority has
+        three values, so its rows are taken highest first until the page
+        is full.
+        """
+        wanted = None if limit is None else offset + limit
+        size = len(self)
+        if wanted is None or wanted * 4 > min(size, SELECT_SAMPLE):
+            return self.sort(self.filter(view), sort_key)[offset:wanted]
+
+        if sort_key == "priority":
+            picked: List[int] = []
+            for code in sorted(_PRIORITY_CODES.values(), reverse=True):
+                matching = compress(range(size), map(code.__eq__, self.priorities))
+                picked.extend(islice(self._in_view(view, matching), wanted - len(picked)))
+                if len(picked) == wanted:
+                    break
+            return picked[offset:]
+
+        sample = list(self._in_view(view, range(0, size, max(1, size // SELECT_SAMPLE))))
+        if len(sample) < wanted:
+            return self.sort(self.filter(view), sort_key)[offset:wanted]
+        if sort_key == "due":
+            due = self.due
+            keys = [due[row] if due[row] != NO_DUE else _NO_DUE_SORT for row in sample]
+        else:
+            keys = [self.created[row] for row in sample]
+        # The wanted-th smallest key of a subset is at least the wanted-th
+        # smallest over all rows in view, so no row of the page is dropped.
+        cutoff = sorted(keys)[wanted - 1]
+        if sort_key == "due":
+            if cutoff == _NO_DUE_SORT:
+                return self.sort(self.filter(view), sort_key)[offset:wanted]
+            within = compress(range(size), map(range(1, cutoff + 1).__contains__, self.due))
+        else:
+            within = compress(range(size), map(cutoff.__ge__, self.created))
+        candidates = list(self._in_view(view, within))
+        return self.sort(candidates, sort_key)[offset:wanted]
@@ -0,0 +1,65 @@
+"""Scripted bulk edits over many tasks: list helpers vs TaskCollection.
+
+Completes and then deletes tasks one id at a time, the way a script calling
+the model helpers in a loop would. The list helpers are only run for a
+sample of the operations, as they take time proportional to the list.
+Run from the tasks5 directory:
+
+    python benchmarks/bench_collection.py         # 100k tasks
+"""
+from __future__ import annotations
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.models import (  # noqa: E402
+    TaskCollection,
+    create_task,
+    delete_task,
+    find_task,
+    mark_task_complete,
+)
+from bench_storage import make_tasks  # noqa: E402
+
+LIST_SAMPLE = 2_000
+
+
+def script(tasks, ids) -> None:
+    for task_id in ids:
+        mark_task_complete(find_task(tasks, task_id))
+    for task_id in ids:
+        _, tasks = delete_task(tasks, task_id)
+    for _ in ids:
+        new_task = create_task("Scripted", None, None, tasks)
+        if isinstance(tasks, TaskCollection):
+            tasks.add(new_task)
+        else:
+            tasks.append(new_task)
+
+
+def per_op_us(tasks, ids) -> float:
+    start = time.perf_counter()
+    script(tasks, ids)
+    return (time.perf_counter() - start) / (3 * len(ids)) * 1e6
+
+
+def main(argv: list[str]) -> None:
+    count = int(argv[0]) if argv else 100_000
+    ids = list(range(1, count + 1))
+    random.Random(1).shuffle(ids)
+
+    listed = per_op_us(make_tasks(count), ids[:LIST_SAMPLE])
+    collected = per_op_us(TaskCollection(make_tasks(count)), ids)
+    print(f"{count:,} tasks, complete + delete + add per id")
+    print(f"list helpers     {listed:10.1f} us/op  (sample of {LIST_SAMPLE:,} ids)")
+    print(f"TaskCollection   {collected:10.1f} us/op  (all {count:,} ids)")
+    print(f"all {count:,} ids: list ~{listed * 3 * count / 1e6:.0f} s, "
+          f"collection {collected * 3 * count / 1e6:.1f} s")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
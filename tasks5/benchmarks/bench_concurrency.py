@@ -0,0 +1,109 @@
+"""Stress test: N tasker processes writing one task file at once.
+
+Each writer adds its own tasks and completes tasks seeded for it, through
+the same TaskStorage calls the CLI makes. Afterwards every add and every
+completion must be in the file. "--naive" repeats the run with the old
+unlocked load/replace cycle for comparison. Run from the tasks5 directory:
+
+    python benchmarks/bench_concurrency.py                  # 8 writers x 200 ops
+    python benchmarks/bench_concurrency.py 16 500 --naive
+"""
+from __future__ import annotations
+
+import json
+import multiprocessing
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.models import create_task, mark_task_complete, tasks_to_payload  # noqa: E402
+from storage import TaskStorage  # noqa: E402
+
+
+def naive_save(storage: TaskStorage, tasks) -> None:
+    # The pre-locking save: atomic, but whoever replaces the file last wins.
+    with tempfile.NamedTemporaryFile(
+        mode="w", encoding="utf-8", dir=storage.path.parent, delete=False
+    ) as tmp_file:
+        tmp_file.write(json.dumps(tasks_to_payload(tasks), indent=2))
+    Path(tmp_file.name).replace(storage.path)
+
+
+def writer(path: str, worker: int, ops: int, seeded: list[int], naive: bool) -> None:
+    for op in range(ops):
+        storage = TaskStorage(path)
+        tasks = storage.load_collection()
+        if op % 2:
+            task = seeded[op // 2]
+            if naive and task not in tasks:
+                continue  # its seed was lost to another writer
+            mark_task_complete(tasks.get(task))
+        else:
+            tasks.add(create_task(f"worker {worker} op {op}", None, None, tasks))
+        if naive:
+            naive_save(storage, tasks)
+        else:
+            storage.save_tasks(tasks)
+
+
+def run(writers: int, ops: int, naive: bool) -> None:
+    completes = ops // 2
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "tasks.json"
+        storage = TaskStorage(path)
+        seed = storage.load_collection()
+        for _ in range(writers * completes):
+            seed.add(create_task("seeded", None, None, seed))
+        storage.save_tasks(seed)
+
+        context = multiprocessing.get_context("spawn")
+        processes = [
+            context.Process(
+                target=writer,
+                args=(
+                    str(path),
+                    worker,
+                    ops,
+                    list(range(worker * completes + 1, (worker + 1) * completes + 1)),
+                    naive,
+                ),
+            )
+            for worker in range(writers)
+        ]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+        tasks = TaskStorage(path).load_tasks()
+        adds = sum(1 for task in tasks if task.description.startswith("worker "))
+        done = sum(1 for task in tasks if task.completed)
+        expected_adds = writers * (ops - completes)
+        expected_done = writers * completes
+        lost = (expected_adds - adds) + (expected_done - done)
+        mode = "naive " if naive else "locked"
+        print(
+            f"{mode}  {writers} writers x {ops} ops  {writers * ops / elapsed:8.0f} ops/s  "
+            f"adds {adds}/{expected_adds}  completes {done}/{expected_done}  lost {lost}"
+        )
+        if not naive and lost:
+            raise SystemExit("lost updates")
+
+
+def main(argv: list[str]) -> None:
+    naive = "--naive" in argv
+    numbers = [int(arg) for arg in argv if arg != "--naive"]
+    writers = numbers[0] if numbers else 8
+    ops = numbers[1] if len(numbers) > 1 else 200
+    run(writers, ops, naive=False)
+    if naive:
+        run(writers, ops, naive=True)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,63 @@
+"""Time TaskStorage.load_tasks against reading with Task.from_dict; fails below 5x.
+
+The baseline is the whole load as it used to be: read the file, json.loads
+it and build every task with Task.from_dict. Both sides start from the
+same saved file.
+
+Run from the tasks5 directory:
+
+    python benchmarks/bench_decode.py             # 1M tasks
+    python benchmarks/bench_decode.py 100000
+"""
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.models import Task, mark_task_complete  # noqa: E402
+from bench_storage import make_tasks  # noqa: E402
+from storage import TaskStorage  # noqa: E402
+
+REQUIRED_SPEEDUP = 5.0
+
+
+def main(argv: list[str]) -> int:
+    count = int(argv[0]) if argv else 1_000_000
+    tasks = make_tasks(count)
+    for task in tasks[::5]:
+        mark_task_complete(task)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "tasks.json"
+        TaskStorage(path).save_tasks(tasks)
+        del tasks
+
+        start = time.perf_counter()
+        expected = [Task.from_dict(item) for item in json.loads(path.read_text(encoding="utf-8"))]
+        baseline = time.perf_counter() - start
+
+        start = time.perf_counter()
+        loaded = TaskStorage(path).load_tasks()
+        fast = time.perf_counter() - start
+
+    if loaded != expected:
+        print("load_tasks and Task.from_dict disagree")
+        return 1
+    speedup = baseline / fast
+    print(
+        f"{count:,} tasks  from_dict {baseline * 1000:.0f} ms  "
+        f"load_tasks {fast * 1000:.0f} ms  speedup {speedup:.1f}x"
+    )
+    if speedup < REQUIRED_SPEEDUP:
+        print(f"FAIL: expected at least {REQUIRED_SPEEDUP:.0f}x")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
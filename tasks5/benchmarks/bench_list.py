@@ -0,0 +1,50 @@
+"""Top-N listing: TaskTable.select vs sorting every row.
+
+Times what `tasker list --limit 20` does after loading: filter to pending
+tasks, pick the first page for each --sort key, and render it. One filter
+pass over the table is shown for scale. Run from the tasks5 directory:
+
+    python benchmarks/bench_list.py               # 1M tasks, top 20
+    python benchmarks/bench_list.py 100000 50
+"""
+from __future__ import annotations
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.table import TaskTable  # noqa: E402
+from bench_storage import make_tasks  # noqa: E402
+from cli import stream_table  # noqa: E402
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def main(argv: list[str]) -> None:
+    count = int(argv[0]) if argv else 1_000_000
+    limit = int(argv[1]) if len(argv) > 1 else 20
+    tasks = make_tasks(count)
+    random.Random(1).shuffle(tasks)  # file order need not follow any sort key
+    table = TaskTable.from_tasks(tasks)
+    scan = timed(lambda: table.filter("pending"))
+    print(f"{count:,} tasks, first {limit}; one filter pass: {scan:.0f} ms")
+    for sort_key in (None, "priority", "due"):
+        full = timed(lambda: table.sort(table.filter("pending"), sort_key)[:limit])
+        picked = []
+        top = timed(lambda: picked.extend(table.select("pending", sort_key, limit=limit)))
+        render = timed(lambda: list(stream_table(map(table.task, picked))))
+        print(
+            f"  --sort {sort_key or 'created':<9} full sort {full:6.0f} ms  "
+            f"select {top:6.0f} ms  render {render:5.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,77 @@
+"""Time one save after a single change, full re-serialization vs incremental.
+
+Run from the tasks5 directory:
+
+    python benchmarks/bench_storage.py            # 100k and 1M tasks
+    python benchmarks/bench_storage.py 50000
+"""
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.models import Priority, Task, mark_task_complete, tasks_to_payload  # noqa: E402
+from storage import TaskStorage  # noqa: E402
+
+
+def make_tasks(count: int) -> list[Task]:
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    priorities = list(Priority)
+    return [
+        Task(
+            id=i,
+            description=f"Benchmark task number {i}",
+            created_at=start + timedelta(seconds=i),
+            priority=priorities[i % 3],
+            due=(start + timedelta(days=i % 90)).date() if i % 4 else None,
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def bench(count: int, directory: Path) -> None:
+    path = directory / f"tasks-{count}.json"
+    TaskStorage(path).save_tasks(make_tasks(count))
+
+    storage = TaskStorage(path)
+    tasks = storage.load_tasks()
+    mark_task_complete(tasks[count // 2])
+
+    def full_save() -> None:
+        # What every save used to do.
+        path.with_suffix(".full").write_text(json.dumps(tasks_to_payload(tasks), indent=2))
+
+    full = timed(full_save)
+    first = timed(lambda: storage.save_tasks(tasks))
+    assert storage.serialized_last_save == 1
+    mark_task_complete(tasks[count // 3])
+    second = timed(lambda: storage.save_tasks(tasks))
+    print(
+        f"{count:>9,} tasks  full save {full * 1000:8.0f} ms  "
+        f"incremental {first * 1000:6.0f} ms (after load), "
+        f"{second * 1000:6.0f} ms (after save)  "
+        f"speedup {full / second:4.1f}x"
+    )
+
+
+def main(argv: list[str]) -> None:
+    counts = [int(arg) for arg in argv] or [100_000, 1_000_000]
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in counts:
+            bench(count, Path(tmp))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
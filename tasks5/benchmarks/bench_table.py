@@ -0,0 +1,107 @@
+"""Memory and filter/sort latency: list of Task objects vs TaskTable.
+
+Each representation is built in a fresh process from the same parsed
+payload. "held" is what the built tasks keep allocated (tracemalloc, on a
+second build); "RSS +" is how much the process grew during the first build.
+Run from the tasks5 directory:
+
+    python benchmarks/bench_table.py              # 1M tasks
+    python benchmarks/bench_table.py 100000
+"""
+from __future__ import annotations
+
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.models import (  # noqa: E402
+    filter_tasks,
+    mark_task_complete,
+    payload_to_tasks,
+    sort_tasks,
+    tasks_to_payload,
+)
+from app.table import TaskTable  # noqa: E402
+from bench_storage import make_tasks  # noqa: E402
+
+QUERIES = [("pending", None), ("pending", "priority"), ("all", "due")]
+
+
+def rss_mb() -> float:
+    """Current resident set size (Linux); falls back to the peak elsewhere."""
+    try:
+        pages = int(Path("/proc/self/statm").read_text().split()[1])
+        return pages * resource.getpagesize() / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def build(kind: str, payload: list):
+    return payload_to_tasks(payload) if kind == "list" else TaskTable.from_payload(payload)
+
+
+def measure(kind: str, path: Path) -> None:
+    """Run in a child process: build one representation, time the queries."""
+    payload = json.loads(path.read_text())
+    before = rss_mb()
+    start = time.perf_counter()
+    built = build(kind, payload)
+    build_time = time.perf_counter() - start
+    grown = rss_mb() - before
+    timings = []
+    for view, sort_key in QUERIES:
+        start = time.perf_counter()
+        if kind == "list":
+            sort_tasks(filter_tasks(built, view), sort_key)
+        else:
+            built.sort(built.filter(view), sort_key)
+        timings.append(time.perf_counter() - start)
+
+    del built
+    tracemalloc.start()
+    built = build(kind, payload)
+    held = tracemalloc.get_traced_memory()[0] / 2**20
+    tracemalloc.stop()
+    print(json.dumps({"build": build_time, "queries": timings, "rss": grown, "held": held}))
+
+
+def main(argv: list[str]) -> None:
+    if argv and argv[0] == "--child":
+        measure(argv[1], Path(argv[2]))
+        return
+    count = int(argv[0]) if argv else 1_000_000
+    tasks = make_tasks(count)
+    for task in tasks[::5]:
+        mark_task_complete(task)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "tasks.json"
+        path.write_text(json.dumps(tasks_to_payload(tasks)))
+        del tasks
+        print(f"{count:,} tasks")
+        labels = [f"{view}/{sort_key or 'created'}" for view, sort_key in QUERIES]
+        header = "".join(f"{label:>20}" for label in labels)
+        print(f"{'':8}{'build':>10}{'held':>10}{'RSS +':>11}{header}")
+        for kind in ("list", "table"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", kind, str(path)],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            result = json.loads(out)
+            queries = "".join(f"{t * 1000:17.0f} ms" for t in result["queries"])
+            print(
+                f"{kind:<8}{result['build'] * 1000:7.0f} ms"
+                f"{result['held']:7.0f} MB{result['rss']:8.0f} MB{queries}"
+            )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -2,7 +2,8 @@ from __future__ import annotations
 
 import argparse
 import sys
-from typing import Iterable, List, Sequence
+from itertools import islice
+from typing import Iterable, Iterator, List, Sequence
 
 from app import models
 from app.models import (
@@ -11,13 +12,25 @@ from app.models import (
     TaskNotFoundError,
     ValidationError,
     create_task,
-    filter_tasks,
     mark_task_complete,
-    sort_tasks,
 )
 from storage import TaskStorage
 
 
+def _non_negative_int(value: str) -> int:
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError("must be 0 or more")
+    return number
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("must be 1 or more")
+    return number
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         prog="tasker", description="JSON-backed command-line task manager"
@@ -72,6 +85,17 @@ def build_parser() -> argparse.ArgumentParser:
         choices=["priority", "due"],
         help="Sort tasks (default: creation time)",
     )
+    list_parser.add_argument(
+        "--limit",
+        type=_positive_int,
+        help="Show at most N tasks",
+    )
+    list_parser.add_argument(
+        "--offset",
+        type=_non_negative_int,
+        default=0,
+        help="Skip the first M tasks of the sorted list",
+    )
 
     complete_parser = subparsers.add_parser("complete", help="Mark a task as complete")
     complete_parser.add_argument("task_id", type=int, help="ID to mark complete")
@@ -97,28 +121,46 @@ def _colorize(value: str, color: str, use_color: bool) -> str:
     return f"{codes[color]}{value}{codes['reset']}"
 
 
-def render_table(tasks: Sequence[Task], use_color: bool = False) -> str:
+# Rows used to size the columns when streaming; later rows wider than that
+# just push their line out instead of re-aligning what was printed.
+SAMPLE_ROWS = 100
+
+
+def _table_row(task: Task, use_color: bool) -> List[str]:
+    status = _status_char(task)
+    if task.completed:
+        status = _colorize(status, "green", use_color)
+    else:
+        status = _colorize(status, "red", use_color)
+    return [
+        str(task.id),
+        status,
+        task.priority.value,
+        task.due.isoformat() if task.due else "-",
+        task.description,
+    ]
+
+
+def stream_table(
+    tasks: Iterable[Task],
+    use_color: bool = False,
+    sample: int = SAMPLE_ROWS,
+    widths: Sequence[int] | None = None,
+) -> Iterator[str]:
+    """Yield the table line by line.
+
+    Column widths are either given (fixed) or taken from the headers and the
+    first `sample` rows, so output starts after at most `sample` tasks have
+    been read however many follow.
+    """
     headers = ["ID", "Status", "Priority", "Due", "Description"]
-    rows: List[List[str]] = []
-    for task in tasks:
-        status = _status_char(task)
-        if task.completed:
-            status = _colorize(status, "green", use_color)
-        else:
-            status = _colorize(status, "red", use_color)
-        rows.append(
-            [
-                str(task.id),
-                status,
-                task.priority.value,
-                task.due.isoformat() if task.due else "-",
-                task.description,
-            ]
-        )
-    widths = [len(header) for header in headers]
-    for row in rows:
-        for idx, value in enumerate(row):
-            widths[idx] = max(widths[idx], len(value))
+    tasks = iter(tasks)
+    sampled = [_table_row(task, use_color) for task in islice(tasks, 0 if widths else sample)]
+    if widths is None:
+        widths = [len(header) for header in headers]
+        for row in sampled:
+            for idx, value in enumerate(row):
+                widths[idx] = max(widths[idx], len(value))
 
     def format_row(row: Sequence[str]) -> str:
         padded = [
@@ -127,10 +169,16 @@ def render_table(tasks: Sequence[Task], use_color: bool = False) -> str:
         ]
         return "  ".join(padded)
 
-    output_lines = [format_row(headers)]
-    output_lines.append(format_row(["-" * width for width in widths]))
-    output_lines.extend(format_row(row) for row in rows)
-    return "\n".join(output_lines)
+    yield format_row(headers)
+    yield format_row(["-" * width for width in widths])
+    for row in sampled:
+        yield format_row(row)
+    for task in tasks:
+        yield format_row(_table_row(task, use_color))
+
+
+def render_table(tasks: Sequence[Task], use_color: bool = False) -> str:
+    return "\n".join(stream_table(tasks, use_color=use_color, sample=len(tasks)))
 
 
 def determine_view(args: argparse.Namespace) -> str:
@@ -145,30 +193,33 @@ def determine_view(args: argparse.Namespace) -> str:
 
 
 def handle_add(args: argparse.Namespace, storage: TaskStorage) -> None:
-    tasks = storage.load_tasks()
+    tasks = storage.load_collection()
     new_task = create_task(args.description, args.priority, args.due, tasks)
-    tasks.append(new_task)
+    tasks.add(new_task)
     storage.save_tasks(tasks)
     print(f"Added task {new_task.id}: {new_task.description}")
 
 
 def handle_list(args: argparse.Namespace, storage: TaskStorage) -> None:
-    tasks = storage.load_tasks()
-    if not tasks:
+    table = storage.load_table()
+    if not len(table):
         print("No tasks stored.")
         return
     view = determine_view(args)
-    filtered = filter_tasks(tasks, view)
-    if not filtered:
+    if not table.count(view):
         print("No tasks found for the selected filter.")
         return
-    ordered = sort_tasks(filtered, args.sort)
-    print(render_table(ordered, use_color=args.color))
+    selected = table.select(view, args.sort, offset=args.offset, limit=args.limit)
+    if not selected:
+        print("No tasks in the requested range.")
+        return
+    for line in stream_table(map(table.task, selected), use_color=args.color):
+        print(line)
 
 
 def handle_complete(args: argparse.Namespace, storage: TaskStorage) -> None:
-    tasks = storage.load_tasks()
-    task = models.find_task(tasks, args.task_id)
+    tasks = storage.load_collection()
+    task = tasks.get(args.task_id)
     mark_task_complete(task)
     if args.dry_run:
         print(f"[dry-run] Would complete task {task.id}: {task.description}")
@@ -178,8 +229,8 @@ def handle_complete(args: argparse.Namespace, storage: TaskStorage) -> None:
 
 
 def handle_delete(args: argparse.Namespace, storage: TaskStorage) -> None:
-    tasks = storage.load_tasks()
-    task, updated = models.delete_task(tasks, args.task_id)
+    tasks = storage.load_collection()
+    task = tasks.get(args.task_id)
     if args.dry_run:
         print(f"[dry-run] Would delete task {task.id}: {task.description}")
         return
@@ -188,7 +239,8 @@ def handle_delete(args: argparse.Namespace, storage: TaskStorage) -> None:
         if answer not in {"y", "yes"}:
             print("Aborted.")
             return
-    storage.save_tasks(updated)
+    tasks.delete(task.id)
+    storage.save_tasks(tasks)
     print(f"Deleted task {task.id}.")
 
 
@@ -3,10 +3,34 @@ from __future__ import annotations
 import json
 import os
 import tempfile
+from contextlib import contextmanager
+from datetime import datetime
 from pathlib import Path
-from typing import List, Sequence
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 
-from app.models import Task, payload_to_tasks, tasks_to_payload
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore[assignment]
+    import msvcrt
+
+from app.models import (
+    Priority,
+    Task,
+    TaskCollection,
+    _is_fast_timestamp,
+    gc_paused,
+    payload_to_tasks,
+)
+from app.table import TaskTable
+
+# Records are written like json.dumps(tasks, indent=2). JSON strings cannot
+# hold a raw newline, so in that layout a line reading "  }," only ever
+# closes a record, which lets a saved file be cut back into its records.
+_OPEN = "[\n  "
+_CLOSE = "\n]"
+_JOIN = ",\n  "
+_RECORD_BREAK = "\n  },\n  {\n"
 
 
 def _default_data_path() -> Path:
@@ -16,11 +40,113 @@ def _default_data_path() -> Path:
     return Path.home() / ".tasks.json"
 
 
+class ConflictError(ValueError):
+    """Raised when another process changed the same task since it was loaded."""
+
+
+# What identifies one version of the task file. Saves always replace the
+# file, so every save gets a new inode and the stamp changes.
+Stamp = Optional[Tuple[int, int, int]]
+
+
+def _stamp_of(stat: os.stat_result) -> Stamp:
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def _file_stamp(path: Path) -> Stamp:
+    try:
+        return _stamp_of(path.stat())
+    except FileNotFoundError:
+        return None
+
+
+def _fingerprint(task: Task) -> tuple:
+    return (
+        task.id,
+        task.description,
+        task.created_at,
+        task.priority,
+        task.due,
+        task.completed,
+        task.completed_at,
+    )
+
+
+def _record_fingerprints(records: Sequence[dict]) -> Iterator[tuple]:
+    """_fingerprint(Task.from_dict(record)) for each record, without building tasks."""
+    priorities: Dict[object, Priority] = {p.value: p for p in Priority}
+    priorities[None] = Priority.MEDIUM
+    due_dates: Dict[object, object] = {None: None}
+    fromisoformat = datetime.fromisoformat
+    for record in records:
+        created = record.get("created_at")
+        done = record.get("completed_at")
+        due_value = record.get("due")
+        priority = priorities.get(record.get("priority"))
+        if (
+            priority is None
+            or due_value not in due_dates
+            or not _is_fast_timestamp(created)
+            or not (done is None or _is_fast_timestamp(done))
+        ):
+            task = Task.from_dict(record)
+            if due_value is not None:
+                due_dates[due_value] = task.due
+            yield _fingerprint(task)
+            continue
+        yield (
+            int(record["id"]),
+            record["description"],
+            fromisoformat(created),
+            priority,
+            due_dates[due_value],
+            bool(record.get("completed", False)),
+            fromisoformat(done) if done else None,
+        )
+
+
+def serialize_task(task: Task) -> str:
+    """One record as it appears inside the saved list."""
+    return json.dumps(task.to_dict(), indent=2).replace("\n", "\n  ")
+
+
+def _split_records(raw: str, count: int) -> Optional[List[str]]:
+    """Cut a file written by save_tasks into its record fragments."""
+    if count == 0 or not (raw.startswith(_OPEN + "{\n") and raw.endswith("\n  }" + _CLOSE)):
+        return None
+    pieces = raw[len(_OPEN) + 2 : -len(_CLOSE) - 4].split(_RECORD_BREAK)
+    if len(pieces) != count:
+        return None
+    return ["{\n" + piece + "\n  }" for piece in pieces]
+
+
 class TaskStorage:
-    """JSON persistence with atomic writes."""
+    """JSON persistence with atomic writes.
+
+    The storage remembers the serialized form of every record it loaded or
+    saved. save_tasks only serializes tasks that are new or changed since
+    then and splices the remembered text in for the rest.
+
+    Several tasker processes can share one file. Loading takes no lock;
+    save_tasks holds an advisory lock on a sidecar ".lock" file and checks
+    that the file is still the version that was loaded. If another process
+    saved in between, both sets of changes are merged (see _merge) and the
+    merged list is written; overlapping edits raise ConflictError.
+    """
 
     def __init__(self, path: str | Path | None = None) -> None:
         self.path = self._resolve_path(path)
+        # id -> (fingerprint, position) of the records last read or written;
+        # after a load it is built from the raw records on first use.
+        self._clean: Optional[Dict[int, Tuple[tuple, int]]] = {}
+        self._records: Optional[list] = None
+        self._raw: Optional[str] = None
+        self._fragments: Optional[List[str]] = None
+        self._count = 0
+        self._loaded = False
+        self._stamp: Stamp = None
+        self.serialized_last_save = 0
+        self.merged_last_save = False
 
     @staticmethod
     def _resolve_path(value: str | Path | None) -> Path:
@@ -28,27 +154,240 @@ class TaskStorage:
             return Path(value).expanduser()
         return _default_data_path()
 
-    def load_tasks(self) -> List[Task]:
-        if not self.path.exists():
-            return []
-        raw = self.path.read_text().strip()
+    @property
+    def lock_path(self) -> Path:
+        return self.path.with_name(self.path.name + ".lock")
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, "a+b") as handle:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+                else:
+                    handle.seek(0)
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _read(self) -> Tuple[str, list, Stamp]:
+        # Stamp and text come from the same open file, so they always match.
+        try:
+            with open(self.path, encoding="utf-8") as handle:
+                stamp = _stamp_of(os.fstat(handle.fileno()))
+                raw = handle.read().strip()
+        except FileNotFoundError:
+            return "", [], None
         if not raw:
-            return []
-        data = json.loads(raw)
+            return "", [], stamp
+        with gc_paused():
+            data = json.loads(raw)
         if not isinstance(data, list):
             raise ValueError("Task file is corrupt; expected a list.")
-        return payload_to_tasks(data)
+        return raw, data, stamp
+
+    def load_tasks(self) -> List[Task]:
+        self._forget()
+        raw, data, stamp = self._read()
+        tasks = payload_to_tasks(data)
+        if raw:
+            # Fingerprints come from the records when a save needs them, so
+            # commands that only read never pay for them.
+            self._clean = None
+            self._records = data
+            self._raw = raw
+            self._count = len(data)
+        self._loaded = True
+        self._stamp = stamp
+        return tasks
+
+    def load_collection(self) -> TaskCollection:
+        """Like load_tasks, but indexed by id for lookups and edits."""
+        return TaskCollection(self.load_tasks())
+
+    def load_table(self) -> TaskTable:
+        """Read the tasks into a columnar TaskTable, for read-only queries."""
+        _, data, _ = self._read()
+        return TaskTable.from_payload(data)
+
+    def save_tasks(self, tasks: Sequence[Task] | TaskCollection) -> List[Task]:
+        """Write tasks and return what was written.
+
+        That is tasks itself unless another process saved since this storage
+        last loaded or saved, in which case it is the merge of both. The
+        version check, the merge and the write all happen under the lock,
+        so a merge never has to be redone. After a merge, a TaskCollection
+        or list passed in is updated in place to the merged tasks, so the
+        caller keeps working on what is on disk.
+        """
+        self.merged_last_save = False
+        with self._locked():
+            if self._is_stale():
+                merged = self._merge(tasks)
+                if isinstance(tasks, TaskCollection):
+                    tasks.replace(merged)
+                elif isinstance(tasks, list):
+                    tasks[:] = merged
+                tasks = merged
+            self._write(tasks)
+        return list(tasks)
+
+    def _is_stale(self) -> bool:
+        return self._loaded and _file_stamp(self.path) != self._stamp
+
+    def _write(self, tasks: Sequence[Task] | TaskCollection) -> None:
+        fragments = self._cached_fragments()
+        clean = self._base()
+        records: List[str] = []
+        serialized = 0
+        with gc_paused():
+            for task in tasks:
+                cached = clean.get(task.id)
+                if (
+                    fragments is not None
+                    and cached is not None
+                    and cached[0] == _fingerprint(task)
+                ):
+                    records.append(fragments[cached[1]])
+                else:
+                    records.append(serialize_task(task))
+                    serialized += 1
 
-    def save_tasks(self, tasks: Sequence[Task]) -> None:
-        payload = tasks_to_payload(tasks)
-        self.path.parent.mkdir(parents=True, exist_ok=True)
-        serialized = json.dumps(payload, indent=2)
         with tempfile.NamedTemporaryFile(
             mode="w",
             encoding="utf-8",
             dir=self.path.parent,
             delete=False,
         ) as tmp_file:
-            tmp_file.write(serialized)
+            if records:
+                tmp_file.write(_OPEN)
+                tmp_file.write(_JOIN.join(records))
+                tmp_file.write(_CLOSE)
+            else:
+                tmp_file.write("[]")
             temp_name = Path(tmp_file.name)
         temp_name.replace(self.path)
+
+        self.serialized_last_save = serialized
+        self._remember(tasks, fragments=records)
+        self._loaded = True
+        self._stamp = _file_stamp(self.path)
+
+    def _merge(self, ours: Sequence[Task] | TaskCollection) -> List[Task]:
+        """Three-way merge of our tasks and the file's, against what we loaded.
+
+        A task changed or deleted on only one side takes that side's
+        version. Tasks we added keep their place at the end; if another
+        process already used the id, ours is given the next free one (the
+        Task object is renumbered in place). A task changed on both sides,
+        or changed on one and deleted on the other, is a conflict.
+        """
+        self.merged_last_save = True
+        base = self._base()
+        raw, data, stamp = self._read()
+        theirs = payload_to_tasks(data)
+        ours_by_id = {task.id: task for task in ours}
+
+        def conflict(task_id: int) -> ConflictError:
+            return ConflictError(
+                f"Task {task_id} was changed by another tasker process; "
+                "reload and try again."
+            )
+
+        merged: List[Task] = []
+        their_ids = set()
+        for their_task in theirs:
+            their_ids.add(their_task.id)
+            cached = base.get(their_task.id)
+            if cached is None:  # added by them
+                merged.append(their_task)
+                continue
+            base_print = cached[0]
+            their_changed = _fingerprint(their_task) != base_print
+            our_task = ours_by_id.get(their_task.id)
+            if our_task is None:  # deleted by us
+                if their_changed:
+                    raise conflict(their_task.id)
+                continue
+            our_print = _fingerprint(our_task)
+            if our_print == base_print:
+                merged.append(their_task)
+            elif not their_changed or our_print == _fingerprint(their_task):
+                merged.append(our_task)
+            else:
+                raise conflict(their_task.id)
+
+        for task_id, (base_print, _) in base.items():
+            our_task = ours_by_id.get(task_id)
+            if (
+                task_id not in their_ids
+                and our_task is not None
+                and _fingerprint(our_task) != base_print
+            ):
+                raise conflict(task_id)  # we changed what they deleted
+
+        used = {task.id for task in merged}
+        next_id = max(used, default=0) + 1
+        for task in ours:
+            if task.id in base:
+                continue
+            if task.id in their_ids or task.id in used:
+                task.id = next_id
+            used.add(task.id)
+            next_id = max(next_id, task.id + 1)
+            merged.append(task)
+
+        # The file just read is the new base, both for the next merge and
+        # for reusing its serialized records.
+        self._forget()
+        if raw:
+            self._remember(theirs, raw=raw)
+        self._loaded = True
+        self._stamp = stamp
+        return merged
+
+    def _base(self) -> Dict[int, Tuple[tuple, int]]:
+        if self._clean is None:
+            with gc_paused():
+                self._clean = {
+                    fingerprint[0]: (fingerprint, i)
+                    for i, fingerprint in enumerate(_record_fingerprints(self._records or []))
+                }
+            self._records = None
+        return self._clean
+
+    def _forget(self) -> None:
+        self._clean = {}
+        self._records = None
+        self._raw = None
+        self._fragments = None
+        self._count = 0
+        self._loaded = False
+        self._stamp = None
+
+    def _remember(
+        self,
+        tasks: Sequence[Task] | TaskCollection,
+        raw: Optional[str] = None,
+        fragments: Optional[List[str]] = None,
+    ) -> None:
+        with gc_paused():
+            self._clean = {task.id: (_fingerprint(task), i) for i, task in enumerate(tasks)}
+        self._records = None
+        self._raw = raw
+        self._fragments = fragments
+        self._count = len(tasks)
+
+    def _cached_fragments(self) -> Optional[List[str]]:
+        # Splitting the loaded text is deferred to the first save, so
+        # read-only commands never pay for it.
+        if self._fragments is None and self._raw is not None:
+            self._fragments = _split_records(self._raw, self._count)
+            self._raw = None
+        return self._fragments
@@ -37,3 +37,36 @@ def test_delete_force(cli_runner, task_file, capsys):
     assert cli_runner(["delete", "--force", "1"]) == 0
     cli_runner(["list", "--all"])
     assert "No tasks" in capsys.readouterr().out
+
+
+def test_list_limit_and_offset(cli_runner, task_file, capsys):
+    for name in ["first", "second", "third", "fourth"]:
+        cli_runner(["add", name])
+    capsys.readouterr()
+
+    assert cli_runner(["list", "--limit", "2", "--offset", "1"]) == 0
+    output = capsys.readouterr().out
+    assert "second" in output and "third" in output
+    assert "first" not in output and "fourth" not in output
+
+    cli_runner(["list", "--offset", "10"])
+    assert "No tasks in the requested range." in capsys.readouterr().out
+
+
+def test_stream_table_sizes_columns_from_sample():
+    from datetime import datetime, timezone
+
+    from app.models import Task
+    from cli import render_table, stream_table
+
+    tasks = [
+        Task(id=task_id, description=f"task {task_id}", created_at=datetime.now(timezone.utc))
+        for task_id in (1, 2, 12345)
+    ]
+    lines = list(stream_table(tasks, sample=2))
+    assert lines[2].startswith("1   [ ]")  # width from "ID" and ids 1, 2
+    assert lines[4].startswith("12345  [ ]")  # wider than the sample, not re-aligned
+
+    fixed = list(stream_table(tasks, widths=[6, 6, 8, 10, 0]))
+    assert fixed[-1].startswith("12345   [ ]")
+    assert render_table(tasks).splitlines()[2].startswith("1      [ ]")
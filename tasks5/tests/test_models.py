@@ -71,3 +71,102 @@ def test_delete_task_returns_removed_and_remaining():
     deleted, remaining = models.delete_task(tasks, 1)
     assert deleted.description == "one"
     assert [task.id for task in remaining] == [2]
+
+
+def test_decode_tasks_matches_from_dict():
+    payload = [
+        build_task("plain", 1).to_dict(),
+        {
+            "id": "2",
+            "description": "odd but valid",
+            "created_at": "2024-03-20T09:15:00.5Z",
+            "priority": " High",
+            "due": "2024-3-5",
+            "completed": 1,
+            "completed_at": "2024-03-21T10:00:00.000001Z",
+        },
+        {"id": 3, "description": "sparse", "created_at": "2024-03-20T09:15:00.000000Z"},
+    ]
+    done = build_task("done", 4)
+    done.due = date(2024, 3, 5)
+    models.mark_task_complete(done)
+    payload.append(done.to_dict())
+    payload.append({**done.to_dict(), "id": 5})
+
+    decoded = models.decode_tasks(payload)
+    assert decoded == [models.Task.from_dict(item) for item in payload]
+    assert [task.created_at.tzinfo for task in decoded] == [timezone.utc] * 5
+    assert decoded[4].due is decoded[3].due  # parsed once
+
+
+def test_decode_tasks_reports_errors_like_from_dict():
+    with pytest.raises(models.ValidationError):
+        models.decode_tasks([{"id": 1, "description": "no timestamp"}])
+    with pytest.raises(models.ValidationError):
+        models.decode_tasks(
+            [{"id": 1, "description": "x", "created_at": "2024-03-20T09:15:00.000000Z",
+              "priority": "urgent"}]
+        )
+
+
+BAD_TIMESTAMPS = [
+    {"created_at": "2024-13-20T09:15:00.000000Z"},
+    {"created_at": "2024-03-20T09:15:00.000000Z", "completed_at": "2024-03-20T25:00:00.000000Z"},
+]
+
+
+@pytest.mark.parametrize("fields", BAD_TIMESTAMPS)
+def test_bad_timestamps_fail_at_load_like_from_dict(fields):
+    from app.table import TaskTable
+
+    item = {"id": 1, "description": "x", **fields}
+    with pytest.raises(Exception) as expected:
+        models.Task.from_dict(item)
+    for decode in (models.decode_tasks, TaskTable.from_payload):
+        with pytest.raises(expected.type) as raised:
+            decode([item])
+        assert str(raised.value) == str(expected.value)
+
+
+def test_task_collection_lookup_update_delete():
+    collection = models.TaskCollection(build_task(f"task {i}", i) for i in range(1, 6))
+    assert len(collection) == 5
+    assert collection.get(3).description == "task 3"
+
+    replacement = build_task("three again", 3)
+    models.update_task_collection(collection, replacement)
+    assert collection.get(3) is replacement
+
+    deleted, same = models.delete_task(collection, 2)
+    assert same is collection
+    assert deleted.description == "task 2"
+    assert 2 not in collection
+    with pytest.raises(models.TaskNotFoundError):
+        models.find_task(collection, 2)
+    with pytest.raises(models.ValidationError):
+        collection.add(build_task("duplicate", 4))
+
+    # Tombstones are skipped, then compacted away; order is kept.
+    collection.delete(1)
+    collection.delete(4)
+    assert [task.id for task in collection] == [3, 5]
+    collection.add(build_task("six", 6))
+    assert [task.id for task in collection] == [3, 5, 6]
+    assert collection.get(6).description == "six"
+
+
+def test_task_collection_next_id_follows_highest_live_id():
+    collection = models.TaskCollection([build_task("a", 1), build_task("b", 1000)])
+    assert models.next_task_id(collection) == 1001
+    collection.delete(1000)
+    assert collection.next_id() == 2
+    collection.delete(1)
+    assert collection.next_id() == 1
+
+    created = models.create_task("fresh", None, None, collection)
+    assert created.id == 1
+
+
+def test_task_collection_rejects_duplicate_ids():
+    with pytest.raises(models.ValidationError):
+        models.TaskCollection([build_task("a", 1), build_task("b", 1)])
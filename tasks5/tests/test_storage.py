@@ -1,12 +1,14 @@
 from __future__ import annotations
 
+import json
+import multiprocessing
 from datetime import datetime, timezone
 from pathlib import Path
 
 import pytest
 
-from app.models import Priority, Task
-from storage import TaskStorage
+from app.models import Priority, Task, create_task
+from storage import ConflictError, TaskStorage
 
 
 def make_task(task_id: int) -> Task:
@@ -43,3 +45,147 @@ def test_corrupt_file_raises(tmp_path: Path):
     storage = TaskStorage(target)
     with pytest.raises(ValueError):
         storage.load_tasks()
+
+
+def test_saved_file_matches_plain_json_dump(tmp_path: Path):
+    target = tmp_path / "tasks.json"
+    tasks = [make_task(i) for i in range(1, 4)]
+    tasks[1].description = 'Tricky "},\n  {" text'
+    TaskStorage(target).save_tasks(tasks)
+    expected = json.dumps([task.to_dict() for task in tasks], indent=2)
+    assert target.read_text() == expected
+
+
+def test_save_only_serializes_changed_and_new_records(tmp_path: Path):
+    target = tmp_path / "tasks.json"
+    TaskStorage(target).save_tasks([make_task(i) for i in range(1, 6)])
+
+    storage = TaskStorage(target)
+    tasks = storage.load_tasks()
+    tasks[2].completed = True
+    tasks[2].completed_at = datetime.now(timezone.utc)
+    del tasks[0]
+    tasks.append(make_task(6))
+    storage.save_tasks(tasks)
+    assert storage.serialized_last_save == 2
+
+    assert target.read_text() == json.dumps([task.to_dict() for task in tasks], indent=2)
+    reloaded = TaskStorage(target).load_tasks()
+    assert [task.id for task in reloaded] == [2, 3, 4, 5, 6]
+    assert reloaded[1].completed
+
+    storage.save_tasks(tasks)
+    assert storage.serialized_last_save == 0
+
+
+def test_unchanged_records_are_reused_whatever_their_values(tmp_path: Path):
+    # Records that decode_tasks hands to from_dict must fingerprint the same
+    # way as the ones it reads directly, or loading and saving would rewrite them.
+    target = tmp_path / "tasks.json"
+    records = [task.to_dict() for task in (make_task(i) for i in range(1, 5))]
+    records[0]["id"] = "1"
+    del records[1]["priority"]
+    records[2]["priority"] = "HIGH"
+    records[3]["due"] = "2024-03-20"
+    records[3]["completed_at"] = "2024-03-20T09:15:00.5Z"
+    target.write_text(json.dumps(records, indent=2))
+
+    storage = TaskStorage(target)
+    storage.save_tasks(storage.load_tasks())
+    assert storage.serialized_last_save == 0
+    assert json.loads(target.read_text()) == records
+
+
+def test_save_after_loading_foreign_layout_rewrites_everything(tmp_path: Path):
+    target = tmp_path / "tasks.json"
+    tasks = [make_task(i) for i in range(1, 4)]
+    target.write_text(json.dumps([task.to_dict() for task in tasks]))
+
+    storage = TaskStorage(target)
+    loaded = storage.load_tasks()
+    storage.save_tasks(loaded)
+    assert storage.serialized_last_save == 3
+    assert target.read_text() == json.dumps([task.to_dict() for task in tasks], indent=2)
+
+
+def test_concurrent_adds_are_merged(tmp_path: Path):
+    target = tmp_path / "tasks.json"
+    TaskStorage(target).save_tasks([make_task(1)])
+
+    first, second = TaskStorage(target), TaskStorage(target)
+    mine, theirs = first.load_collection(), second.load_collection()
+    theirs.add(make_task(2))
+    second.save_tasks(theirs)
+
+    added = make_task(2)
+    mine.add(added)
+    mine.get(1).completed = True
+    written = first.save_tasks(mine)
+    assert first.merged_last_save
+    assert added.id == 3  # renumbered, their task 2 is kept
+    assert [task.id for task in written] == [1, 2, 3]
+
+    reloaded = TaskStorage(target).load_tasks()
+    assert [task.id for task in reloaded] == [1, 2, 3]
+    assert reloaded[0].completed
+
+    # Our collection now matches the merged file, so later edits stay consistent.
+    assert 3 in mine and mine.get(3) is added
+    assert mine.get(2).id == 2
+    followup = create_task("After merge", None, None, mine)
+    mine.add(followup)
+    first.save_tasks(mine)
+    assert followup.id == 4
+    assert not first.merged_last_save
+
+    reloaded = TaskStorage(target).load_collection()
+    assert [task.id for task in reloaded] == [1, 2, 3, 4]
+
+
+def test_overlapping_edits_raise_conflict(tmp_path: Path):
+    target = tmp_path / "tasks.json"
+    TaskStorage(target).save_tasks([make_task(1), make_task(2)])
+
+    first, second = TaskStorage(target), TaskStorage(target)
+    mine, theirs = first.load_tasks(), second.load_tasks()
+    theirs[0].description = "Edited elsewhere"
+    del theirs[1]
+    second.save_tasks(theirs)
+
+    mine[0].description = "Edited here"
+    with pytest.raises(ConflictError):
+        first.save_tasks(mine)
+    mine = first.load_tasks()
+    assert [task.description for task in mine] == ["Edited elsewhere"]
+
+    third = TaskStorage(target)
+    stale = third.load_tasks()
+    first.save_tasks([])
+    stale[0].priority = Priority.HIGH
+    with pytest.raises(ConflictError):
+        third.save_tasks(stale)  # changed what was deleted
+
+
+def _add_many(path: str, worker: int, count: int) -> None:
+    from cli import main
+
+    for i in range(count):
+        assert main(["--data", path, "add", f"worker {worker} task {i}"]) == 0
+
+
+def test_parallel_writers_lose_no_updates(tmp_path: Path):
+    target = tmp_path / "tasks.json"
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(target=_add_many, args=(str(target), worker, 10))
+        for worker in range(4)
+    ]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+        assert process.exitcode == 0
+
+    tasks = TaskStorage(target).load_tasks()
+    assert sorted(task.id for task in tasks) == list(range(1, 41))
+    assert len({task.description for task in tasks}) == 40
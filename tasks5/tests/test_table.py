@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import random
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from app import models
+from app.table import TaskTable
+
+
+def random_tasks(count: int, seed: int = 7) -> list[models.Task]:
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    tasks = []
+    for task_id in range(1, count + 1):
+        task = models.Task(
+            id=task_id,
+            description=rng.choice(["Write spec", "Plan tests", "Ünïcode ✓", ""]) + str(task_id),
+            # Repeated timestamps make sure ties keep their order.
+            created_at=start + timedelta(microseconds=rng.randrange(50)),
+            priority=rng.choice(list(models.Priority)),
+            due=rng.choice([None, date(2024, 3, 20), date(2024, 2, 1), date.max]),
+        )
+        if rng.random() < 0.3:
+            task.completed = True
+            task.completed_at = start + timedelta(days=1, microseconds=rng.randrange(10**6))
+        tasks.append(task)
+    return tasks
+
+
+def test_round_trip_through_tasks_and_payload():
+    tasks = random_tasks(200)
+    assert TaskTable.from_tasks(tasks).to_tasks() == tasks
+
+    payload = models.tasks_to_payload(tasks)
+    payload[0]["priority"] = " HIGH"
+    payload[1]["due"] = "2024-3-5"
+    payload[2]["created_at"] = "2024-03-20T09:15:00.5Z"
+    expected = [models.Task.from_dict(item) for item in payload]
+    assert TaskTable.from_payload(payload).to_tasks() == expected
+
+
+def test_from_payload_rejects_what_from_dict_rejects():
+    bad = {"id": 1, "description": "x", "created_at": "2024-03-20T09:15:00.000000Z",
+           "priority": "urgent"}
+    with pytest.raises(models.ValidationError):
+        TaskTable.from_payload([bad])
+
+
+@pytest.mark.parametrize("view", ["all", "completed", "pending"])
+@pytest.mark.parametrize("sort_key", [None, "priority", "due"])
+def test_filter_and_sort_match_list_helpers(view, sort_key):
+    tasks = random_tasks(300)
+    table = TaskTable.from_tasks(tasks)
+    rows = table.sort(table.filter(view), sort_key)
+    expected = models.sort_tasks(models.filter_tasks(tasks, view), sort_key)
+    assert [table.ids[row] for row in rows] == [task.id for task in expected]
+
+
+def test_filter_narrows_given_rows():
+    table = TaskTable.from_tasks(random_tasks(50))
+    some = list(range(0, 50, 3))
+    assert table.filter("completed", some) == [r for r in some if table.completed[r]]
+
+
+@pytest.mark.parametrize("sort_key", [None, "priority", "due"])
+@pytest.mark.parametrize("offset,limit", [(0, 1), (0, 20), (15, 10), (290, 50), (0, None), (5, None)])
+def test_select_matches_sorted_slice(sort_key, offset, limit):
+    table = TaskTable.from_tasks(random_tasks(300))
+    end = None if limit is None else offset + limit
+    expected = table.sort(table.filter("pending"), sort_key)[offset:end]
+    assert table.select("pending", sort_key, offset=offset, limit=limit) == expected
+    assert table.count("pending") == len(table.filter("pending"))
+
+
+@pytest.mark.parametrize("view", ["all", "completed", "pending"])
+@pytest.mark.parametrize("sort_key", [None, "priority", "due"])
+def test_select_on_large_unordered_table(view, sort_key):
+    tasks = random_tasks(20_000, seed=3)
+    for task in tasks[::7]:
+        task.created_at += timedelta(days=task.id % 11)
+    table = TaskTable.from_tasks(tasks[::-1])
+    expected = table.sort(table.filter(view), sort_key)[3:28]
+    assert table.select(view, sort_key, offset=3, limit=25) == expected